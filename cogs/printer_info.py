@@ -1,10 +1,14 @@
 """Cog for displaying printer information in a Discord bot."""
 
 from functools import partial
-from typing import Optional
+from typing import List, Optional
 
+import io
 import logging
+import re
+import time
 import discord
+from discord import app_commands
 from discord.ext import commands
 
 import bambulabs_api as bl
@@ -15,6 +19,8 @@ from .printer_utils import PrinterUtils
 from .ui import ( # type: ignore[attr-defined]
     MenuView,
     embed_printer_info,
+    build_fleet_check_embed,
+    build_history_embed,
     PrinterEditModal
 )
 
@@ -25,7 +31,12 @@ from .utils import ( # type: ignore[attr-defined]
     set_image_default_credentials_callback,
     set_image_custom_credentials_callback,
     delete_printer,
-    connection_check
+    connection_check,
+    check_fleet_connections,
+    get_printer_data_dict,
+    PrinterSnapshot,
+    get_history_chart,
+    parse_window
 )
 
 logger = logging.getLogger(__name__)
@@ -96,7 +107,8 @@ class PrinterInfo(commands.Cog):
         if printer_object is None:
             return
 
-        if printer_object.get_state() == GcodeState.RUNNING:
+        snapshot = PrinterSnapshot.capture(printer_object)
+        if snapshot.state == GcodeState.RUNNING:
             set_image_cb = partial(
                 set_image_custom_credentials_callback,
                 printer_name=printer_name,
@@ -109,7 +121,8 @@ class PrinterInfo(commands.Cog):
             ctx=ctx,
             printer_object=printer_object,
             printer_name=printer_name,
-            set_image_callback=set_image_cb
+            set_image_callback=set_image_cb,
+            snapshot=snapshot
         )
 
     async def delete_printer_callback(
@@ -121,6 +134,7 @@ class PrinterInfo(commands.Cog):
         if delete_printer(
             printer_name=printer_name,
             printer_utils_cog=printer_utils_cog):
+            await printer_utils_cog.release_printer(printer_name)
             await ctx.send(f"✅ Successfully deleted printer: {printer_name}")
         return
 
@@ -191,11 +205,32 @@ class PrinterInfo(commands.Cog):
 
     @commands.hybrid_command(name="check_connection", # type: ignore[arg-type]
                              description="Check connection of the 3D printer")
-    async def check_connection(self, ctx: commands.Context[commands.Bot]):
-        """Hybrid command to check printer connection."""
-        await self.select_printer_menu_callback(
-            ctx=ctx,
-            menu_callback=MenuCallBack.CALLBACK_CONNECTION_CHECK)
+    async def check_connection(self, ctx: commands.Context[commands.Bot], fleet: bool = False):
+        """Hybrid command to check printer connection, or of all printers with `fleet`."""
+        if not fleet:
+            await self.select_printer_menu_callback(
+                ctx=ctx,
+                menu_callback=MenuCallBack.CALLBACK_CONNECTION_CHECK)
+            return
+
+        printer_utils_cog = await self._get_printer_utils_cog(ctx=ctx)
+        if not await self.check_printer_list(ctx=ctx, printer_utils_cog=printer_utils_cog):
+            logger.debug("No Printers in the list")
+            return
+
+        await ctx.defer()
+        started = time.monotonic()
+        reports = await check_fleet_connections(
+            printers={
+                printer_name: get_printer_data_dict(printer_data)
+                for printer_name, printer_data in printer_utils_cog.connected_printers.items()
+            },
+            pooled=printer_utils_cog.pool.get
+        )
+        await ctx.send(embed=build_fleet_check_embed(
+            reports=reports,
+            elapsed=time.monotonic() - started
+        ))
 
     @commands.hybrid_command(name="delete_printer", # type: ignore[arg-type]
                              description="Delete printer from the list")
@@ -213,6 +248,50 @@ class PrinterInfo(commands.Cog):
             ctx=ctx,
             menu_callback=MenuCallBack.CALLBACK_EDIT_PRINTER)
 
+    async def history_printer_autocomplete(
+        self,
+        interaction: discord.Interaction,  # pylint: disable=unused-argument
+        current: str) -> List[app_commands.Choice[str]]:
+        """Suggests the printers in the list whose name contains what was typed."""
+        printer_utils_cog = await get_cog(self.bot, "PrinterUtils")
+        if printer_utils_cog is None:
+            return []
+        return [
+            app_commands.Choice(name=printer_name, value=printer_name)
+            for printer_name in printer_utils_cog.connected_printers
+            if current.lower() in printer_name.lower()
+        ][:25]
+
+    @commands.hybrid_command(name="history", # type: ignore[arg-type]
+                             description="Show temperature and progress charts of a printer")
+    @app_commands.describe(printer="Name of the printer",
+                           window="Time span to show, e.g. 30m, 6h or 7d")
+    @app_commands.autocomplete(printer=history_printer_autocomplete)
+    async def history(self, ctx: commands.Context[commands.Bot], printer: str, window: str = "6h"):
+        """Hybrid command to show the recorded telemetry of a printer as charts."""
+        printer_utils_cog = await self._get_printer_utils_cog(ctx=ctx)
+        if printer_utils_cog is None:
+            return
+        if printer not in printer_utils_cog.connected_printers:
+            await ctx.send(f"❌ Printer '{printer}' is not in the list")
+            return
+        window_seconds = parse_window(window)
+        if window_seconds is None:
+            await ctx.send(f"❌ Invalid window '{window}', use e.g. 30m, 6h or 7d")
+            return
+
+        await ctx.defer()
+        chart = await get_history_chart(printer, window_seconds)
+        if chart is None:
+            await ctx.send(f"📉 No telemetry of '{printer}' recorded in the last {window}")
+            return
+
+        filename = f"history_{re.sub(r'[^A-Za-z0-9_-]', '_', printer)}.png"
+        await ctx.send(
+            embed=build_history_embed(printer_name=printer, window=window, filename=filename),
+            file=discord.File(io.BytesIO(chart), filename=filename)
+        )
+
 async def setup(bot):
     """Setup function to add this cog to the bot."""
     await bot.add_cog(PrinterInfo(bot))
@@ -1,31 +1,62 @@
 """Utilities for managing 3D printer connections, MQTT, and monitoring."""
-# pylint: disable=too-many-arguments, too-many-positional-arguments
+# pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-instance-attributes
 
 import asyncio
 import logging
 import os
 from dataclasses import asdict
-from typing import Dict, Optional
+from functools import partial
+from typing import Dict, List, Mapping, Optional, Union
 
 import discord
 from discord.ext import commands, tasks
 import bambulabs_api as bl
 from bambulabs_api.states_info import GcodeState
 
-from .ui.embed_helpers import embed_printer_info
+from .ui.embed_helpers import build_status_content, build_circuit_status_embed
+from .ui.status_board import StatusBoard
+from .ui.outbox import outbox
+from .ui.fleet_dashboard import FleetDashboard, DASHBOARD_ENABLED
+from .ui.printer_buttons import PrinterControlButton, MAX_PRINTER_NAME_LENGTH
 
 from .utils import ( # type: ignore[attr-defined]
     PrinterCredentials,
-    PrinterStorage,
+    PrinterRegistry,
+    StatusMessageStorage,
+    open_printer_storage,
     set_image_custom_credentials_callback,
+    observe_camera_frame,
     get_printer_data_dict,
     PrinterDataDict,
     _validate_ip,
     _check_printer_status,
-    connect_to_printer
+    connect_to_printer,
+    PrinterTaskRunner,
+    PrinterReportBridge,
+    PrinterConnectionPool,
+    ReconnectScheduler,
+    PollScheduler,
+    poll_interval,
+    printer_io,
+    run_printer_io,
+    camera_frames,
+    image_pool,
+    frame_diffs,
+    TimelapseRecorder,
+    PrinterSnapshot,
+    printer_commands,
+    telemetry,
+    history_charts
 )
+from .utils.timelapse import TIMELAPSE_ENABLED
 logger = logging.getLogger(__name__)
 CHANEL_ID = os.getenv("CHANEL_ID")
+# Seconds between looks at the poll schedule; each printer has its own poll interval
+MONITOR_TICK = float(os.getenv("MONITOR_TICK", "1"))
+# Maximum number of printers checked at the same time during one monitor tick
+MONITOR_CONCURRENCY = int(os.getenv("MONITOR_CONCURRENCY", "16"))
+# Time budget in seconds for checking a single printer during one monitor tick
+MONITOR_PRINTER_TIMEOUT = float(os.getenv("MONITOR_PRINTER_TIMEOUT", "30"))
 
 
 class PrinterUtils(commands.GroupCog,
@@ -35,20 +66,79 @@ class PrinterUtils(commands.GroupCog,
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.storage = PrinterStorage()
-        self.connected_printers: Dict[str, PrinterDataDict] = self.storage.load()
+        self.status_messages = StatusMessageStorage()
+        self.storage: PrinterRegistry = open_printer_storage(
+            status_messages=self.status_messages
+        )
         self.previous_state_dict: Dict[str, Optional[str]] = dict.fromkeys(
             self.connected_printers.keys(), ""
         )
-        self.connected_printer_objects: Dict[str, Optional[bl.Printer]] = dict.fromkeys(
-            self.connected_printers.keys(), None
+        self.pool = PrinterConnectionPool()
+        self.reconnects = ReconnectScheduler(probe_callback=self._probe_printer)
+        self.poll_schedule = PollScheduler()
+        self.monitor_runs: PrinterTaskRunner[float] = PrinterTaskRunner(
+            worker=self._monitor_printer,
+            on_done=self._monitor_done,
+            limit=MONITOR_CONCURRENCY,
+            timeout=MONITOR_PRINTER_TIMEOUT
         )
+        self.timelapses = TimelapseRecorder(printer_lookup=self.pool.get)
+        self.timelapse_uploads: Dict[str, asyncio.Task[None]] = {}
         if CHANEL_ID is None:
             raise ValueError("CHANEL_ID environment variable not set")
         self.status_channel_id = int(CHANEL_ID)
         self.status_channel: Optional[discord.TextChannel] = None
+        self.status_board = StatusBoard(channel_getter=lambda: self.status_channel,
+                                        storage=self.status_messages)
+        self.dashboard = FleetDashboard(channel_getter=lambda: self.status_channel)
+        self.report_bridges: Dict[str, PrinterReportBridge] = {}
+        self.report_consumers: Dict[str, asyncio.Task[None]] = {}
         self.monitor_printers.start()
 
+    @property
+    def connected_printers(self) -> Mapping[str, PrinterDataDict]:
+        """The printer registry, kept in memory by the storage."""
+        return self.storage.printers
+
+    async def cog_load(self) -> None:
+        """Registers the printer control buttons once for all status messages."""
+        self.bot.add_dynamic_items(PrinterControlButton)
+
+    async def cog_unload(self) -> None:
+        """Stops the monitor, the MQTT report consumers and closes all connections."""
+        self.bot.remove_dynamic_items(PrinterControlButton)
+        self.monitor_printers.cancel()
+        self.monitor_runs.cancel_all()
+        for printer_name in list(self.report_bridges):
+            self._stop_watching_reports(printer_name)
+        self.reconnects.close()
+        self.status_board.close()
+        self.dashboard.close()
+        printer_commands.close()
+        for upload in self.timelapse_uploads.values():
+            upload.cancel()
+        await self.timelapses.close()
+        image_pool.shutdown()
+        await self.pool.close_all()
+        await telemetry.close()
+        self.storage.close()
+
+    async def release_printer(self, printer_name: str) -> None:
+        """Stops watching the printer and closes its pooled connection."""
+        self._stop_watching_reports(printer_name)
+        self.reconnects.forget(printer_name)
+        self.poll_schedule.discard(printer_name)
+        self.previous_state_dict.pop(printer_name, None)
+        camera_frames.discard(printer_name)
+        frame_diffs.discard(printer_name)
+        self.status_board.forget(printer_name)
+        self.dashboard.remove(printer_name)
+        printer_commands.discard(printer_name)
+        telemetry.discard(printer_name)
+        history_charts.discard(printer_name)
+        await self.timelapses.discard(printer_name)
+        await self.pool.close(printer_name)
+
     @commands.hybrid_command(  # type: ignore[arg-type]
         name="connect",
         description="Connect to a 3D Printer")
@@ -64,25 +154,60 @@ class PrinterUtils(commands.GroupCog,
         if not await _validate_ip(ip):
             logger.error("Invalid IP address: `%s`.", ip)
             return
+        if len(name) > MAX_PRINTER_NAME_LENGTH:
+            await ctx.send(f"❌ Printer name is longer than {MAX_PRINTER_NAME_LENGTH} characters")
+            return
 
         logger.info("Attempting connection to printer: `%s`", name)
 
         printer_data = PrinterCredentials(ip=ip, access_code=access_code, serial=serial)
-        printer = await connect_to_printer(printer_name=name, printer_data=printer_data)
+        printer = await connect_to_printer(printer_name=name,
+                                           printer_data=printer_data,
+                                           deep_check=True)
         if printer is not None:
-            try:
-                self.connected_printers[name] = asdict(printer_data)  # type: ignore[assignment]
-                self.storage.save(self.connected_printers)
-            finally:
-                await asyncio.to_thread(printer.disconnect)
+            self.storage.set(
+                name,
+                asdict(printer_data),  # type: ignore[arg-type]
+                guild_id=ctx.guild.id if ctx.guild is not None else None
+            )
+            self.pool.adopt(printer_name=name, printer=printer, credentials=printer_data)
+            await ctx.send(f"✅ Successfully connected to the printer: {name}")
+            return
         await ctx.send(f"❌ Can't connect to the printer: {name}")
         return
+
+    @commands.hybrid_command(  # type: ignore[arg-type]
+        name="circuits",
+        description="Show reconnect circuit state of the printers")
+    async def circuits(self, ctx: commands.Context[commands.Bot]):
+        """Discord command to show which printers are skipped by the monitor."""
+        await ctx.send(embed=build_circuit_status_embed(
+            printer_names=list(self.connected_printers),
+            circuits=self.reconnects.circuits()
+        ))
     # pylint: disable=too-many-branches
-    @tasks.loop(seconds=15)
+    @tasks.loop(seconds=MONITOR_TICK)
     async def monitor_printers(self):
-        """Periodically checks printer states and sends updates to Discord."""
+        """
+        Checks the printers whose poll is due and reconnects dropped printers.
+
+        State changes are normally delivered by the MQTT push reports (see
+        `_consume_reports`); polling is the fallback that also catches changes
+        missed while a printer was disconnected. Each printer is polled on its
+        own interval, see `poll_interval`. Checks run in the background, so a
+        printer that hangs until its timeout doesn't hold back the next tick.
+        """
         if not self.connected_printers:
-            logger.debug("No printers in the list")
+            return
+
+        # Printers still being checked are rescheduled when their check ends
+        self.poll_schedule.sync(
+            name for name in self.connected_printers if name not in self.monitor_runs
+        )
+        if DASHBOARD_ENABLED:
+            self.dashboard.sync(self.connected_printers)
+        due_printers = self.poll_schedule.pop_due()
+        if not due_printers:
             return
 
         if self.status_channel is None:
@@ -94,72 +219,270 @@ class PrinterUtils(commands.GroupCog,
             except discord.NotFound:
                 # Channel ID is invalid or the bot can't find it
                 logger.error("Channel with ID %s not found.", self.status_channel_id)
+                self._reschedule_polls(due_printers)
                 return
             except discord.Forbidden:
                 # Bot doesn't have permission to access the channel
                 logger.error("Forbidden: Bot lacks permissions to fetch channel %s.",
                              self.status_channel_id)
+                self._reschedule_polls(due_printers)
                 return
             except discord.HTTPException as e:
                 # General HTTP request error (e.g., network issue, Discord API error)
                 logger.error("HTTP error while fetching channel %s: %s", self.status_channel_id, e)
+                self._reschedule_polls(due_printers)
                 return
 
-        for printer_name, printer_data in list(self.connected_printers.items()):
-            printer = self.connected_printer_objects.get(printer_name)
-            if printer is None or not printer.mqtt_client.is_connected():
-                logger.warning("Printer %s is disconnected. Reconnecting...", printer_name)
-                printer_object = await connect_to_printer(
+        started = self.monitor_runs.start(due_printers)
+        await self.pool.evict_idle()
+        logger.debug("Monitor tick started %d printer check(s).", len(started))
+        io_stats = printer_io.stats()
+        logger.debug("Printer I/O: %d queued, %d running, wait avg %.3fs max %.3fs.",
+                     io_stats.queue_depth, io_stats.running,
+                     io_stats.average_wait, io_stats.max_wait)
+        for outbox_stats in outbox.stats():
+            logger.debug("Outbox of channel %s: %d queued, %d sent, %d coalesced, "
+                         "delay avg %.2fs max %.2fs.",
+                         outbox_stats.channel_id, outbox_stats.queue_depth,
+                         outbox_stats.sent, outbox_stats.coalesced,
+                         outbox_stats.average_delay, outbox_stats.max_delay)
+        for command_stats in printer_commands.stats():
+            logger.debug("Commands of `%s`: %d queued, %d run, %d deduplicated, "
+                         "%d collapsed, wait avg %.2fs max %.2fs.",
+                         command_stats.printer_name, command_stats.queue_depth,
+                         command_stats.executed, command_stats.deduplicated,
+                         command_stats.collapsed, command_stats.average_wait,
+                         command_stats.max_wait)
+
+    def _monitor_done(self, printer_name: str, result: Union[float, BaseException]) -> None:
+        """Schedules the next check of a printer once its background check ended."""
+        if isinstance(result, float):
+            self.poll_schedule.schedule(printer_name, result)
+            return
+        self.poll_schedule.schedule(printer_name, poll_interval(None))
+        if isinstance(result, asyncio.TimeoutError):
+            logger.error("Monitoring `%s` timed out after %.1fs.",
+                         printer_name, MONITOR_PRINTER_TIMEOUT)
+            if self.pool.get(printer_name) is None:
+                self.reconnects.record_failure(printer_name)
+        else:
+            logger.error("Monitoring `%s` failed.", printer_name, exc_info=result)
+
+    def _reschedule_polls(self, printer_names: List[str]) -> None:
+        """Puts printers whose poll could not run back on their idle interval."""
+        for printer_name in printer_names:
+            self.poll_schedule.schedule(printer_name, poll_interval(None))
+
+    async def _monitor_printer(self, printer_name: str) -> float:
+        """
+        Checks a single printer and posts an update if its state changed.
+
+        Returns:
+            float: Seconds until this printer should be polled again.
+        """
+        printer_data = self.connected_printers.get(printer_name)
+        if printer_data is None:
+            return poll_interval(None)
+        await telemetry.load(printer_name)
+
+        printer = self.pool.get(printer_name)
+        if printer is None:
+            if self.reconnects.is_open(printer_name):
+                logger.debug("Circuit of `%s` is open, leaving it to the reconnect probe.",
+                             printer_name)
+                self._record_telemetry(printer_name, None)
+                return poll_interval(None)
+            logger.warning("Printer %s is disconnected. Reconnecting...", printer_name)
+            printer = await self.pool.acquire(
+                printer_name=printer_name,
+                credentials=get_printer_data_dict(printer_data=printer_data)
+            )
+            if printer is None:
+                logger.error("Failed to reconnect printer `%s`.", printer_name)
+                self.reconnects.record_failure(printer_name)
+                self._record_telemetry(printer_name, None)
+                return poll_interval(None)
+            self.reconnects.record_success(printer_name)
+            logger.info("Reconnected to printer `%s`.", printer_name)
+
+        self._watch_reports(printer_name=printer_name, printer=printer)
+        printer_current_state = await _check_printer_status(
+            printer= printer,
+            printer_name= printer_name
+            )
+        if printer_current_state is None:
+            logger.exception("Can't get state for the `%s`. Removing from active list.",
+                             printer_name)
+            self._stop_watching_reports(printer_name)
+            await self.pool.close(printer_name)
+            self._record_telemetry(printer_name, None)
+            return poll_interval(None)
+
+        await self._handle_state_change(
+            printer_name=printer_name,
+            printer=printer,
+            printer_current_state=printer_current_state
+        )
+        self._record_telemetry(printer_name, printer)
+        # Status messages only capture the camera on state changes; keep comparing
+        # frames during a long print, so a print without visible progress is noticed
+        if (printer_current_state == GcodeState.RUNNING
+                and frame_diffs.observation_due(printer_name)):
+            await observe_camera_frame(printer_name, printer)
+        return await self._next_poll_interval(printer=printer, state=printer_current_state)
+
+    def _record_telemetry(self, printer_name: str, printer: Optional[bl.Printer]) -> None:
+        """Feeds the latest telemetry of a printer (None if offline) to history and dashboard."""
+        snapshot = PrinterSnapshot.capture(printer) if printer is not None else None
+        if snapshot is not None:
+            telemetry.record(printer_name, snapshot)
+        if DASHBOARD_ENABLED:
+            self.dashboard.update(printer_name, snapshot)
+
+    @staticmethod
+    async def _next_poll_interval(printer: bl.Printer, state: str) -> float:
+        """Poll interval for a connected printer based on its state and remaining time."""
+        remaining_time = None
+        if state == GcodeState.RUNNING:
+            remaining_time = await run_printer_io(printer.get_time)
+        return poll_interval(state, remaining_time)
+
+    async def _probe_printer(self, printer_name: str) -> bool:
+        """Background reconnect attempt used by the reconnect scheduler."""
+        printer_data = self.connected_printers.get(printer_name)
+        if printer_data is None:
+            self.reconnects.forget(printer_name)
+            return False
+        printer = await self.pool.acquire(
+            printer_name=printer_name,
+            credentials=get_printer_data_dict(printer_data=printer_data)
+        )
+        if printer is None:
+            return False
+        logger.info("Reconnect probe reached `%s`.", printer_name)
+        self._watch_reports(printer_name=printer_name, printer=printer)
+        return True
+
+    async def _handle_state_change(self,
+                                   printer_name: str,
+                                   printer: bl.Printer,
+                                   printer_current_state: str) -> None:
+        """Posts the printer status to the status channel when its state changed."""
+        if self.status_channel is None:
+            # The monitor will pick the change up once the channel is fetched
+            return
+
+        previous_state = self.previous_state_dict.get(printer_name)
+        logger.info("Current state: %s is %s", printer_name, printer_current_state)
+        logger.info("Previous state: %s", previous_state)
+
+        if printer_current_state not in (
+            GcodeState.RUNNING,
+            GcodeState.FINISH,
+            GcodeState.FAILED
+        ) or previous_state == printer_current_state:
+            return
+
+        # Record the state before awaiting, so the push report and the fallback
+        # poll can't both announce the same transition
+        self.previous_state_dict[printer_name] = printer_current_state
+        self.storage.record_state(printer_name, printer_current_state)
+        self.status_board.update(
+            printer_name,
+            partial(
+                build_status_content,
+                printer_object=printer,
+                printer_name=printer_name,
+                set_image_callback=partial(
+                    set_image_custom_credentials_callback,
                     printer_name=printer_name,
-                    printer_data=get_printer_data_dict(printer_data=printer_data)
+                    printer_object=printer,
+                    reuse_message_id=self.status_board.storage.get(printer_name)
                 )
-                if printer_object is None:
-                    logger.error("Failed to reconnect printer `%s`.", printer_name)
-                    continue
-                self.connected_printer_objects[printer_name] = printer_object
-                logger.info("Reconnected to printer `%s`.", printer_name)
+            )
+        )
+        logger.info(
+            "Printer `%s` state changed: %s ➜ %s",
+            printer_name,
+            previous_state,
+            printer_current_state
+        )
 
-            printer = self.connected_printer_objects[printer_name]
-            if printer is None:
-                continue
-            printer_current_state = await _check_printer_status(
-                printer= printer,
-                printer_name= printer_name
+        if not TIMELAPSE_ENABLED:
+            return
+        if printer_current_state == GcodeState.RUNNING:
+            await self.timelapses.start(printer_name)
+        elif self.timelapses.is_recording(printer_name):
+            # Rendering takes a while, so it must not hold up the monitor tick
+            self.timelapse_uploads[printer_name] = asyncio.create_task(
+                self._post_timelapse(printer_name),
+                name=f"timelapse-upload-{printer_name}"
+            )
+
+    async def _post_timelapse(self, printer_name: str) -> None:
+        """Renders the timelapse of a finished print and posts it to the status channel."""
+        async def deliver(path) -> None:
+            channel = self.status_channel
+            if channel is None:
+                return
+            await outbox.post(
+                channel.id,
+                lambda: channel.send(
+                    content=f"Timelapse of `{printer_name}`",
+                    file=discord.File(path)
                 )
-            if printer_current_state is not None:
-                previous_state = self.previous_state_dict.get(printer_name)
-                logger.info("Current state: %s is %s", printer_name, printer_current_state)
-                logger.info("Previous state: %s", previous_state)
-
-                if printer_current_state in (
-                    GcodeState.RUNNING,
-                    GcodeState.FINISH,
-                    GcodeState.FAILED
-                ):
-                    if previous_state != printer_current_state:
-                        await embed_printer_info(
-                            printer_object=printer,
-                            printer_name=printer_name,
-                            set_image_callback=lambda pn=printer_name,# type: ignore[misc]
-                            po=printer: set_image_custom_credentials_callback(
-                                printer_name=pn,
-                                printer_object=po
-                            ),
-                            status_channel=self.status_channel
-                        )
-                        logger.info(
-                            "Printer `%s` state changed: %s ➜ %s",
-                            printer_name,
-                            previous_state,
-                            printer_current_state
-                        )
-                        self.previous_state_dict[printer_name] = printer_current_state
-            else:
-                logger.exception("Can't get state for the `%s`. Removing from active list.",
-                                 printer_name)
-                await asyncio.to_thread(printer.disconnect)
-                del self.connected_printer_objects[printer_name]
+            )
+
+        try:
+            await self.timelapses.finish(printer_name, deliver)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Failed to post the timelapse of `%s`.", printer_name)
+        finally:
+            self.timelapse_uploads.pop(printer_name, None)
+
+    def _watch_reports(self, printer_name: str, printer: bl.Printer) -> None:
+        """Starts reacting to MQTT push reports of the printer, if not already done."""
+        bridge = self.report_bridges.get(printer_name)
+        if bridge is not None and bridge.printer is printer:
+            return
+        self._stop_watching_reports(printer_name)
 
+        bridge = PrinterReportBridge(printer_name=printer_name, printer=printer)
+        bridge.attach()
+        self.report_bridges[printer_name] = bridge
+        self.report_consumers[printer_name] = asyncio.create_task(
+            self._consume_reports(bridge),
+            name=f"printer-reports-{printer_name}"
+        )
+
+    def _stop_watching_reports(self, printer_name: str) -> None:
+        """Detaches the MQTT report bridge of the printer and stops its consumer."""
+        bridge = self.report_bridges.pop(printer_name, None)
+        if bridge is not None:
+            bridge.detach()
+        consumer = self.report_consumers.pop(printer_name, None)
+        if consumer is not None:
+            consumer.cancel()
+
+    async def _consume_reports(self, bridge: PrinterReportBridge) -> None:
+        """Handles the state changes pushed by a printer until cancelled."""
+        while True:
+            event = await bridge.get()
+            logger.debug("Push report from `%s`: %s ➜ %s",
+                         event.printer_name, event.previous_state, event.state)
+            try:
+                await self._handle_state_change(
+                    printer_name=event.printer_name,
+                    printer=bridge.printer,
+                    printer_current_state=event.state
+                )
+                self._record_telemetry(event.printer_name, bridge.printer)
+                self.poll_schedule.schedule(
+                    event.printer_name,
+                    await self._next_poll_interval(printer=bridge.printer, state=event.state)
+                )
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to handle state change of `%s`", event.printer_name)
 
 async def setup(bot):
     """Sets up the PrinterUtils cog."""
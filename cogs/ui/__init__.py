@@ -4,8 +4,17 @@ from .printer_menu import MenuView
 
 from .embed_helpers import embed_printer_info
 from .embed_helpers import build_printer_status_embed
-from .embed_helpers import delete_image
+from .embed_helpers import build_circuit_status_embed
+from .embed_helpers import build_fleet_check_embed
+from .embed_helpers import build_status_content
+from .embed_helpers import build_fleet_dashboard_embeds
+from .embed_helpers import build_history_embed
 
-from .printer_buttons import PrinterControlView
+from .status_board import StatusBoard, StatusContent
+from .outbox import DiscordOutbox, OutboxStats, outbox
+
+from .printer_buttons import PrinterControlView, PrinterControlButton, MAX_PRINTER_NAME_LENGTH
 
 from .printer_modal import PrinterEditModal
+
+from .fleet_dashboard import FleetDashboard
@@ -1,61 +1,131 @@
 """Helpers for building and sending printer status embeds via Discord."""
 
-import os
 import logging
-from typing import Callable, Awaitable, Optional
+from functools import partial
+from typing import Callable, Awaitable, Dict, List, Optional, Tuple
 
 from discord.ext import commands
 import discord
 import bambulabs_api as bl
+from bambulabs_api.states_info import GcodeState
 
 from cogs.utils.printer_helpers import finish_time_format, printer_error_handler
 from cogs.utils.models import ImageCredentials
+from cogs.utils.enums import CircuitState
+from cogs.utils.reconnect import PrinterCircuit
+from cogs.utils.printer_connection import ConnectReport
+from cogs.utils.frame_diff import frame_diffs, FRAME_STALL_WARNING
+from cogs.utils.snapshot import PrinterSnapshot
 
 from .printer_buttons import PrinterControlView
+from .status_board import StatusContent
 
 logger = logging.getLogger(__name__)
 
+# Printers per fleet dashboard embed (Discord allows at most 25 fields)
+DASHBOARD_PAGE_SIZE = 24
+
 
 async def embed_printer_info(
     printer_object: bl.Printer,
     printer_name: str,
     set_image_callback: Callable[[], Awaitable[ImageCredentials]],
-    ctx: Optional[commands.Context[commands.Bot]] = None,
-    status_channel: Optional[discord.TextChannel] = None
+    ctx: commands.Context[commands.Bot],
+    snapshot: Optional[PrinterSnapshot] = None
 ):
-    """Sends a Discord embed with printer info and an image attachment."""
+    """
+    Replies with a Discord embed with printer info, an image attachment and the controls.
 
-    image_credentials = await set_image_callback()
-    embed = await build_printer_status_embed(
-        printer_object=printer_object,
+    The embed is rendered from `snapshot`, or from a snapshot taken now if None.
+    Status channel messages are published by the `StatusBoard` instead.
+    """
+
+    embed, image_credentials = await _build_embed_with_image(
+        snapshot=snapshot if snapshot is not None else PrinterSnapshot.capture(printer_object),
         printer_name=printer_name,
-        image_url=image_credentials.embed_set_image_url,
+        set_image_callback=set_image_callback,
         ctx=ctx
     )
 
     printer_buttons_controller = PrinterControlView(printer=printer_object,
                                                     printer_name=printer_name)
-    if status_channel is not None:
-        await status_channel.send(
-            file=image_credentials.image_main_location,
-            embed=embed
+    await ctx.send(
+        files=image_credentials.upload_files,
+        embed=embed,
+        view=printer_buttons_controller
+    )
+
+
+async def build_status_content(
+    printer_object: bl.Printer,
+    printer_name: str,
+    set_image_callback: Callable[[], Awaitable[ImageCredentials]]
+) -> StatusContent:
+    """Builds the live status message of a printer for the status board."""
+    snapshot = PrinterSnapshot.capture(printer_object)
+    embed, image_credentials = await _build_embed_with_image(
+        snapshot=snapshot,
+        printer_name=printer_name,
+        set_image_callback=set_image_callback
+    )
+    return StatusContent(
+        embed=embed,
+        view=PrinterControlView(printer=printer_object, printer_name=printer_name),
+        files=image_credentials.upload_files,
+        on_published=partial(_remember_upload, printer_name, image_credentials),
+        snapshot=snapshot
+    )
+
+
+async def _build_embed_with_image(
+    snapshot: PrinterSnapshot,
+    printer_name: str,
+    set_image_callback: Callable[[], Awaitable[ImageCredentials]],
+    ctx: Optional[commands.Context[commands.Bot]] = None
+) -> Tuple[discord.Embed, ImageCredentials]:
+    """Captures the image and builds the status embed showing it."""
+    image_credentials = await set_image_callback()
+    embed = await build_printer_status_embed(
+        snapshot=snapshot,
+        printer_name=printer_name,
+        image_url=image_credentials.embed_set_image_url,
+        ctx=ctx
+    )
+    if image_credentials.frame_age is not None:
+        embed.set_footer(
+            text=f"Camera unavailable, frame is {image_credentials.frame_age:.0f}s old"
         )
-        await status_channel.send(view = printer_buttons_controller)
-    if ctx is not None:
-        await ctx.send(
-            file=image_credentials.image_main_location,
-            embed=embed
+    unchanged_for = frame_diffs.unchanged_for(printer_name)
+    if (image_credentials.frame_signature is not None
+            and unchanged_for is not None and unchanged_for >= FRAME_STALL_WARNING):
+        embed.add_field(
+            name="Camera",
+            value=f"No visible progress for {unchanged_for / 60:.0f} min",
+            inline=False
         )
-        await ctx.send(view=printer_buttons_controller)
+    return embed, image_credentials
 
-    await delete_image(
-        delete_image_callback=image_credentials.delete_image_flag,
-        image_filename=image_credentials.image_filename
-    )
+
+def _remember_upload(printer_name: str,
+                     image_credentials: ImageCredentials,
+                     message: discord.Message) -> None:
+    """
+    Stores the CDN URL of a camera frame uploaded to a status board message, so
+    later edits of that message can reuse it while the frame is unchanged.
+    """
+    if image_credentials.frame_signature is None or image_credentials.reuse_url is not None:
+        return
+    if not message.embeds or not message.embeds[0].image.url:
+        return
+    url = message.embeds[0].image.url
+    if not url.startswith("attachment://"):
+        frame_diffs.record_upload(
+            printer_name, message.id, image_credentials.frame_signature, url
+        )
 
 
 async def build_printer_status_embed(
-    printer_object: bl.Printer,
+    snapshot: PrinterSnapshot,
     printer_name: str,
     image_url: str,
     ctx: Optional[commands.Context[commands.Bot]] = None
@@ -64,7 +134,7 @@ async def build_printer_status_embed(
 
     embed = discord.Embed(
         title=f"Name: {printer_name}",
-        description=f"Status of the printer: {printer_object.get_state()}",
+        description=f"Status of the printer: {snapshot.state}",
         color=0x7309de
     )
 
@@ -81,8 +151,8 @@ async def build_printer_status_embed(
     embed.add_field(
         name="Print Time",
         value=(
-            f"`Current:` {printer_object.get_time()}\n"
-            f"`Finish:`  {await finish_time_format(printer_object.get_time())}"
+            f"`Current:` {snapshot.remaining_time}\n"
+            f"`Finish:`  {await finish_time_format(snapshot.remaining_time)}"
         ),
         inline=True
     )
@@ -90,25 +160,25 @@ async def build_printer_status_embed(
     embed.add_field(
         name="Progress",
         value=(
-            f"`Percent:` {printer_object.get_percentage()}%\n"
-            f"`Layer:`   {printer_object.current_layer_num()}/{printer_object.total_layer_num()}\n"
-            f"`Speed:`   {printer_object.get_print_speed()} (100%)"
+            f"`Percent:` {snapshot.percentage}%\n"
+            f"`Layer:`   {snapshot.layer}/{snapshot.total_layers}\n"
+            f"`Speed:`   {snapshot.print_speed} (100%)"
         ),
         inline=True
     )
 
     embed.add_field(
         name="Lights",
-        value=f"`Chamber:` {printer_object.get_light_state()}",
+        value=f"`Chamber:` {snapshot.light_state}",
         inline=True
     )
 
     embed.add_field(
         name="Temps",
         value=(
-            f"`Bed:`     {printer_object.get_bed_temperature()}°C\n"
-            f"`Nozzle:`  {printer_object.get_nozzle_temperature()}°C\n"
-            f"`Chamber:` {printer_object.get_chamber_temperature()}°C"
+            f"`Bed:`     {snapshot.bed_temperature}°C\n"
+            f"`Nozzle:`  {snapshot.nozzle_temperature}°C\n"
+            f"`Chamber:` {snapshot.chamber_temperature}°C"
         ),
         inline=True
     )
@@ -116,14 +186,14 @@ async def build_printer_status_embed(
     embed.add_field(
         name="Fans",
         value=(
-            f"`Main 1:`   {printer_object.mqtt_client.get_part_fan_speed()}%\n"
-            f"`Main 2:`   {printer_object.mqtt_client.get_aux_fan_speed()}%\n"
-            f"`Cooling:`  {printer_object.mqtt_client.get_chamber_fan_speed()}%"
+            f"`Main 1:`   {snapshot.part_fan_speed}%\n"
+            f"`Main 2:`   {snapshot.aux_fan_speed}%\n"
+            f"`Cooling:`  {snapshot.chamber_fan_speed}%"
         ),
         inline=True
     )
 
-    error_msg = await printer_error_handler(printer_object=printer_object)
+    error_msg = await printer_error_handler(snapshot=snapshot)
 
     embed.add_field(
         name="Errors",
@@ -142,16 +212,131 @@ async def build_printer_status_embed(
     return embed
 
 
-async def delete_image(delete_image_callback: bool, image_filename: str) -> bool:
-    """Deletes the specified image file if the flag is set to True."""
+def build_circuit_status_embed(
+    printer_names: List[str],
+    circuits: Dict[str, PrinterCircuit]
+) -> discord.Embed:
+    """Builds a Discord embed listing the reconnect circuit state of every printer."""
+
+    circuit_icons = {
+        CircuitState.CLOSED: "🟢",
+        CircuitState.HALF_OPEN: "🟡",
+        CircuitState.OPEN: "🔴",
+    }
+    lines = []
+    for printer_name in printer_names:
+        circuit = circuits.get(printer_name, PrinterCircuit())
+        line = f"{circuit_icons[circuit.state]} **{printer_name}**: {circuit.state.value}"
+        if circuit.failures:
+            line += f", {circuit.failures} failed attempt(s)"
+        if circuit.state is not CircuitState.CLOSED and circuit.next_probe_at is not None:
+            line += f", next probe <t:{int(circuit.next_probe_at)}:R>"
+        lines.append(line)
+
+    description = "\n".join(lines) or "No printers in the list"
+    if len(description) > 4096:
+        description = description[:4093] + "..."
+
+    return discord.Embed(
+        title="🔌 Printer Reconnect Circuits",
+        description=description,
+        color=0x7309de
+    )
+
+
+def build_fleet_check_embed(
+    reports: Dict[str, ConnectReport],
+    elapsed: float
+) -> discord.Embed:
+    """Builds a Discord embed with the reachability and handshake latency of every printer."""
+
+    lines = []
+    for printer_name, report in reports.items():
+        mqtt_time = report.stage_durations.get("mqtt")
+        report_time = report.stage_durations.get("first_report")
+        if report.failed_stage is None:
+            lines.append(
+                f"✅ **{printer_name}**: MQTT {mqtt_time:.2f}s, "
+                f"first report {report_time:.2f}s, `{report.state}`"
+            )
+        else:
+            reason = "timed out" if report.timed_out else "failed"
+            lines.append(f"❌ **{printer_name}**: {reason} at `{report.failed_stage}`")
+
+    description = "\n".join(lines) or "No printers in the list"
+    if len(description) > 4096:
+        description = description[:4093] + "..."
+
+    reachable = sum(1 for report in reports.values() if report.failed_stage is None)
+    embed = discord.Embed(
+        title="📡 Fleet Connection Check",
+        description=description,
+        color=0x7309de
+    )
+    embed.set_footer(text=f"{reachable}/{len(reports)} reachable, checked in {elapsed:.1f}s")
+    return embed
+
+
+def build_history_embed(printer_name: str, window: str, filename: str) -> discord.Embed:
+    """Builds a Discord embed showing the history chart attached as `filename`."""
+    embed = discord.Embed(
+        title=f"📈 History of {printer_name}",
+        description=f"Temperatures and progress of the last {window}",
+        color=0x7309de
+    )
+    embed.set_image(url=f"attachment://{filename}")
+    return embed
+
+
+def dashboard_row(snapshot: Optional[PrinterSnapshot]) -> str:
+    """
+    Renders the dashboard row of a printer: state, progress, ETA and temperatures.
+
+    The ETA is a Discord timestamp rounded to the minute, so the row only
+    changes when the printer reports something new.
+    """
+    if snapshot is None:
+        return "⚫ `OFFLINE`"
+
+    icon = {
+        GcodeState.RUNNING: "🟢",
+        GcodeState.PREPARE: "🔵",
+        GcodeState.PAUSE: "🟡",
+        GcodeState.FINISH: "✅",
+        GcodeState.FAILED: "🔴",
+    }.get(snapshot.state, "⚪")
+    row = f"{icon} `{snapshot.state.name}`"
+    if snapshot.state in (GcodeState.RUNNING, GcodeState.PAUSE, GcodeState.PREPARE):
+        row += f" {snapshot.percentage}%"
+        if isinstance(snapshot.remaining_time, int):
+            finish_at = int(snapshot.captured_at + snapshot.remaining_time * 60) // 60 * 60
+            row += f" · ETA <t:{finish_at}:t>"
+    row += (f"\n`Nozzle:` {snapshot.nozzle_temperature:.0f}°C"
+            f" `Bed:` {snapshot.bed_temperature:.0f}°C")
+    return row
+
+
+def build_fleet_dashboard_embeds(
+    rows: Dict[str, str],
+    page_size: int = DASHBOARD_PAGE_SIZE
+) -> List[discord.Embed]:
+    """Builds the fleet dashboard, one embed per `page_size` printers (max 25 fields each)."""
 
-    if delete_image_callback:
-        try:
-            os.remove(f"img/{image_filename}")
-            logger.debug("File '%s' deleted successfully.", image_filename)
-            return True
-        except FileNotFoundError:
-            logger.exception("File '%s' not found.", image_filename)
-            return False
+    printer_names = sorted(rows)
+    pages = [
+        printer_names[start:start + page_size]
+        for start in range(0, len(printer_names), page_size)
+    ] or [[]]
 
-    return False
+    embeds = []
+    for page_number, page in enumerate(pages, start=1):
+        title = "🖨️ Fleet Dashboard"
+        if len(pages) > 1:
+            title += f" ({page_number}/{len(pages)})"
+        embed = discord.Embed(title=title, color=0x7309de)
+        for printer_name in page:
+            embed.add_field(name=printer_name, value=rows[printer_name], inline=True)
+        if not page:
+            embed.description = "No printers in the list"
+        embeds.append(embed)
+    return embeds
@@ -0,0 +1,144 @@
+"""
+Fleet dashboard: one glanceable status overview of all printers.
+
+The monitor feeds every printer check into the dashboard, which keeps one
+rendered row per printer. Pages are re-rendered at most once per refresh
+interval, and a page message is only edited if one of its rows changed, so
+the API cost is bounded by the number of pages and not by the fleet size or
+the number of checks.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from functools import partial
+from typing import Callable, Dict, Iterable, Mapping, Optional
+
+import discord
+
+from cogs.utils.models import StatusMessageStorage
+from cogs.utils.snapshot import PrinterSnapshot
+
+from .embed_helpers import build_fleet_dashboard_embeds, dashboard_row
+from .outbox import DiscordOutbox, outbox as shared_outbox
+from .status_board import StatusContent, edit_or_send
+
+logger = logging.getLogger(__name__)
+
+# Keep a fleet dashboard message in the status channel (true/false)
+DASHBOARD_ENABLED = os.getenv("DASHBOARD_ENABLED", "true").lower() in ("1", "true", "yes")
+# Minimum seconds between two refreshes of the fleet dashboard
+DASHBOARD_REFRESH_INTERVAL = float(os.getenv("DASHBOARD_REFRESH_INTERVAL", "15"))
+
+
+class FleetDashboard:  # pylint: disable=too-many-instance-attributes
+    """Keeps the dashboard rows of all printers and edits the pages that changed."""
+
+    def __init__(self,
+                 channel_getter: Callable[[], Optional[discord.TextChannel]],
+                 storage: Optional[StatusMessageStorage] = None,
+                 refresh_interval: float = DASHBOARD_REFRESH_INTERVAL,
+                 outbox: Optional[DiscordOutbox] = None):
+        """
+        Create the dashboard.
+
+        Args:
+            channel_getter (Callable[[], discord.TextChannel | None]): Returns the
+                status channel, or None while it isn't fetched yet.
+            storage (StatusMessageStorage | None): Where the page message IDs are kept.
+            refresh_interval (float): Minimum seconds between two refreshes.
+            outbox (DiscordOutbox | None): Queue the edits go through.
+        """
+        self._channel_getter = channel_getter
+        self.storage = storage if storage is not None else StatusMessageStorage(
+            "data/dashboard_messages.json"
+        )
+        self.refresh_interval = refresh_interval
+        self.outbox = outbox if outbox is not None else shared_outbox
+        self.rows: Dict[str, str] = {}
+        self._published_pages: Dict[str, Mapping[str, object]] = {}
+        self._last_refresh: Optional[float] = None
+        self._worker: Optional[asyncio.Task[None]] = None
+
+    def update(self, printer_name: str, snapshot: Optional[PrinterSnapshot]) -> None:
+        """Render the row of a printer (None if it is offline) and refresh if it changed."""
+        row = dashboard_row(snapshot)
+        if self.rows.get(printer_name) != row:
+            self.rows[printer_name] = row
+            self._schedule_refresh()
+
+    def remove(self, printer_name: str) -> None:
+        """Drop the row of a printer."""
+        if self.rows.pop(printer_name, None) is not None:
+            self._schedule_refresh()
+
+    def sync(self, printer_names: Iterable[str]) -> None:
+        """Drop the rows of printers that are no longer in the list."""
+        for printer_name in set(self.rows) - set(printer_names):
+            self.remove(printer_name)
+
+    def close(self) -> None:
+        """Cancel a pending refresh."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    def _schedule_refresh(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._refresh_later(), name="fleet-dashboard")
+
+    async def _refresh_later(self) -> None:
+        """Wait for the refresh window, then refresh once with all rows changed meanwhile."""
+        try:
+            if self._last_refresh is not None:
+                wait = self._last_refresh + self.refresh_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            self._worker = None
+            self._last_refresh = time.monotonic()
+            await self.refresh()
+        # Not only Discord errors: a failed save of the message IDs (OSError) must
+        # be logged as well, nobody awaits this task
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Failed to refresh the fleet dashboard.")
+        finally:
+            if self._worker is asyncio.current_task():
+                self._worker = None
+
+    async def refresh(self) -> None:
+        """Edit every page whose rows changed and delete pages no longer needed."""
+        channel = self._channel_getter()
+        if channel is None:
+            return
+
+        embeds = build_fleet_dashboard_embeds(self.rows)
+        for page_number, embed in enumerate(embeds, start=1):
+            key = f"page-{page_number}"
+            rendered = embed.to_dict()
+            if self._published_pages.get(key) == rendered:
+                continue
+            await self.outbox.post(
+                channel.id,
+                partial(edit_or_send, channel, self.storage, key, StatusContent(embed=embed)),
+                key=("dashboard", key)
+            )
+            self._published_pages[key] = rendered
+
+        for page_number in range(len(embeds) + 1, len(self.storage.message_ids) + 1):
+            await self._delete_page(channel, f"page-{page_number}")
+
+    async def _delete_page(self, channel: discord.TextChannel, key: str) -> None:
+        message_id = self.storage.get(key)
+        self._published_pages.pop(key, None)
+        if message_id is None:
+            return
+        self.storage.delete(key)
+        try:
+            await self.outbox.post(
+                channel.id,
+                channel.get_partial_message(message_id).delete,
+                key=("dashboard", key)
+            )
+        except discord.NotFound:
+            pass
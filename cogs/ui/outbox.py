@@ -0,0 +1,186 @@
+"""
+Outbound queue of Discord messages per channel.
+
+Discord limits how many messages a bot may send or edit per channel. When many
+printers finish at once, direct `send` calls run into those limits and
+discord.py sleeps inside the call, holding up whoever made it. Messages for a
+channel are queued here instead and drained at the channel's budget by one
+task per channel. A message queued under a key replaces a still queued
+message with the same key (e.g. an older status of the same printer), so
+superseded updates are never sent.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Messages a channel may receive per rate-limit period
+OUTBOX_RATE_LIMIT = int(os.getenv("OUTBOX_RATE_LIMIT", "5"))
+# Length in seconds of a channel's rate-limit period
+OUTBOX_RATE_PERIOD = float(os.getenv("OUTBOX_RATE_PERIOD", "5"))
+
+
+@dataclass(frozen=True)
+class OutboxStats:
+    """Snapshot of the queue of one channel."""
+    channel_id: int
+    queue_depth: int
+    sent: int
+    coalesced: int
+    failed: int
+    average_delay: float
+    max_delay: float
+
+
+@dataclass
+class _OutboxJob:
+    send: Callable[[], Awaitable[Any]]
+    future: "asyncio.Future[Any]"
+    queued_at: float
+
+
+@dataclass
+class _ChannelQueue:  # pylint: disable=too-many-instance-attributes
+    """Pending messages and the token bucket of one channel."""
+    tokens: float
+    refilled_at: float = field(default_factory=time.monotonic)
+    jobs: "OrderedDict[Hashable, _OutboxJob]" = field(default_factory=OrderedDict)
+    worker: Optional[asyncio.Task[None]] = None
+    sent: int = 0
+    coalesced: int = 0
+    failed: int = 0
+    total_delay: float = 0.0
+    max_delay: float = 0.0
+
+
+def _consume_exception(future: "asyncio.Future[Any]") -> None:
+    """Marks the exception as retrieved; it is logged by the outbox already."""
+    if not future.cancelled():
+        future.exception()
+
+
+class DiscordOutbox:
+    """Per-channel message queues drained at the channel rate limit."""
+
+    def __init__(self,
+                 rate_limit: int = OUTBOX_RATE_LIMIT,
+                 rate_period: float = OUTBOX_RATE_PERIOD):
+        """Create the outbox with a budget of `rate_limit` messages per `rate_period` seconds."""
+        self.rate_limit = max(1, rate_limit)
+        self.rate_period = rate_period
+        self._queues: Dict[int, _ChannelQueue] = {}
+        self._unkeyed = itertools.count()
+
+    def post(self,
+             channel_id: int,
+             send: Callable[[], Awaitable[Any]],
+             key: Optional[Hashable] = None) -> "asyncio.Future[Any]":
+        """
+        Queue a message for a channel.
+
+        Args:
+            channel_id (int): ID of the channel the message goes to.
+            send (Callable[[], Awaitable[Any]]): Makes the actual Discord call.
+            key (Hashable | None): Messages with the same key supersede each other
+                while queued; the newest one is sent in the place of the oldest.
+
+        Returns:
+            asyncio.Future[Any]: Resolves to the result of the Discord call. Callers
+            of superseded messages get the result of the message that replaced theirs.
+        """
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = self._queues[channel_id] = _ChannelQueue(tokens=float(self.rate_limit))
+
+        job_key: Hashable = key if key is not None else ("unkeyed", next(self._unkeyed))
+        queued = queue.jobs.get(job_key)
+        if queued is not None:
+            queued.send = send
+            queue.coalesced += 1
+            return queued.future
+
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_exception)
+        queue.jobs[job_key] = _OutboxJob(send=send, future=future, queued_at=time.monotonic())
+        if queue.worker is None:
+            queue.worker = asyncio.create_task(
+                self._drain(channel_id, queue),
+                name=f"discord-outbox-{channel_id}"
+            )
+        return future
+
+    def stats(self) -> List[OutboxStats]:
+        """Return the queue depth and delay statistics of every channel."""
+        return [
+            OutboxStats(
+                channel_id=channel_id,
+                queue_depth=len(queue.jobs),
+                sent=queue.sent,
+                coalesced=queue.coalesced,
+                failed=queue.failed,
+                average_delay=queue.total_delay / queue.sent if queue.sent else 0.0,
+                max_delay=queue.max_delay
+            )
+            for channel_id, queue in self._queues.items()
+        ]
+
+    def close(self) -> None:
+        """Drop all queued messages and stop draining."""
+        for queue in self._queues.values():
+            if queue.worker is not None:
+                queue.worker.cancel()
+            for job in queue.jobs.values():
+                job.future.cancel()
+            queue.jobs.clear()
+
+    async def _take_token(self, queue: _ChannelQueue) -> None:
+        """Wait until the channel's token bucket allows another message."""
+        while True:
+            now = time.monotonic()
+            queue.tokens = min(
+                float(self.rate_limit),
+                queue.tokens + (now - queue.refilled_at) * self.rate_limit / self.rate_period
+            )
+            queue.refilled_at = now
+            if queue.tokens >= 1:
+                queue.tokens -= 1
+                return
+            await asyncio.sleep((1 - queue.tokens) * self.rate_period / self.rate_limit)
+
+    async def _drain(self, channel_id: int, queue: _ChannelQueue) -> None:
+        """Send the queued messages of a channel in order, within its budget."""
+        try:
+            while queue.jobs:
+                await self._take_token(queue)
+                _, job = queue.jobs.popitem(last=False)
+
+                delay = time.monotonic() - job.queued_at
+                queue.total_delay += delay
+                queue.max_delay = max(queue.max_delay, delay)
+                try:
+                    result = await job.send()
+                except asyncio.CancelledError:
+                    job.future.cancel()
+                    raise
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    queue.failed += 1
+                    logger.exception("Failed to send a queued message to channel %s.",
+                                     channel_id)
+                    if not job.future.done():
+                        job.future.set_exception(error)
+                    continue
+                queue.sent += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+        finally:
+            queue.worker = None
+
+
+outbox = DiscordOutbox()
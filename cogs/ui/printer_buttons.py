@@ -1,143 +1,190 @@
-# pylint: disable=unused-argument
-
 """
 Discord UI View for controlling a Bambu Labs printer via buttons.
+
+The buttons are persistent: their custom_id encodes the action and the
+printer name (`printer:<action>:<printer name>`), and `PrinterControlButton`
+is registered once with `bot.add_dynamic_items`. A click on any status
+message, also after a restart, is turned back into a button that looks up
+the printer connection at that moment, so posted views don't keep printer
+objects or view instances alive. Discord limits a custom_id to 100
+characters, which caps the length of printer names, see
+`MAX_PRINTER_NAME_LENGTH`.
 """
 
-import asyncio
+import logging
+import re
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
 
 import bambulabs_api as bl
 from bambulabs_api.states_info import GcodeState
 
 import discord
 
-
-class PrinterControlView(discord.ui.View):
-    """
-    A Discord UI View that provides printer control buttons for a Bambu Labs printer.
-    
-    Controls are automatically disabled if the printer is unavailable.
-    """
-
-    def __init__(self, printer: bl.Printer, printer_name: str):
+from cogs.utils.command_dispatcher import printer_commands
+from cogs.utils.printer_events import await_transition
+from cogs.utils.printer_executor import run_printer_io
+from cogs.utils.printer_helpers import resolve_printer
+
+logger = logging.getLogger(__name__)
+
+# Emoji and label of each control button, by action
+BUTTON_ACTIONS: Dict[str, Tuple[str, str]] = {
+    "pause": ("⏸️", "Pause"),
+    "resume": ("▶️", "Resume"),
+    "stop": ("🛑", "Stop"),
+    "light": ("💡", "Light"),
+}
+# Longest printer name whose custom_id stays within the 100 characters Discord allows
+MAX_PRINTER_NAME_LENGTH = 100 - len("printer::") - max(len(action) for action in BUTTON_ACTIONS)
+# States that confirm a stopped print; a cancelled job usually reports FAILED
+STOPPED_STATES = frozenset({GcodeState.FINISH, GcodeState.FAILED, GcodeState.IDLE})
+
+
+class PrinterControlButton(
+    discord.ui.DynamicItem[discord.ui.Button["PrinterControlView"]],
+    template=r"printer:(?P<action>pause|resume|stop|light):(?P<printer_name>.+)"
+):
+    """A printer control button that works on any message, as long as the bot runs."""
+
+    def __init__(self, action: str, printer_name: str, disabled: bool = False):
         """
-        Initialize the printer control view.
+        Create the button for an action on the named printer.
+
+        Raises:
+            ValueError: If the printer name is longer than MAX_PRINTER_NAME_LENGTH.
         """
-        super().__init__()
-        self.printer = printer
+        if len(printer_name) > MAX_PRINTER_NAME_LENGTH:
+            raise ValueError(
+                f"Printer name is longer than {MAX_PRINTER_NAME_LENGTH} characters"
+            )
+        emoji, label = BUTTON_ACTIONS[action]
+        super().__init__(
+            discord.ui.Button(
+                style=discord.ButtonStyle.primary,
+                emoji=emoji,
+                label=label,
+                custom_id=f"printer:{action}:{printer_name}",
+                disabled=disabled
+            )
+        )
+        self.action = action
         self.printer_name = printer_name
-        self.disable_controls = printer is None
-
-        # Dynamically disable certain buttons if the printer is unavailable
-        for child in self.children:
-            if isinstance(child, discord.ui.Button) and child.custom_id in {
-                "pause_button", "resume_button", "stop_button", "light_button"
-            }:
-                child.disabled = self.disable_controls
-
-    @discord.ui.button(
-        style=discord.ButtonStyle.primary,
-        emoji="⏸️",
-        label="Pause",
-        custom_id="pause_button",
-    )
-    async def pause_button(
-        self,
-        interaction: discord.Interaction,
-        button: discord.ui.Button["PrinterControlView"]):
-        """
-        Pause the current print job on the printer.
-        """
 
+    @classmethod
+    async def from_custom_id(cls,
+                             interaction: discord.Interaction,
+                             item: discord.ui.Item[Any],
+                             match: re.Match[str],
+                             /) -> "PrinterControlButton":
+        """Rebuild the button from the custom_id of a clicked component."""
+        return cls(action=match["action"], printer_name=match["printer_name"])
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        """Run the action on the printer as it is connected right now."""
         await interaction.response.defer()
 
-        success = self.printer.pause_print()
-        await asyncio.sleep(1.5)  # Wait a moment for state to change
-        new_state = self.printer.get_state()
-
-        if success and new_state == GcodeState.PAUSE:
-            message = f"✅ '{self.printer_name}' was paused successfully"
-        else:
-            message = f"❌ Failed to pause '{self.printer_name}'"
-
-        await interaction.followup.send(message)
-
-    @discord.ui.button(
-        style=discord.ButtonStyle.primary,
-        emoji="▶️",
-        label="Resume",
-        custom_id="resume_button",
-    )
-    async def resume_button(
-        self,
-        interaction: discord.Interaction,
-        button: discord.ui.Button["PrinterControlView"]):
-        """
-        Resume the current paused print job on the printer.
-        """
-        await interaction.response.defer()
+        printer = await resolve_printer(interaction.client, self.printer_name)
+        if printer is None:
+            await interaction.followup.send(f"❌ '{self.printer_name}' is not connected")
+            return
+
+        handler = {
+            "pause": self._pause,
+            "resume": self._resume,
+            "stop": self._stop,
+            "light": self._light,
+        }[self.action]
+        # Queued per printer, so clicks from several messages don't send conflicting commands
+        result = await printer_commands.submit(
+            self.printer_name, self.action, partial(handler, printer)
+        )
+        await interaction.followup.send(
+            result if result is not None else
+            f"💡 Light on '{self.printer_name}' is unchanged, the toggles cancelled out"
+        )
+
+    async def _pause(self, printer: bl.Printer) -> str:
+        """Pause the current print job on the printer."""
+        paused = await await_transition(
+            printer,
+            partial(run_printer_io, printer.pause_print),
+            lambda snapshot: snapshot.state == GcodeState.PAUSE
+        )
+        return (
+            f"✅ '{self.printer_name}' was paused successfully"
+            if paused else
+            f"❌ Failed to pause '{self.printer_name}'"
+        )
 
-        success = self.printer.resume_print() if self.printer else False
-        message = (
+    async def _resume(self, printer: bl.Printer) -> str:
+        """Resume the current paused print job on the printer."""
+        resumed = await await_transition(
+            printer,
+            partial(run_printer_io, printer.resume_print),
+            lambda snapshot: snapshot.state == GcodeState.RUNNING
+        )
+        return (
             f"✅ '{self.printer_name}' was resumed successfully"
-            if success else
+            if resumed else
             f"❌ Failed to resume '{self.printer_name}'"
         )
-        await interaction.followup.send(message)
-
-    @discord.ui.button(
-        style=discord.ButtonStyle.primary,
-        emoji="🛑",
-        label="Stop",
-        custom_id="stop_button",
-    )
-    async def stop_button(
-        self,
-        interaction: discord.Interaction,
-        button: discord.ui.Button["PrinterControlView"]):
-        """
-        Stop the current print job on the printer.
-        """
-        await interaction.response.defer()
 
-        success = self.printer.stop_print() if self.printer else False
-        message = (
+    async def _stop(self, printer: bl.Printer) -> str:
+        """Stop the current print job on the printer."""
+        stopped = await await_transition(
+            printer,
+            partial(run_printer_io, printer.stop_print),
+            lambda snapshot: snapshot.state in STOPPED_STATES
+        )
+        return (
             f"✅ '{self.printer_name}' was stopped successfully"
-            if success else
+            if stopped else
             f"❌ Failed to stop '{self.printer_name}'"
         )
-        await interaction.followup.send(message)
-
-    @discord.ui.button(
-        style=discord.ButtonStyle.primary,
-        emoji="💡",
-        label="Light",
-        custom_id="light_button",
-    )
-    async def light_button(
-        self,
-        interaction: discord.Interaction,
-        button: discord.ui.Button["PrinterControlView"]):
-        """
-        Toggle the printer's light on or off.
-        """
-        await interaction.response.defer()
 
-        light_state = self.printer.get_light_state() if self.printer else None
+    async def _light(self, printer: bl.Printer) -> str:
+        """Toggle the printer's light on or off."""
+        light_state = await run_printer_io(printer.get_light_state)
+        target = "off" if light_state == "on" else "on"
+        switch = printer.turn_light_off if target == "off" else printer.turn_light_on
+
+        switched = await await_transition(
+            printer,
+            partial(run_printer_io, switch),
+            lambda snapshot: snapshot.light_state == target
+        )
+        return (
+            f"✅ Light on '{self.printer_name}' was turned {target} successfully"
+            if switched else
+            f"❌ Failed to turn {target} the light on '{self.printer_name}'"
+        )
 
-        if light_state == "on":
-            success = self.printer.turn_light_off()
-            message = (
-                f"✅ Light on '{self.printer_name}' was turned off successfully"
-                if success else
-                f"❌ Failed to turn off the light on '{self.printer_name}'"
-            )
-        else:
-            success = self.printer.turn_light_on()
-            message = (
-                f"✅ Light on '{self.printer_name}' was turned on successfully"
-                if success else
-                f"❌ Failed to turn on the light on '{self.printer_name}'"
-            )
 
-        await interaction.followup.send(message)
+class PrinterControlView(discord.ui.View):
+    """
+    A Discord UI View that provides printer control buttons for a Bambu Labs printer.
+
+    Controls are disabled if the printer is unavailable when the view is built.
+    """
+
+    def __init__(self, printer_name: str, printer: Optional[bl.Printer] = None):
+        """
+        Initialize the printer control view.
+
+        Args:
+            printer_name (str): Name of the printer, encoded into the buttons.
+            printer (bl.Printer | None): Only used to disable the controls if the
+                printer is unavailable; the view keeps no reference to it.
+        """
+        super().__init__(timeout=None)
+        self.printer_name = printer_name
+        for action in BUTTON_ACTIONS:
+            self.add_item(PrinterControlButton(
+                action=action,
+                printer_name=printer_name,
+                disabled=printer is None
+            ))
+        # Clicks are dispatched through the registered dynamic items, so the
+        # view doesn't need to be kept in the client's view store per message
+        self.stop()
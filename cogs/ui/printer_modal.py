@@ -9,8 +9,8 @@ import discord
 from discord.ui import TextInput
 
 from cogs.utils.models import PrinterCredentials
-from cogs.utils.printer_helpers import delete_printer
 from cogs.utils.printer_connection import connect_new_printer
+from .printer_buttons import MAX_PRINTER_NAME_LENGTH
 
 if TYPE_CHECKING:
     from cogs.printer_utils import PrinterUtils
@@ -113,6 +113,12 @@ class PrinterEditModal(discord.ui.Modal, title="printer_edit_modal"):
             ephemeral=True
             )
             return
+        if len(self.new_printer_name) > MAX_PRINTER_NAME_LENGTH:
+            await interaction.followup.send(
+                f"❌ Printer name is longer than {MAX_PRINTER_NAME_LENGTH} characters.",
+                ephemeral=True
+            )
+            return
         if self.name_duplicate_check() is False:
             await interaction.followup.send(
                 "❌ Printer name already exists."
@@ -127,9 +133,10 @@ class PrinterEditModal(discord.ui.Modal, title="printer_edit_modal"):
                 self.field_serial.value.strip()
             )
 
-            if await connect_new_printer(
+            printer = await connect_new_printer(
                 printer_name=self.new_printer_name,
-                printer_data=new_printer_credentials) is None:
+                printer_data=new_printer_credentials)
+            if printer is None:
                 await interaction.followup.send(
                     f"❌ Can't connect to the printer: {self.new_printer_name.strip()}, "
                     "please check credentials",
@@ -137,19 +144,22 @@ class PrinterEditModal(discord.ui.Modal, title="printer_edit_modal"):
                 )
                 return
 
-            delete_printer(
-                printer_name=self.printer_name_original,
-                printer_utils_cog=self.printer_utils_cog
-            )
+            await self.printer_utils_cog.release_printer(self.printer_name_original)
 
-            connected_printers = self.printer_utils_cog.storage.load()
-            connected_printers[self.new_printer_name.strip()] = {
-                "ip": self.field_ip.value.strip(),
-                "access_code": self.field_access_code.value.strip(),
-                "serial": self.field_serial.value.strip(),
-            }
-            self.printer_utils_cog.storage.save(connected_printers)
-            self.printer_utils_cog.connected_printers = connected_printers
+            self.printer_utils_cog.storage.rename(
+                self.printer_name_original,
+                self.new_printer_name.strip(),
+                {
+                    "ip": self.field_ip.value.strip(),
+                    "access_code": self.field_access_code.value.strip(),
+                    "serial": self.field_serial.value.strip(),
+                }
+            )
+            self.printer_utils_cog.pool.adopt(
+                printer_name=self.new_printer_name.strip(),
+                printer=printer,
+                credentials=new_printer_credentials
+            )
 
             await interaction.followup.send(
                 f'✅ Successfully edited printer credentials: {self.new_printer_name.strip()}!',
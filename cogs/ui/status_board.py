@@ -0,0 +1,188 @@
+"""
+One live status message per printer in the status channel.
+
+Instead of posting an embed and a separate control message on every state
+change, each printer owns a single message that is edited in place. Updates
+are coalesced: while an edit of a printer is waiting for its rate-limit
+window, newer updates replace the pending one, so a burst of changes costs
+one edit, rendered from the latest state.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from cogs.utils.models import StatusMessageStorage
+from cogs.utils.snapshot import PrinterSnapshot
+
+from .outbox import DiscordOutbox, outbox as shared_outbox
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between two edits of the status message of one printer
+STATUS_EDIT_INTERVAL = float(os.getenv("STATUS_EDIT_INTERVAL", "5"))
+
+
+@dataclass
+class StatusContent:
+    """Everything a status message shows."""
+    embed: discord.Embed
+    view: Optional[discord.ui.View] = None
+    # New attachments; empty keeps the attachments the message already has
+    files: List[discord.File] = field(default_factory=list)
+    # Called with the sent or edited message, e.g. to remember attachment URLs
+    on_published: Optional[Callable[[discord.Message], None]] = None
+    # Telemetry the embed was rendered from; an unchanged snapshot skips the edit
+    snapshot: Optional[PrinterSnapshot] = None
+
+
+StatusRenderer = Callable[[], Awaitable[StatusContent]]
+
+
+async def edit_or_send(channel: discord.TextChannel,
+                       storage: StatusMessageStorage,
+                       key: str,
+                       content: StatusContent) -> discord.Message:
+    """
+    Edit the message stored under `key`, or post it if there is none yet.
+
+    A message deleted in Discord is posted again and its new ID stored.
+    """
+    message: Optional[discord.Message] = None
+    message_id = storage.get(key)
+    if message_id is not None:
+        edit: Dict[str, Any] = {"embed": content.embed, "view": content.view}
+        if content.files:
+            edit["attachments"] = content.files
+        try:
+            message = await channel.get_partial_message(message_id).edit(**edit)
+        except discord.NotFound:
+            logger.info("Message `%s` is gone, posting a new one.", key)
+
+    if message is None:
+        message = await channel.send(
+            embed=content.embed,
+            files=content.files,
+            view=content.view  # type: ignore[arg-type]
+        )
+        storage.set(key, message.id)
+    return message
+
+
+class StatusBoard:  # pylint: disable=too-many-instance-attributes
+    """Publishes coalesced status updates by editing one message per printer."""
+
+    def __init__(self,
+                 channel_getter: Callable[[], Optional[discord.TextChannel]],
+                 storage: Optional[StatusMessageStorage] = None,
+                 min_interval: float = STATUS_EDIT_INTERVAL,
+                 outbox: Optional[DiscordOutbox] = None):
+        """
+        Create the board.
+
+        Args:
+            channel_getter (Callable[[], discord.TextChannel | None]): Returns the
+                status channel, or None while it isn't fetched yet.
+            storage (StatusMessageStorage | None): Where message IDs are kept.
+            min_interval (float): Minimum seconds between edits of one message.
+            outbox (DiscordOutbox | None): Queue the edits go through, so all
+                printers together stay within the channel rate limit.
+        """
+        self._channel_getter = channel_getter
+        self.storage = storage if storage is not None else StatusMessageStorage()
+        self.min_interval = min_interval
+        self.outbox = outbox if outbox is not None else shared_outbox
+        self._pending: Dict[str, StatusRenderer] = {}
+        self._workers: Dict[str, asyncio.Task[None]] = {}
+        self._last_published: Dict[str, float] = {}
+        self._published_snapshots: Dict[str, PrinterSnapshot] = {}
+
+    def update(self, printer_name: str, render: StatusRenderer) -> None:
+        """
+        Schedule an update of the status message of a printer.
+
+        `render` is only called when the edit is actually made, so an update
+        replaced by a newer one before its window opened costs nothing.
+        """
+        self._pending[printer_name] = render
+        if printer_name not in self._workers:
+            self._workers[printer_name] = asyncio.create_task(
+                self._flush(printer_name),
+                name=f"status-message-{printer_name}"
+            )
+
+    def forget(self, printer_name: str) -> None:
+        """
+        Drop pending updates of a printer.
+
+        The stored message ID is kept; the printer registry moves or clears
+        it when the printer is renamed or deleted.
+        """
+        self._pending.pop(printer_name, None)
+        worker = self._workers.pop(printer_name, None)
+        if worker is not None:
+            worker.cancel()
+        self._last_published.pop(printer_name, None)
+        self._published_snapshots.pop(printer_name, None)
+
+    def close(self) -> None:
+        """Cancel all pending updates."""
+        self._pending.clear()
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+
+    async def _flush(self, printer_name: str) -> None:
+        """Publish pending updates of a printer, at most one per interval."""
+        try:
+            while printer_name in self._pending:
+                last = self._last_published.get(printer_name)
+                if last is not None:
+                    wait = last + self.min_interval - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+
+                render = self._pending.pop(printer_name)
+                try:
+                    content = await render()
+                    if self._is_unchanged(printer_name, content):
+                        logger.debug("Status of `%s` is unchanged, skipping the edit.",
+                                     printer_name)
+                        continue
+                    await self._publish(printer_name, content)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    # A failed render or edit must not stop the updates of the printer
+                    logger.exception("Failed to update the status message of `%s`.",
+                                     printer_name)
+                self._last_published[printer_name] = time.monotonic()
+        finally:
+            if self._workers.get(printer_name) is asyncio.current_task():
+                del self._workers[printer_name]
+
+    def _is_unchanged(self, printer_name: str, content: StatusContent) -> bool:
+        """True if the message already shows this telemetry and no new image comes with it."""
+        if content.snapshot is None or content.files:
+            return False
+        return not content.snapshot.diff(self._published_snapshots.get(printer_name))
+
+    async def _publish(self, printer_name: str, content: StatusContent) -> None:
+        """Queue the edit of the status message of the printer in the channel outbox."""
+        channel = self._channel_getter()
+        if channel is None:
+            logger.warning("No status channel for the update of `%s`.", printer_name)
+            return
+
+        message = await self.outbox.post(
+            channel.id,
+            lambda: edit_or_send(channel, self.storage, printer_name, content),
+            key=("status", printer_name)
+        )
+        if content.snapshot is not None:
+            self._published_snapshots[printer_name] = content.snapshot
+        if content.on_published is not None:
+            content.on_published(message)
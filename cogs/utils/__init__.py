@@ -1,6 +1,6 @@
 """Init file to import function from helper packages"""
 
-from .enums import MenuCallBack
+from .enums import MenuCallBack, CircuitState
 
 from .admin import (
     setup_global_check,
@@ -13,17 +13,21 @@ from .printer_helpers import (
     finish_time_format,
     get_camera_frame,
     get_cog,
+    resolve_printer,
     light_printer_check,
     set_image_custom_credentials_callback,
     set_image_default_credentials_callback,
+    observe_camera_frame,
     get_printer_data_dict,
     backoff_checker,
+    BackoffStats,
     delete_printer
 )
 
 from .models import (
     PrinterCredentials,
     PrinterStorage,
+    StatusMessageStorage,
     ImageCredentials,
     PrinterDataDict
 )
@@ -33,8 +37,106 @@ from .printer_connection import (
     _create_printer,
     _connect_mqtt,
     _check_printer_status,
-    wait_for_printer_ready,
     connect_to_printer,
     connection_check,
-    connect_new_printer
+    connect_new_printer,
+    wait_for_first_report,
+    connect_to_printer_with_report,
+    ConnectReport,
+    probe_printer,
+    check_fleet_connections
 )
+
+from .printer_registry import (
+    SQLitePrinterStorage,
+    PrinterRegistry,
+    open_printer_storage
+)
+
+from .concurrency import gather_bounded, PrinterTaskRunner
+
+from .telemetry import (
+    TelemetryRecorder,
+    RingSeries,
+    METRICS,
+    telemetry
+)
+
+from .history_chart import (
+    HistoryChartCache,
+    get_history_chart,
+    history_charts,
+    parse_window
+)
+
+from .command_dispatcher import (
+    PrinterCommandDispatcher,
+    CommandStats,
+    printer_commands
+)
+
+from .printer_events import (
+    subscribe_reports,
+    await_transition,
+    PrinterStateEvent,
+    PrinterReportBridge
+)
+
+from .printer_executor import (
+    PrinterIOExecutor,
+    PrinterIOStats,
+    printer_io,
+    run_printer_io
+)
+
+from .printer_pool import (
+    PooledConnection,
+    PrinterConnectionPool
+)
+
+from .reconnect import (
+    PrinterCircuit,
+    ReconnectScheduler
+)
+
+from .poll_scheduler import (
+    PollScheduler,
+    poll_interval
+)
+
+from .image_pipeline import (
+    FrameEncoderSettings,
+    encode_frame,
+    encode_thumbnail,
+    process_frame,
+    frame_watermark,
+    camera_frame_filename,
+    frame_signature,
+    frame_difference
+)
+
+from .image_executor import (
+    ImageProcessPool,
+    image_pool,
+    run_image_task
+)
+
+from .frame_cache import (
+    CachedFrame,
+    CameraFrameCache,
+    camera_frames
+)
+
+from .frame_diff import (
+    FrameRecord,
+    FrameDiffTracker,
+    frame_diffs
+)
+
+from .timelapse import (
+    FrameRingBuffer,
+    TimelapseRecorder,
+    render_timelapse
+)
+
+from .snapshot import PrinterSnapshot
@@ -0,0 +1,193 @@
+"""
+Serialized control commands per printer.
+
+Every status message carries control buttons, so several operators can click
+Pause, Resume or Light on the same printer at nearly the same time. Commands
+are queued per printer here and run one after another by one task per
+printer. A toggle clicked again while the first toggle is still queued
+cancels it, so neither is sent; otherwise a repeat of the last command within
+a short window shares the result of the first click instead of being sent
+twice.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds in which a repeated command on the same printer counts as a duplicate click
+COMMAND_DEDUPE_WINDOW = float(os.getenv("COMMAND_DEDUPE_WINDOW", "2"))
+
+# Commands that undo themselves when run twice
+TOGGLE_COMMANDS = frozenset({"light"})
+
+CommandRunner = Callable[[], Awaitable[str]]
+
+
+@dataclass(frozen=True)
+class CommandStats:
+    """Snapshot of the command queue of one printer."""
+    printer_name: str
+    queue_depth: int
+    executed: int
+    deduplicated: int
+    collapsed: int
+    average_wait: float
+    max_wait: float
+
+
+@dataclass
+class _Command:
+    name: str
+    run: CommandRunner
+    future: "asyncio.Future[Optional[str]]"
+    submitted_at: float
+
+
+@dataclass
+class _PrinterQueue:  # pylint: disable=too-many-instance-attributes
+    """Pending commands and latency counters of one printer."""
+    commands: List[_Command] = field(default_factory=list)
+    # Last submitted command, also after it ran, for deduplication
+    last: Optional[_Command] = None
+    worker: Optional[asyncio.Task[None]] = None
+    executed: int = 0
+    deduplicated: int = 0
+    collapsed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+def _consume_exception(future: "asyncio.Future[Optional[str]]") -> None:
+    """Marks the exception as retrieved; it is logged by the dispatcher already."""
+    if not future.cancelled():
+        future.exception()
+
+
+class PrinterCommandDispatcher:
+    """Runs the control commands of each printer in order, one at a time."""
+
+    def __init__(self, dedupe_window: float = COMMAND_DEDUPE_WINDOW):
+        """Create the dispatcher; repeated commands within `dedupe_window` seconds are merged."""
+        self.dedupe_window = dedupe_window
+        self._queues: Dict[str, _PrinterQueue] = {}
+
+    def submit(self,
+               printer_name: str,
+               command: str,
+               run: CommandRunner) -> "asyncio.Future[Optional[str]]":
+        """
+        Queue a control command for a printer.
+
+        Args:
+            printer_name (str): Name of the printer the command is for.
+            command (str): Name of the command, e.g. "pause" or "light".
+            run (CommandRunner): Sends the command and returns the message for the user.
+
+        Returns:
+            asyncio.Future[str | None]: Resolves to the message of the command. A
+            duplicate click gets the message of the first click; toggles that
+            cancelled each other out resolve to None.
+        """
+        queue = self._queues.get(printer_name)
+        if queue is None:
+            queue = self._queues[printer_name] = _PrinterQueue()
+        now = time.monotonic()
+
+        # A toggle is checked before duplicates, so a second click cancels the first
+        queued = next((pending for pending in queue.commands if pending.name == command), None)
+        if queued is not None and command in TOGGLE_COMMANDS:
+            queue.commands.remove(queued)
+            queue.last = None
+            queue.collapsed += 2
+            queued.future.set_result(None)
+            return queued.future
+
+        # Only a repeat of the last command is a duplicate click; pause, resume,
+        # pause in a row are three commands
+        previous = queue.last
+        if (previous is not None and previous.name == command
+                and now - previous.submitted_at < self.dedupe_window):
+            queue.deduplicated += 1
+            return previous.future
+
+        future: "asyncio.Future[Optional[str]]" = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_exception)
+        entry = _Command(name=command, run=run, future=future, submitted_at=now)
+        queue.commands.append(entry)
+        queue.last = entry
+        if queue.worker is None:
+            queue.worker = asyncio.create_task(
+                self._drain(printer_name, queue),
+                name=f"printer-commands-{printer_name}"
+            )
+        return future
+
+    def stats(self) -> List[CommandStats]:
+        """Return the queue depth and wait statistics of every printer."""
+        return [
+            CommandStats(
+                printer_name=printer_name,
+                queue_depth=len(queue.commands),
+                executed=queue.executed,
+                deduplicated=queue.deduplicated,
+                collapsed=queue.collapsed,
+                average_wait=queue.total_wait / queue.executed if queue.executed else 0.0,
+                max_wait=queue.max_wait
+            )
+            for printer_name, queue in self._queues.items()
+        ]
+
+    def discard(self, printer_name: str) -> None:
+        """Cancel the queued commands of a printer and drop its statistics."""
+        queue = self._queues.pop(printer_name, None)
+        if queue is not None:
+            self._cancel(queue)
+
+    def close(self) -> None:
+        """Cancel all queued commands."""
+        for queue in self._queues.values():
+            self._cancel(queue)
+        self._queues.clear()
+
+    @staticmethod
+    def _cancel(queue: _PrinterQueue) -> None:
+        if queue.worker is not None:
+            queue.worker.cancel()
+        for command in queue.commands:
+            command.future.cancel()
+        queue.commands.clear()
+        queue.last = None
+
+    async def _drain(self, printer_name: str, queue: _PrinterQueue) -> None:
+        """Run the queued commands of a printer in the order they were submitted."""
+        try:
+            while queue.commands:
+                command = queue.commands.pop(0)
+                wait = time.monotonic() - command.submitted_at
+                queue.total_wait += wait
+                queue.max_wait = max(queue.max_wait, wait)
+                queue.executed += 1
+                logger.debug("Running `%s` on `%s` after %.2fs in the queue.",
+                             command.name, printer_name, wait)
+                try:
+                    result = await command.run()
+                except asyncio.CancelledError:
+                    command.future.cancel()
+                    raise
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    logger.exception("Command `%s` on `%s` failed.", command.name, printer_name)
+                    if not command.future.done():
+                        command.future.set_exception(error)
+                    continue
+                if not command.future.done():
+                    command.future.set_result(result)
+        finally:
+            queue.worker = None
+
+
+printer_commands = PrinterCommandDispatcher()
@@ -0,0 +1,114 @@
+"""Helpers for running per-printer coroutines concurrently with bounded parallelism."""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Generic, Iterable, List, Optional, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def gather_bounded(
+    printer_names: Iterable[str],
+    worker: Callable[[str], Awaitable[T]],
+    limit: int,
+    timeout: Optional[float] = None
+) -> Dict[str, Union[T, BaseException]]:
+    """
+    Runs `worker` for every printer name concurrently, at most `limit` at a time.
+
+    The `timeout` applies to each worker call separately and does not include the
+    time spent waiting for a free slot. A slow or failing printer only affects its
+    own entry in the result, which holds either the returned value or the raised
+    exception (`asyncio.TimeoutError` when the timeout expires).
+
+    Args:
+        printer_names (Iterable[str]): Names of the printers to process.
+        worker (Callable[[str], Awaitable[T]]): Coroutine function called with each name.
+        limit (int): Maximum number of workers running at the same time.
+        timeout (float | None): Per-printer time budget in seconds.
+
+    Returns:
+        dict[str, T | BaseException]: Result or exception for every printer name.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run_one(printer_name: str) -> T:
+        async with semaphore:
+            return await asyncio.wait_for(worker(printer_name), timeout=timeout)
+
+    names = list(printer_names)
+    results = await asyncio.gather(
+        *(run_one(printer_name) for printer_name in names),
+        return_exceptions=True
+    )
+    return dict(zip(names, results))
+
+
+class PrinterTaskRunner(Generic[T]):
+    """
+    Runs per-printer coroutines in the background, at most one per printer.
+
+    Unlike `gather_bounded` nothing waits for a whole batch: each printer is
+    started as soon as it is due and reports its result through `on_done`,
+    so a printer that hangs until its timeout only holds its own slot.
+    """
+
+    def __init__(self,
+                 worker: Callable[[str], Awaitable[T]],
+                 on_done: Callable[[str, Union[T, BaseException]], None],
+                 limit: int,
+                 timeout: Optional[float] = None):
+        """
+        Create the runner.
+
+        Args:
+            worker (Callable[[str], Awaitable[T]]): Coroutine function called with each name.
+            on_done (Callable[[str, T | BaseException], None]): Called with the result or
+                the raised exception (`asyncio.TimeoutError` when the timeout expires).
+            limit (int): Maximum number of workers running at the same time.
+            timeout (float | None): Per-printer time budget in seconds, not counting
+                the wait for a free slot.
+        """
+        self.worker = worker
+        self.on_done = on_done
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max(1, limit))
+        self._tasks: Dict[str, asyncio.Task[None]] = {}
+
+    def __contains__(self, printer_name: str) -> bool:
+        return printer_name in self._tasks
+
+    def start(self, printer_names: Iterable[str]) -> List[str]:
+        """Start the worker for every printer not already in flight; returns the started names."""
+        started = []
+        for printer_name in printer_names:
+            if printer_name in self._tasks:
+                continue
+            self._tasks[printer_name] = asyncio.create_task(
+                self._run(printer_name), name=f"printer-task-{printer_name}"
+            )
+            started.append(printer_name)
+        return started
+
+    def cancel_all(self) -> None:
+        """Cancel every worker in flight; their `on_done` is not called."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    async def _run(self, printer_name: str) -> None:
+        result: Union[T, BaseException]
+        try:
+            async with self._semaphore:
+                result = await asyncio.wait_for(self.worker(printer_name), timeout=self.timeout)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            result = error
+        finally:
+            if self._tasks.get(printer_name) is asyncio.current_task():
+                del self._tasks[printer_name]
+        try:
+            self.on_done(printer_name, result)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Handling the result of `%s` failed.", printer_name)
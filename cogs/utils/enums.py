@@ -16,3 +16,16 @@ class MenuCallBack(enum.IntEnum):
     CALLBACK_CONNECTION_CHECK   =   1
     CALLBACK_DELETE_PRINTER     =   2
     CALLBACK_EDIT_PRINTER       =   3
+
+class CircuitState(enum.Enum):
+    """
+    Enumeration of reconnect circuit states of a printer.
+
+    Attributes:
+        CLOSED: The printer is reachable; the monitor connects to it normally.
+        OPEN: The printer failed repeatedly; only background probes try to reconnect.
+        HALF_OPEN: A background probe is currently trying to reconnect.
+    """
+    CLOSED      =   "closed"
+    OPEN        =   "open"
+    HALF_OPEN   =   "half-open"
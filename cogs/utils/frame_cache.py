@@ -0,0 +1,135 @@
+"""
+Short-lived cache of camera frames per printer.
+
+Capturing a frame opens a camera connection to the printer and takes about a
+second. When several users run /status on the same print, or a status change
+is announced right after a /status, they all get the same recent frame
+instead of each capturing their own. Concurrent requests for one printer share
+a single in-flight capture, and when a capture fails the last good frame is
+served together with its age. The frame-difference signature of a frame is
+kept with it once computed, so a cache hit doesn't compute it again.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a captured camera frame is reused before a new one is taken
+CAMERA_FRAME_TTL = float(os.getenv("CAMERA_FRAME_TTL", "10"))
+# Maximum number of printers whose last camera frame is kept in memory
+CAMERA_FRAME_CACHE_SIZE = int(os.getenv("CAMERA_FRAME_CACHE_SIZE", "32"))
+
+
+@dataclass(frozen=True)
+class CachedFrame:
+    """An encoded camera frame and when it was captured."""
+    data: bytes
+    captured_at: float
+    stale: bool = False
+    # Grayscale signature for frame comparison, None until computed
+    signature: Optional[bytes] = None
+
+    @property
+    def age(self) -> float:
+        """Seconds since the frame was captured."""
+        return time.monotonic() - self.captured_at
+
+
+class CameraFrameCache:
+    """Per-printer frame cache with a TTL, an LRU size bound and single-flight capture."""
+
+    def __init__(self,
+                 ttl: float = CAMERA_FRAME_TTL,
+                 max_size: int = CAMERA_FRAME_CACHE_SIZE):
+        """Create an empty cache."""
+        self.ttl = ttl
+        self.max_size = max(1, max_size)
+        self._frames: "OrderedDict[str, CachedFrame]" = OrderedDict()
+        self._captures: Dict[str, asyncio.Task[Optional[bytes]]] = {}
+
+    def __contains__(self, printer_name: str) -> bool:
+        return printer_name in self._frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    async def get(self,
+                  printer_name: str,
+                  capture: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[CachedFrame]:
+        """
+        Return a fresh frame of the printer, capturing one if needed.
+
+        Args:
+            printer_name (str): Name of the printer.
+            capture (Callable[[], Awaitable[bytes | None]]): Captures and encodes a
+                new frame; returns None when the camera can't be reached.
+
+        Returns:
+            CachedFrame | None: A frame younger than the TTL, the last good frame
+            marked as stale if the capture failed, or None if there is neither.
+        """
+        cached = self._frames.get(printer_name)
+        if cached is not None and cached.age < self.ttl:
+            self._frames.move_to_end(printer_name)
+            return cached
+
+        task = self._captures.get(printer_name)
+        if task is None:
+            task = asyncio.create_task(
+                self._capture(printer_name, capture),
+                name=f"camera-frame-{printer_name}"
+            )
+            self._captures[printer_name] = task
+
+        # Shielded, so one cancelled caller doesn't abort the capture of the others
+        data = await asyncio.shield(task)
+        if data is not None:
+            return self._frames.get(printer_name)
+
+        cached = self._frames.get(printer_name)
+        if cached is None:
+            return None
+        logger.info("Serving a %.0fs old camera frame of `%s`.", cached.age, printer_name)
+        return replace(cached, stale=True)
+
+    def set_signature(self, printer_name: str, frame: CachedFrame, signature: bytes) -> None:
+        """Keep the signature of a frame, unless a newer frame was captured meanwhile."""
+        cached = self._frames.get(printer_name)
+        if cached is not None and cached.captured_at == frame.captured_at:
+            self._frames[printer_name] = replace(cached, signature=signature)
+
+    def discard(self, printer_name: str) -> None:
+        """Forget the frame of a printer (e.g. after it was deleted or renamed)."""
+        self._frames.pop(printer_name, None)
+
+    def clear(self) -> None:
+        """Forget all frames."""
+        self._frames.clear()
+
+    async def _capture(self,
+                       printer_name: str,
+                       capture: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        """Run one capture and store its result; failures are returned as None."""
+        try:
+            data = await capture()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Camera capture of `%s` failed.", printer_name)
+            data = None
+        finally:
+            self._captures.pop(printer_name, None)
+
+        if data is not None:
+            self._frames[printer_name] = CachedFrame(data=data, captured_at=time.monotonic())
+            self._frames.move_to_end(printer_name)
+            while len(self._frames) > self.max_size:
+                self._frames.popitem(last=False)
+        return data
+
+
+camera_frames = CameraFrameCache()
@@ -0,0 +1,123 @@
+"""
+Frame-difference tracking of printer camera frames.
+
+Each frame is reduced to a tiny grayscale signature and compared to the frame
+last uploaded to the same status message. While the picture has barely
+changed, the message keeps pointing at its own attachment instead of
+uploading the frame again. Comparing consecutive frames of a printer also
+tells how long a print has shown no visible progress.
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .image_pipeline import frame_difference
+
+logger = logging.getLogger(__name__)
+
+# Mean pixel difference (0-1) below which two camera frames count as unchanged
+FRAME_DIFF_THRESHOLD = float(os.getenv("FRAME_DIFF_THRESHOLD", "0.02"))
+# Seconds an uploaded frame may be reused (Discord attachment URLs expire)
+FRAME_REUSE_MAX_AGE = float(os.getenv("FRAME_REUSE_MAX_AGE", "3600"))
+# Seconds without a visible camera change after which a running print is flagged
+FRAME_STALL_WARNING = float(os.getenv("FRAME_STALL_WARNING", "1800"))
+# Seconds between two camera frames compared by the monitor while a printer prints
+FRAME_OBSERVE_INTERVAL = float(os.getenv("FRAME_OBSERVE_INTERVAL", "300"))
+
+
+@dataclass
+class FrameRecord:
+    """Last seen frame of a printer."""
+    observed_signature: bytes
+    changed_at: float
+    observed_at: float
+    score: float = 1.0
+
+
+@dataclass
+class FrameUpload:
+    """Frame last uploaded to one message."""
+    signature: bytes
+    url: str
+    uploaded_at: float
+
+
+class FrameDiffTracker:
+    """Remembers the frame signatures of each printer and the frames uploaded to each message."""
+
+    def __init__(self,
+                 threshold: float = FRAME_DIFF_THRESHOLD,
+                 reuse_max_age: float = FRAME_REUSE_MAX_AGE,
+                 observe_interval: float = FRAME_OBSERVE_INTERVAL):
+        """Create an empty tracker."""
+        self.threshold = threshold
+        self.reuse_max_age = reuse_max_age
+        self.observe_interval = observe_interval
+        self._records: Dict[str, FrameRecord] = {}
+        # By printer and ID of the message holding the attachment
+        self._uploads: Dict[Tuple[str, int], FrameUpload] = {}
+
+    def observe(self, printer_name: str, signature: bytes) -> float:
+        """
+        Compare a new frame with the previous one of the printer.
+
+        Returns:
+            float: Difference score from 0.0 (identical) to 1.0.
+        """
+        now = time.monotonic()
+        record = self._records.get(printer_name)
+        if record is None:
+            self._records[printer_name] = FrameRecord(
+                observed_signature=signature, changed_at=now, observed_at=now
+            )
+            return 1.0
+
+        record.observed_at = now
+        record.score = frame_difference(record.observed_signature, signature)
+        if record.score >= self.threshold:
+            record.observed_signature = signature
+            record.changed_at = now
+        return record.score
+
+    def observation_due(self, printer_name: str) -> bool:
+        """True if the printer had no frame compared for `observe_interval` seconds."""
+        record = self._records.get(printer_name)
+        return record is None or time.monotonic() - record.observed_at >= self.observe_interval
+
+    def reusable_url(self, printer_name: str, message_id: int, signature: bytes) -> Optional[str]:
+        """
+        Return the URL of the frame last uploaded to a message, if it still shows
+        this frame closely enough.
+        """
+        upload = self._uploads.get((printer_name, message_id))
+        if upload is None or time.monotonic() - upload.uploaded_at > self.reuse_max_age:
+            return None
+        if frame_difference(upload.signature, signature) >= self.threshold:
+            return None
+        logger.debug("Reusing the uploaded camera frame of `%s`.", printer_name)
+        return upload.url
+
+    def record_upload(self, printer_name: str, message_id: int, signature: bytes, url: str) -> None:
+        """Remember the attachment URL a frame was uploaded to in a message."""
+        self._uploads[(printer_name, message_id)] = FrameUpload(
+            signature=signature, url=url, uploaded_at=time.monotonic()
+        )
+
+    def unchanged_for(self, printer_name: str) -> Optional[float]:
+        """Seconds the camera has shown no visible change, None if never observed."""
+        record = self._records.get(printer_name)
+        if record is None:
+            return None
+        return time.monotonic() - record.changed_at
+
+    def discard(self, printer_name: str) -> None:
+        """Forget a printer (e.g. after it was deleted or renamed)."""
+        self._records.pop(printer_name, None)
+        for key in [key for key in self._uploads if key[0] == printer_name]:
+            del self._uploads[key]
+
+
+frame_diffs = FrameDiffTracker()
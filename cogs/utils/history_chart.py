@@ -0,0 +1,260 @@
+"""
+Charts of the recorded telemetry of a printer.
+
+`get_history_chart` renders the temperatures and the print progress of a time
+window as one PNG. Drawing runs on the image process pool, each series is
+drawn with a single polyline call per unbroken run of samples, and finished
+charts are cached by printer, window and telemetry version, so asking again
+costs nothing until a new sample is recorded.
+"""
+
+import io
+import logging
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .image_executor import run_image_task
+from .telemetry import TelemetryRecorder, telemetry as shared_telemetry
+
+logger = logging.getLogger(__name__)
+
+# Number of rendered history charts kept in memory
+HISTORY_CHART_CACHE_SIZE = int(os.getenv("HISTORY_CHART_CACHE_SIZE", "32"))
+# Longest window a history chart may show, in seconds (default 30 days)
+HISTORY_MAX_WINDOW = float(os.getenv("HISTORY_MAX_WINDOW", str(30 * 86400)))
+
+_WINDOW_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+# Metric, legend label and line color of each panel
+_TEMPERATURE_LINES = (
+    ("nozzle_temperature", "Nozzle °C", (255, 112, 67)),
+    ("bed_temperature", "Bed °C", (66, 165, 245)),
+    ("chamber_temperature", "Chamber °C", (102, 187, 106)),
+)
+_PROGRESS_LINES = (
+    ("percentage", "Progress %", (171, 71, 188)),
+)
+
+_SIZE = (960, 600)
+_BACKGROUND = (43, 45, 49)
+_GRID = (70, 73, 80)
+_TEXT = (219, 222, 225)
+_MARGIN_LEFT, _MARGIN_RIGHT, _MARGIN_TOP = 60, 20, 20
+
+Series = Tuple[List[float], List[float]]
+# Printer name, window in seconds and telemetry version of a rendered chart
+ChartKey = Tuple[str, float, int]
+
+
+def parse_window(window: str) -> Optional[float]:
+    """Parse a window such as "30m", "6h" or "7d" into seconds; None if invalid."""
+    match = re.fullmatch(r"\s*(\d+)\s*([mhd])\s*", window.lower())
+    if match is None:
+        return None
+    seconds = float(int(match[1]) * _WINDOW_UNITS[match[2]])
+    if seconds <= 0 or seconds > HISTORY_MAX_WINDOW:
+        return None
+    return seconds
+
+
+def _format_offset(seconds: float) -> str:
+    """Label of a point on the time axis, relative to now."""
+    if seconds <= 0:
+        return "now"
+    for unit, size in (("d", 86400), ("h", 3600)):
+        if seconds >= size:
+            return f"-{seconds / size:g}{unit}"
+    return f"-{seconds / 60:g}m"
+
+
+def _runs(points: Sequence[Tuple[float, float]],
+          values: Sequence[float]) -> List[List[Tuple[float, float]]]:
+    """Split the points of a series where values are missing (NaN)."""
+    runs: List[List[Tuple[float, float]]] = [[]]
+    for point, value in zip(points, values):
+        if math.isnan(value):
+            if runs[-1]:
+                runs.append([])
+        else:
+            runs[-1].append(point)
+    return [run for run in runs if run]
+
+
+def _value_range(series: Sequence[Series],
+                 fixed: Optional[Tuple[float, float]]) -> Tuple[float, float]:
+    """Range of the value axis: `fixed` if given, else the values with some padding."""
+    if fixed is not None:
+        return fixed
+    finite = [value for _, values in series for value in values if not math.isnan(value)]
+    if not finite:
+        return 0.0, 1.0
+    low, high = min(finite), max(finite)
+    padding = max((high - low) * 0.1, 1.0)
+    return low - padding, high + padding
+
+
+def _draw_panel(draw: ImageDraw.ImageDraw,  # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-locals
+                box: Tuple[int, int, int, int],
+                window: Tuple[float, float],
+                lines: Sequence[Tuple[str, Tuple[int, int, int]]],
+                series: Sequence[Series],
+                fixed_range: Optional[Tuple[float, float]] = None) -> None:
+    """Draw the grid, the lines and the legend of one panel into `box`."""
+    font = ImageFont.load_default()
+    left, top, right, bottom = box
+    start, end = window
+    low, high = _value_range(series, fixed_range)
+
+    for step in range(5):
+        y = bottom - (bottom - top) * step / 4
+        draw.line([(left, y), (right, y)], fill=_GRID)
+        draw.text((4, y - 6), f"{low + (high - low) * step / 4:.0f}", fill=_TEXT, font=font)
+    draw.rectangle(box, outline=_GRID)
+
+    x_scale = (right - left) / (end - start)
+    y_scale = (bottom - top) / (high - low)
+    for (_, color), (timestamps, values) in zip(lines, series):
+        points = [
+            (left + (timestamp - start) * x_scale, bottom - (value - low) * y_scale)
+            for timestamp, value in zip(timestamps, values)
+        ]
+        for run in _runs(points, values):
+            if len(run) == 1:
+                x, y = run[0]
+                draw.ellipse((x - 2, y - 2, x + 2, y + 2), fill=color)
+            else:
+                draw.line(run, fill=color, width=2, joint="curve")
+
+    legend_x = left + 8
+    for label, color in lines:
+        draw.rectangle((legend_x, top + 8, legend_x + 10, top + 18), fill=color)
+        draw.text((legend_x + 14, top + 7), label, fill=_TEXT, font=font)
+        legend_x += 24 + int(draw.textlength(label, font=font))
+
+
+def _draw_time_axis(draw: ImageDraw.ImageDraw,
+                    span: Tuple[int, int],
+                    y: int,
+                    window: Tuple[float, float]) -> None:
+    """Label the time axis between the x coordinates of `span`, relative to now."""
+    font = ImageFont.load_default()
+    left, right = span
+    start, end = window
+    for step in range(5):
+        x = left + (right - left) * step / 4
+        label = _format_offset((end - start) * (4 - step) / 4)
+        draw.text((x - draw.textlength(label, font=font) / 2, y), label, fill=_TEXT, font=font)
+
+
+def render_history_chart(title: str,
+                         window: Tuple[float, float],
+                         temperatures: Sequence[Series],
+                         progress: Sequence[Series]) -> bytes:
+    """
+    Render the temperature and progress panels of a printer as PNG.
+
+    Runs in the image worker processes, so it only takes plain lists.
+
+    Args:
+        title (str): Text above the chart.
+        window (Tuple[float, float]): Start and end of the time axis (Unix time).
+        temperatures (Sequence[Series]): Timestamps and values of each temperature line.
+        progress (Sequence[Series]): Timestamps and values of the progress line.
+
+    Returns:
+        bytes: The chart as PNG.
+    """
+    image = Image.new("RGB", _SIZE, _BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    width, height = _SIZE
+    right = width - _MARGIN_RIGHT
+
+    draw.text((_MARGIN_LEFT, 4), title, fill=_TEXT, font=font)
+    _draw_panel(draw, (_MARGIN_LEFT, _MARGIN_TOP + 10, right, 370), window,
+                [(label, color) for _, label, color in _TEMPERATURE_LINES], temperatures)
+    _draw_panel(draw, (_MARGIN_LEFT, 400, right, height - 40), window,
+                [(label, color) for _, label, color in _PROGRESS_LINES], progress,
+                fixed_range=(0.0, 100.0))
+
+    _draw_time_axis(draw, (_MARGIN_LEFT, right), height - 30, window)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+class HistoryChartCache:
+    """Rendered charts by (printer, window, telemetry version), least recently used dropped."""
+
+    def __init__(self, max_size: int = HISTORY_CHART_CACHE_SIZE):
+        """Create the cache for at most `max_size` charts."""
+        self.max_size = max(1, max_size)
+        self._charts: "OrderedDict[ChartKey, bytes]" = OrderedDict()
+
+    def get(self, key: ChartKey) -> Optional[bytes]:
+        """Return a cached chart and mark it as recently used."""
+        chart = self._charts.get(key)
+        if chart is not None:
+            self._charts.move_to_end(key)
+        return chart
+
+    def put(self, key: ChartKey, chart: bytes) -> None:
+        """Store a chart, dropping the least recently used one when full."""
+        self._charts[key] = chart
+        self._charts.move_to_end(key)
+        while len(self._charts) > self.max_size:
+            self._charts.popitem(last=False)
+
+    def discard(self, printer_name: str) -> None:
+        """Drop all charts of a printer."""
+        for key in [key for key in self._charts if key[0] == printer_name]:
+            del self._charts[key]
+
+
+history_charts = HistoryChartCache()
+
+
+async def get_history_chart(printer_name: str,
+                            window: float,
+                            recorder: Optional[TelemetryRecorder] = None,
+                            cache: Optional[HistoryChartCache] = None) -> Optional[bytes]:
+    """
+    Return the history chart of a printer for the last `window` seconds.
+
+    Returns:
+        bytes | None: The chart as PNG, None if nothing was recorded in the window.
+    """
+    recorder = recorder if recorder is not None else shared_telemetry
+    cache = cache if cache is not None else history_charts
+    await recorder.load(printer_name)
+    key = (printer_name, window, recorder.version(printer_name))
+    chart = cache.get(key)
+    if chart is not None:
+        logger.debug("History chart of `%s` served from the cache.", printer_name)
+        return chart
+
+    end = time.time()
+    start = end - window
+    series: Dict[str, Series] = {
+        metric: recorder.series(printer_name, metric, since=start)
+        for metric, _, _ in _TEMPERATURE_LINES + _PROGRESS_LINES
+    }
+    if not any(timestamps for timestamps, _ in series.values()):
+        return None
+
+    chart = await run_image_task(
+        render_history_chart,
+        f"{printer_name}: last {_format_offset(window)[1:]}",
+        (start, end),
+        [series[metric] for metric, _, _ in _TEMPERATURE_LINES],
+        [series[metric] for metric, _, _ in _PROGRESS_LINES]
+    )
+    cache.put(key, chart)
+    return chart
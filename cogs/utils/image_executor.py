@@ -0,0 +1,70 @@
+"""
+Process pool for CPU-bound image work.
+
+Decoding, resizing, watermarking and re-encoding a full-resolution camera
+frame takes tens of milliseconds of pure CPU. In a thread it still holds the
+GIL, so when the monitor announces several printers at once the Discord
+gateway stalls. `run_image_task` runs such work in worker processes instead;
+arguments and results are plain bytes, strings and dataclasses, which are
+cheap to pickle.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Number of worker processes for image encoding; 0 runs image work in a thread instead
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+T = TypeVar("T")
+
+
+class ImageProcessPool:
+    """Lazily started process pool that is recreated if a worker process dies."""
+
+    def __init__(self, max_workers: int = IMAGE_WORKERS):
+        """Create the pool; worker processes are only started on first use."""
+        self.max_workers = max(0, max_workers)
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn" because forking a process that runs MQTT threads can deadlock
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a picklable module-level function in a worker process and await its result."""
+        if self.max_workers == 0:
+            return await asyncio.to_thread(func, *args)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        except BrokenProcessPool:
+            logger.error("An image worker process died, restarting the pool.")
+            self.shutdown()
+            raise
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; the pool starts again on the next call."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+image_pool = ImageProcessPool()
+
+
+async def run_image_task(func: Callable[..., T], *args: Any) -> T:
+    """Run CPU-bound image work on the shared image process pool."""
+    return await image_pool.run(func, *args)
@@ -0,0 +1,150 @@
+"""
+In-memory encoding of printer camera frames for Discord uploads.
+
+Frames go from the printer camera through an in-memory buffer straight into
+the upload, re-encoded as JPEG or WebP and scaled down to a maximum dimension,
+so a status message needs no disk I/O and uploads stay around 100 KB.
+
+The processing functions are CPU-bound and take and return plain bytes and
+strings, so they can run in the image process pool (see `image_executor`).
+"""
+
+import base64
+import io
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+# Upload format of camera frames: JPEG or WEBP
+CAMERA_IMAGE_FORMAT = os.getenv("CAMERA_IMAGE_FORMAT", "JPEG").upper()
+# Encoder quality of camera frames (1-100)
+CAMERA_IMAGE_QUALITY = int(os.getenv("CAMERA_IMAGE_QUALITY", "80"))
+# Longest side in pixels of uploaded camera frames
+CAMERA_IMAGE_MAX_DIMENSION = int(os.getenv("CAMERA_IMAGE_MAX_DIMENSION", "1280"))
+# Longest side in pixels of camera frame thumbnails
+CAMERA_THUMBNAIL_SIZE = int(os.getenv("CAMERA_THUMBNAIL_SIZE", "320"))
+
+# Size of the grayscale image frames are compared by
+FRAME_SIGNATURE_SIZE = (32, 24)
+
+_FILE_EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+
+@dataclass(frozen=True)
+class FrameEncoderSettings:
+    """How camera frames are encoded before they are uploaded."""
+    image_format: str = CAMERA_IMAGE_FORMAT
+    quality: int = CAMERA_IMAGE_QUALITY
+    max_dimension: int = CAMERA_IMAGE_MAX_DIMENSION
+
+    def __post_init__(self):
+        if self.image_format not in _FILE_EXTENSIONS:
+            raise ValueError(f"Unsupported camera image format: {self.image_format}")
+
+    @property
+    def extension(self) -> str:
+        """File extension matching the image format."""
+        return _FILE_EXTENSIONS[self.image_format]
+
+
+def encode_frame(image: Image.Image, settings: FrameEncoderSettings) -> bytes:
+    """Scales a frame down to the maximum dimension and encodes it into memory."""
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if max(image.size) > settings.max_dimension:
+        image = image.copy()
+        image.thumbnail((settings.max_dimension, settings.max_dimension))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=settings.image_format, quality=settings.quality)
+    return buffer.getvalue()
+
+
+def frame_watermark(printer_name: str, percentage: object = None) -> str:
+    """Text stamped onto a camera frame: the printer name and, if known, the progress."""
+    if isinstance(percentage, (int, float)):
+        return f"{printer_name} | {percentage:.0f}%"
+    return printer_name
+
+
+def draw_watermark(image: Image.Image, text: str) -> Image.Image:
+    """Draws the text in the bottom-left corner on a dark box, so it stays readable."""
+    image = image.convert("RGB") if image.mode != "RGB" else image.copy()
+    font = ImageFont.load_default(size=max(12, image.height // 30))
+    margin = max(4, image.height // 100)
+
+    draw = ImageDraw.Draw(image, "RGBA")
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    origin = (margin, image.height - (bottom - top) - 3 * margin)
+    draw.rectangle(
+        (0, origin[1] - margin, origin[0] + right - left + 2 * margin, image.height),
+        fill=(0, 0, 0, 160)
+    )
+    draw.text((origin[0], origin[1] - top), text, font=font, fill=(255, 255, 255, 255))
+    return image
+
+
+def process_frame(frame_base64: str,
+                  settings: FrameEncoderSettings,
+                  watermark: Optional[str] = None) -> bytes:
+    """
+    Decodes a camera frame, optionally watermarks it, and encodes it for upload.
+
+    Args:
+        frame_base64 (str): Frame as returned by `printer.get_camera_frame()`.
+        settings (FrameEncoderSettings): Output format, quality and size.
+        watermark (str | None): Text stamped onto the frame.
+
+    Returns:
+        bytes: The encoded frame.
+    """
+    with Image.open(io.BytesIO(base64.b64decode(frame_base64))) as image:
+        image.load()
+        if max(image.size) > settings.max_dimension:
+            image.thumbnail((settings.max_dimension, settings.max_dimension))
+        frame = draw_watermark(image, watermark) if watermark else image
+        return encode_frame(frame, settings)
+
+
+def encode_thumbnail(frame: bytes,
+                     settings: FrameEncoderSettings,
+                     size: int = CAMERA_THUMBNAIL_SIZE) -> bytes:
+    """Scales an encoded frame down to a thumbnail of at most `size` pixels."""
+    with Image.open(io.BytesIO(frame)) as image:
+        image.load()
+        return encode_frame(image, FrameEncoderSettings(
+            image_format=settings.image_format,
+            quality=settings.quality,
+            max_dimension=size
+        ))
+
+
+def camera_frame_filename(printer_name: str, settings: FrameEncoderSettings) -> str:
+    """Attachment filename of a printer's camera frame, safe to use in an attachment URL."""
+    safe_name = re.sub(r"[^A-Za-z0-9_-]", "_", printer_name)
+    return f"camera_frame_{safe_name}.{settings.extension}"
+
+
+def frame_signature(frame: bytes) -> bytes:
+    """
+    Reduces an encoded frame to a tiny grayscale image for cheap comparisons.
+
+    JPEG frames are decoded at reduced scale (`draft`), so this takes about a
+    millisecond even for full-resolution frames.
+    """
+    with Image.open(io.BytesIO(frame)) as image:
+        image.draft("L", (FRAME_SIGNATURE_SIZE[0] * 4, FRAME_SIGNATURE_SIZE[1] * 4))
+        return image.convert("L").resize(FRAME_SIGNATURE_SIZE, Image.Resampling.BOX).tobytes()
+
+
+def frame_difference(first: bytes, second: bytes) -> float:
+    """Mean absolute difference of two frame signatures, from 0.0 (equal) to 1.0."""
+    if len(first) != len(second) or not first:
+        return 1.0
+    return sum(abs(a - b) for a, b in zip(first, second)) / (255 * len(first))
@@ -1,14 +1,24 @@
 """Data models and utilities for printer and image credentials."""
+import asyncio
+import functools
+import io
 import logging
+import os
+import time
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import TypedDict, cast
+from typing import List, Optional, TypedDict, cast
 import json
 import discord
 
 logger = logging.getLogger(__name__)
 
+# Seconds a change of the printer registry waits, so a burst of changes is written once
+STORAGE_FLUSH_DELAY = float(os.getenv("STORAGE_FLUSH_DELAY", "1"))
+# Seconds between checks whether the printer registry file was changed by someone else
+STORAGE_RELOAD_INTERVAL = float(os.getenv("STORAGE_RELOAD_INTERVAL", "5"))
+
 @dataclass(init=True, repr=False, eq=False)
 class PrinterCredentials:
     """Represents credentials and connection information for a printer."""
@@ -24,42 +34,255 @@ class PrinterDataDict(TypedDict):
     serial: str
 
 
+@functools.lru_cache(maxsize=None)
+def _read_image_file(image_filename: str) -> bytes:
+    """Reads a static image from the img folder once and keeps it in memory."""
+    return Path("img", image_filename).read_bytes()
+
+
 @dataclass
 class ImageCredentials:
-    """Holds image-related metadata and constructs Discord file references."""
+    """Holds image data and constructs Discord file references."""
     image_filename: str = "camera_frame_.png"
-    delete_image_flag: bool = False
+    image_data: Optional[bytes] = None
+    # Age in seconds of an outdated camera frame served because a new capture failed
+    frame_age: Optional[float] = None
+    # Grayscale signature of the camera frame, used to skip unchanged uploads
+    frame_signature: Optional[bytes] = None
+    # URL of an earlier upload showing the same picture; set, nothing is uploaded
+    reuse_url: Optional[str] = None
 
     def __post_init__(self):
-        self.image_main_location = discord.File(
-            f"img/{self.image_filename}", filename=self.image_filename
-        )
-        self.embed_set_image_url = f"attachment://{self.image_filename}"
+        self.embed_set_image_url = self.reuse_url or f"attachment://{self.image_filename}"
+
+    @property
+    def upload_files(self) -> List[discord.File]:
+        """Files to attach to a message; none when an earlier upload is reused."""
+        if self.reuse_url is not None:
+            return []
+        return [self.image_main_location]
+
+    @property
+    def image_main_location(self) -> discord.File:
+        """
+        Returns a new Discord file for the image on every access.
+
+        A discord.File can only be uploaded once, so each send needs its own.
+        Without `image_data` the static image of the same name from `img/` is used.
+        """
+        image_data = self.image_data
+        if image_data is None:
+            image_data = _read_image_file(self.image_filename)
+        return discord.File(io.BytesIO(image_data), filename=self.image_filename)
+
+
+def _write_json_atomic(path: Path, data: object) -> None:
+    """
+    Write JSON to a temporary file next to `path` and rename it over `path`.
+
+    The rename is atomic, so a crash mid-write leaves the old file intact
+    instead of a truncated one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
 
 
-class PrinterStorage:
-    """Handles loading and saving printer data to a JSON file."""
+class PrinterStorage:  # pylint: disable=too-many-instance-attributes
+    """
+    Keeps the printer registry in memory and persists it to a JSON file.
 
-    def __init__(self, file_path: str = "data/printer.json"):
-        """Initialize storage with given file path."""
+    The in-memory registry is the source of truth. Changes are written
+    behind: a burst of changes is flushed once, `flush_delay` seconds after
+    the first of them. The file is only read again when its modification
+    time changed, e.g. because it was edited by hand, which is checked at
+    most every `reload_interval` seconds.
+
+    Renaming or deleting a printer also moves or clears its status message ID
+    in `status_messages`, so that no ID is left behind under a stale name.
+    """
+
+    def __init__(self,
+                 file_path: str = "data/printer.json",
+                 flush_delay: float = STORAGE_FLUSH_DELAY,
+                 reload_interval: float = STORAGE_RELOAD_INTERVAL,
+                 status_messages: Optional["StatusMessageStorage"] = None):
+        """Initialize storage with given file path and load the registry."""
         self.path = Path(file_path)
+        self.status_messages = status_messages
+        self.flush_delay = flush_delay
+        self.reload_interval = reload_interval
+        self._printers: dict[str, PrinterDataDict] = {}
+        self._last_states: dict[str, str] = {}
+        self._mtime_ns: Optional[int] = None
+        self._checked_at = time.monotonic()
+        self._dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._reload()
+
+    @property
+    def printers(self) -> dict[str, PrinterDataDict]:
+        """The registry, re-read first if the file was changed by someone else."""
+        now = time.monotonic()
+        if not self._dirty and now - self._checked_at >= self.reload_interval:
+            self._checked_at = now
+            try:
+                if self._file_mtime_ns() != self._mtime_ns:
+                    self._reload()
+            except (OSError, json.JSONDecodeError):
+                # A half-written or broken file must not empty the registry
+                logger.exception("Failed to reload the printer registry from `%s`, "
+                                 "keeping the last good copy.", self.path)
+        return self._printers
 
     def load(self) -> dict[str, PrinterDataDict]:
-        """Load printer data from the JSON file."""
+        """Return the printer registry."""
+        return self.printers
+
+    def save(self, data: dict[str, PrinterDataDict]) -> None:
+        """Replace the printer registry."""
+        if data is not self._printers:
+            self._printers.clear()
+            self._printers.update(data)
+        self._schedule_flush()
+
+    def set(self,
+            printer_name: str,
+            printer_data: PrinterDataDict,
+            guild_id: Optional[int] = None) -> None:  # pylint: disable=unused-argument
+        """Add or replace a printer in the registry; the JSON file doesn't keep the guild."""
+        self.printers[printer_name] = printer_data
+        self._schedule_flush()
+
+    def delete(self, printer_name_remove: str) -> bool:
+        """Remove a printer from the registry; False if it wasn't in it."""
+        self._last_states.pop(printer_name_remove, None)
+        if self.status_messages is not None:
+            self.status_messages.delete(printer_name_remove)
+        if self.printers.pop(printer_name_remove, None) is None:
+            return False
+        self._schedule_flush()
+        return True
+
+    def rename(self, old_name: str, new_name: str, printer_data: PrinterDataDict) -> None:
+        """Store a printer under a new name (or the same) with new credentials."""
+        if self.status_messages is not None:
+            self.status_messages.rename(old_name, new_name)
+        self.printers.pop(old_name, None)
+        self.set(new_name, printer_data)
+
+    def record_state(self, printer_name: str, state: str) -> None:
+        """Remember the last known gcode state of a printer, in memory only."""
+        self._last_states[printer_name] = state
+
+    def last_state(self, printer_name: str) -> Optional[str]:
+        """Return the last known gcode state of a printer."""
+        return self._last_states.get(printer_name)
+
+    def flush(self) -> None:
+        """Write pending changes to the file now."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._dirty:
+            return
+        _write_json_atomic(self.path, self._printers)
+        self._mtime_ns = self._file_mtime_ns()
+        self._dirty = False
+
+    def close(self) -> None:
+        """Write pending changes before shutdown."""
+        self.flush()
+
+    def _schedule_flush(self) -> None:
+        """Flush after the delay, or right away if there is no event loop to wait on."""
+        self._dirty = True
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self._flush_later)
+
+    def _flush_later(self) -> None:
+        self._flush_handle = None
+        try:
+            self.flush()
+        except OSError:
+            logger.exception("Failed to write the printer registry to `%s`.", self.path)
+
+    def _file_mtime_ns(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _reload(self) -> None:
+        """
+        Read the registry from the file, keeping the same dict object.
+
+        The registry is only replaced once the file was read completely. The
+        new modification time is taken first, so a broken file is not read
+        again until it changes.
+        """
+        self._mtime_ns = self._file_mtime_ns()
+        printers: dict[str, PrinterDataDict] = {}
+        if self._mtime_ns is not None:
+            with open(self.path, encoding="utf-8") as f:
+                printers = cast(dict[str, PrinterDataDict], json.load(f))
+        self._printers.clear()
+        self._printers.update(printers)
+
+
+class StatusMessageStorage:
+    """Keeps the IDs of the status channel message of each printer in a JSON file."""
+
+    def __init__(self, file_path: str = "data/status_messages.json"):
+        """Initialize storage with given file path and load the stored IDs."""
+        self.path = Path(file_path)
+        self.message_ids: dict[str, int] = self.load()
+
+    def load(self) -> dict[str, int]:
+        """Load the message IDs from the JSON file."""
         if not self.path.exists():
             return {}
         with open(self.path, encoding="utf-8") as f:
-            return cast(dict[str,PrinterDataDict], json.load(f))
+            return {name: int(message_id) for name, message_id in json.load(f).items()}
 
-    def save(self, data: dict[str, PrinterDataDict]) -> None:
-        """Save printer data to the JSON file."""
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+    def save(self) -> None:
+        """Save the message IDs to the JSON file."""
+        _write_json_atomic(self.path, self.message_ids)
+
+    def get(self, printer_name: str) -> Optional[int]:
+        """Return the ID of the status message of a printer."""
+        return self.message_ids.get(printer_name)
+
+    def set(self, printer_name: str, message_id: int) -> None:
+        """Store the ID of the status message of a printer."""
+        self.message_ids[printer_name] = message_id
+        self.save()
 
-    def delete(self, printer_name_remove:str):
-        """Remove printer from the JSON file"""
-        connected_printers = self.load()
+    def delete(self, printer_name: str) -> None:
+        """Forget the status message of a printer."""
+        if self.message_ids.pop(printer_name, None) is not None:
+            self.save()
 
-        if printer_name_remove in connected_printers:
-            connected_printers.pop(printer_name_remove)
-            self.save(connected_printers)
+    def rename(self, old_name: str, new_name: str) -> None:
+        """Move the status message of a printer to its new name."""
+        if old_name == new_name:
+            return
+        message_ids = dict(self.message_ids)
+        message_id = message_ids.pop(old_name, None)
+        # A printer replaced by the rename takes its message along
+        message_ids.pop(new_name, None)
+        if message_id is not None:
+            message_ids[new_name] = message_id
+        if message_ids != self.message_ids:
+            _write_json_atomic(self.path, message_ids)
+            self.message_ids = message_ids
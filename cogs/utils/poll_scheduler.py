@@ -0,0 +1,105 @@
+"""
+Adaptive per-printer polling cadence.
+
+Instead of checking every printer on one fixed interval, each printer gets its
+own next-due time in a priority queue. Idle and offline printers are checked
+rarely, running printers more often, and printers close to the end of their
+print most often, so finish notifications go out quickly while a mostly idle
+fleet costs little MQTT and Discord traffic.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bambulabs_api.states_info import GcodeState
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of idle, finished or offline printers
+POLL_IDLE_INTERVAL = float(os.getenv("POLL_IDLE_INTERVAL", "300"))
+# Seconds between checks of printing, paused or preparing printers
+POLL_ACTIVE_INTERVAL = float(os.getenv("POLL_ACTIVE_INTERVAL", "60"))
+# Seconds between checks of printers close to the end of their print
+POLL_FINISHING_INTERVAL = float(os.getenv("POLL_FINISHING_INTERVAL", "10"))
+# Remaining print time in minutes below which a printer counts as finishing
+POLL_FINISHING_WINDOW = float(os.getenv("POLL_FINISHING_WINDOW", "5"))
+
+
+def poll_interval(state: Optional[str], remaining_time: object = None) -> float:
+    """
+    Returns how many seconds to wait before checking a printer again.
+
+    Args:
+        state (str | None): Last known gcode state, None if the printer is offline.
+        remaining_time (object): Remaining print time in minutes as reported by
+            `printer.get_time()`; ignored unless it is a number.
+
+    Returns:
+        float: Delay until the next check in seconds.
+    """
+    if state == GcodeState.RUNNING:
+        if isinstance(remaining_time, (int, float)) and remaining_time <= POLL_FINISHING_WINDOW:
+            return POLL_FINISHING_INTERVAL
+        return POLL_ACTIVE_INTERVAL
+    if state in (GcodeState.PAUSE, GcodeState.PREPARE):
+        return POLL_ACTIVE_INTERVAL
+    return POLL_IDLE_INTERVAL
+
+
+class PollScheduler:
+    """Priority queue of printers keyed by the time their next check is due."""
+
+    def __init__(self) -> None:
+        """Create an empty schedule."""
+        self._heap: List[Tuple[float, int, str]] = []
+        self._due_at: Dict[str, float] = {}
+        self._counter = itertools.count()
+
+    def __contains__(self, printer_name: str) -> bool:
+        return printer_name in self._due_at
+
+    def __len__(self) -> int:
+        return len(self._due_at)
+
+    def schedule(self, printer_name: str, delay: float) -> None:
+        """(Re)schedule the next check of a printer `delay` seconds from now."""
+        due_at = time.monotonic() + delay
+        self._due_at[printer_name] = due_at
+        heapq.heappush(self._heap, (due_at, next(self._counter), printer_name))
+
+    def discard(self, printer_name: str) -> None:
+        """Stop scheduling a printer; its queued entry is dropped lazily."""
+        self._due_at.pop(printer_name, None)
+
+    def sync(self, printer_names: Iterable[str]) -> None:
+        """Schedule new printers immediately and forget removed ones."""
+        wanted = set(printer_names)
+        for printer_name in wanted - self._due_at.keys():
+            self.schedule(printer_name, 0)
+        for printer_name in self._due_at.keys() - wanted:
+            self.discard(printer_name)
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Remove and return every printer whose check is due."""
+        now = time.monotonic() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, _, printer_name = heapq.heappop(self._heap)
+            # Skip entries superseded by a later `schedule` or removed by `discard`
+            if self._due_at.get(printer_name) != due_at:
+                continue
+            del self._due_at[printer_name]
+            due.append(printer_name)
+        return due
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next scheduled check, or None if nothing is scheduled."""
+        while self._heap and self._due_at.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
@@ -6,24 +6,43 @@ This module encapsulates the logic for:
     - Creating and connecting printer instances via the Bambu Lab API
     - Establishing MQTT connections with retry/backoff
     - Checking printer operational status
-    - Waiting for readiness after initial handshake
+    - Waiting for the first status report after the initial handshake
+    - Recording how long each connect stage took
+    - Probing the whole fleet in parallel
 
 """
 
 import logging
 import ipaddress
 import asyncio
+import os
+import time
 
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 import bambulabs_api as bl
 from bambulabs_api.states_info import GcodeState
 
 from cogs.utils.models import PrinterCredentials
 from cogs.utils.printer_helpers import backoff_checker
 from cogs.utils.printer_helpers import light_printer_check
+from cogs.utils.printer_executor import printer_io, run_printer_io
+from cogs.utils.printer_events import subscribe_reports
+from cogs.utils.concurrency import gather_bounded
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for the MQTT broker of the printer to accept the connection
+MQTT_CONNECT_TIMEOUT = float(os.getenv("MQTT_CONNECT_TIMEOUT", "10"))
+# Seconds to wait for a printer to report a known gcode state
+STATUS_CHECK_TIMEOUT = float(os.getenv("STATUS_CHECK_TIMEOUT", "10"))
+# Seconds to wait for the first full status report after the MQTT connection is up
+FIRST_REPORT_TIMEOUT = float(os.getenv("FIRST_REPORT_TIMEOUT", "5"))
+# Shared deadline in seconds for checking the connection of the whole fleet
+FLEET_CHECK_TIMEOUT = float(os.getenv("FLEET_CHECK_TIMEOUT", "20"))
+# Maximum number of printers probed at the same time by the fleet check
+FLEET_CHECK_CONCURRENCY = int(os.getenv("FLEET_CHECK_CONCURRENCY", "64"))
+
 async def _validate_ip(ip: str) -> bool:
     """Validates the IP address format."""
     try:
@@ -40,86 +59,274 @@ def _create_printer(printer_data: PrinterCredentials) -> bl.Printer:
     return printer
 
 async def _connect_mqtt(printer: bl.Printer, printer_name: str) -> bool:
-    """Establishes MQTT connection using backoff strategy."""
+    """Waits for the MQTT connection using a jittered backoff strategy."""
     action_name = f"MQTT connection to {printer_name}"
     result = await backoff_checker(
         action_func_callback=printer.mqtt_client.is_connected,
         action_name=action_name,
-        interval=0.3,
-        max_attempts=5,
+        interval=0.05,
+        max_attempts=10,
+        max_interval=2.0,
+        deadline=MQTT_CONNECT_TIMEOUT,
+        jitter=True,
         success_condition=lambda connected: connected is True
     )
     return result is True
 
 async def _check_printer_status(printer: bl.Printer, printer_name: str) -> Optional[str]:
     """Checks if printer returns valid status."""
+    # get_state() may publish a `pushall` request and wait for it, so it runs in a thread
     return await backoff_checker(
         action_func_callback=printer.get_state,
         action_name=f"check_printer_status for {printer_name}",
         interval=0.3,
         max_attempts=10,
+        max_interval=5.0,
+        deadline=STATUS_CHECK_TIMEOUT,
+        jitter=True,
+        run_in_thread=True,
         success_condition=lambda state: state != GcodeState.UNKNOWN
     )
 
-async def wait_for_printer_ready(printer: bl.Printer, timeout: float = 5.0) -> bool:
-    """Waits for the printer to be ready after MQTT handshake."""
-    end_time = asyncio.get_event_loop().time() + timeout
-    while asyncio.get_event_loop().time() < end_time:
-        if (printer.get_state() != GcodeState.UNKNOWN and
-            printer.get_bed_temperature() is not None):
-            return True
-        await asyncio.sleep(0.5)
-    logger.error("Printer Values Not Available Yet")
-    return False
-# pylint: disable=too-many-return-statements
-async def connect_to_printer(
-    printer_name: str,
-    printer_data: PrinterCredentials
-) -> Optional[bl.Printer]:
-    """Connects to a printer and validates its state."""
+def _is_full_report(print_report: Dict[str, Any]) -> bool:
+    """Checks that a report carries the full status (as sent in reply to `pushall`)."""
+    return "gcode_state" in print_report and "bed_temper" in print_report
+
+async def wait_for_first_report(printer: bl.Printer, timeout: Optional[float] = None) -> bool:
+    """
+    Waits until the printer has pushed its first full MQTT status report.
+
+    Resolves as soon as the report arrives instead of polling the printer state,
+    which makes it the readiness signal for a new connection. The timeout defaults
+    to FIRST_REPORT_TIMEOUT.
+    """
+    if timeout is None:
+        timeout = FIRST_REPORT_TIMEOUT
+    loop = asyncio.get_running_loop()
+    first_report: asyncio.Future[bool] = loop.create_future()
+
+    def resolve() -> None:
+        if not first_report.done():
+            first_report.set_result(True)
+
+    def on_report(print_report: Dict[str, Any]) -> None:
+        if _is_full_report(print_report):
+            loop.call_soon_threadsafe(resolve)
+
+    # Subscribe before looking at the current state, so a report can't slip in between
+    unsubscribe = subscribe_reports(printer, on_report)
     try:
-        printer = _create_printer(printer_data=printer_data)
-        if not await _connect_mqtt(printer=printer, printer_name=printer_name):
-            logger.error("Could not connect to `%s` via MQTT.", printer_name)
-            return None
-
-        status = await _check_printer_status(
-            printer=printer,
-            printer_name=printer_name
+        if _is_full_report(printer.mqtt_client.dump().get("print", {})):
+            return True
+        return await asyncio.wait_for(first_report, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.error("Printer Values Not Available Yet")
+        return False
+    finally:
+        unsubscribe()
+
+@dataclass
+class ConnectReport:
+    """Duration of every connect stage, and the stage that failed if any."""
+    printer_name: str
+    stage_durations: Dict[str, float] = field(default_factory=dict)
+    failed_stage: Optional[str] = None
+    state: Optional[str] = None
+    timed_out: bool = False
+
+    @property
+    def total(self) -> float:
+        """Total time spent in all stages that ran."""
+        return sum(self.stage_durations.values())
+
+    def summary(self) -> str:
+        """Human-readable stage timings, e.g. `create 0.10s, mqtt 0.25s`."""
+        return ", ".join(
+            f"{stage} {duration:.2f}s" for stage, duration in self.stage_durations.items()
         )
 
-        if status is None:
-            logger.warning("Connected to `%s`, but status is UNKNOWN.", printer_name)
-            return None
+async def _run_stage(report: ConnectReport, stage: str, check: Awaitable[bool]) -> bool:
+    """Awaits one connect stage and records its duration in the report."""
+    report.failed_stage = stage
+    started = time.perf_counter()
+    try:
+        passed = await check
+    finally:
+        report.stage_durations[stage] = time.perf_counter() - started
+    if passed:
+        report.failed_stage = None
+    return passed
 
-        if not await wait_for_printer_ready(printer):
-            logger.error("Printer values never became available")
-            return None
+async def connect_to_printer_with_report(
+    printer_name: str,
+    printer_data: PrinterCredentials,
+    deep_check: bool = False,
+    report: Optional[ConnectReport] = None
+) -> Tuple[Optional[bl.Printer], ConnectReport]:
+    """
+    Connects to a printer and reports how long every stage of the handshake took.
 
-        logger.info("Connected to `%s` with status `%s`.", printer_name, status)
+    Stages: `create` (client threads started), `mqtt` (broker connected),
+    `first_report` (first full status report received) and, with `deep_check`,
+    `light` (chamber light toggled on and off to prove commands are accepted).
 
-        if not await light_printer_check(printer=printer):
-            logger.error("Return None in the light_printer_check")
-            return None
+    A printer object that fails a stage is disconnected before returning None,
+    so failed attempts don't leave MQTT and camera threads running. A caller that
+    may cancel the attempt passes its own `report` to read the stage it reached.
+    """
+    if report is None:
+        report = ConnectReport(printer_name=printer_name)
+    printer: Optional[bl.Printer] = None
+    try:
+        report.failed_stage = "create"
+        started = time.perf_counter()
+        printer = await run_printer_io(_create_printer, printer_data=printer_data)
+        report.stage_durations["create"] = time.perf_counter() - started
+        report.failed_stage = None
 
-        return printer
+        if (await _run_stage(report, "mqtt",
+                             _connect_mqtt(printer=printer, printer_name=printer_name))
+                and await _run_stage(report, "first_report", wait_for_first_report(printer))
+                and (not deep_check
+                     or await _run_stage(report, "light", light_printer_check(printer)))):
+            report.state = str(GcodeState(printer.mqtt_client.dump()["print"]["gcode_state"]))
+            logger.info("Connected to `%s` with status `%s` in %.2fs (%s).",
+                        printer_name, report.state, report.total, report.summary())
+            return printer, report
+        logger.error("Connecting to `%s` failed at stage `%s` (%s).",
+                     printer_name, report.failed_stage, report.summary())
+    except asyncio.CancelledError:
+        # The caller gave up (e.g. monitor timeout): don't leave MQTT/camera threads behind
+        if printer is not None:
+            printer_io.submit(printer.disconnect)
+        raise
     except (ConnectionError, TimeoutError) as e:
         logger.error("Connection issue while connecting to printer `%s`: %s", printer_name, e)
-        return None
     except Exception: # pylint: disable=broad-exception-caught
         logger.exception("Unhandled exception during connect")
-        return None
+
+    if printer is not None:
+        await run_printer_io(printer.disconnect)
+    return None, report
+
+async def connect_to_printer(
+    printer_name: str,
+    printer_data: PrinterCredentials,
+    deep_check: bool = False
+) -> Optional[bl.Printer]:
+    """
+    Connects to a printer and validates its state.
+
+    Args:
+        printer_name (str): The human-readable name assigned to the printer.
+        printer_data (PrinterCredentials): Connection parameters of the printer.
+        deep_check (bool): Also toggle the chamber light to prove that commands
+            are accepted. Slow; meant for validating new credentials.
+
+    Returns:
+        bl.Printer | None: The connected printer instance if successful, otherwise None.
+    """
+    printer, _ = await connect_to_printer_with_report(
+        printer_name=printer_name,
+        printer_data=printer_data,
+        deep_check=deep_check
+    )
+    return printer
+
+async def probe_printer(printer_name: str,
+                        printer_data: PrinterCredentials,
+                        report: Optional[ConnectReport] = None,
+                        pooled: Optional[bl.Printer] = None) -> ConnectReport:
+    """
+    Measures the connection to a printer and fills in its connect report.
+
+    A `pooled` connection is checked in place (broker connected, full status
+    report present); otherwise a fresh connection is opened for the handshake
+    and disconnected again.
+    """
+    if report is None:
+        report = ConnectReport(printer_name=printer_name)
+    if pooled is None:
+        printer, report = await connect_to_printer_with_report(
+            printer_name=printer_name,
+            printer_data=printer_data,
+            report=report
+        )
+        if printer is not None:
+            await run_printer_io(printer.disconnect)
+        return report
+
+    if (await _run_stage(report, "mqtt",
+                         _connect_mqtt(printer=pooled, printer_name=printer_name))
+            and await _run_stage(report, "first_report", wait_for_first_report(pooled))):
+        report.state = str(GcodeState(pooled.mqtt_client.dump()["print"]["gcode_state"]))
+    return report
+
+async def check_fleet_connections(
+    printers: Dict[str, PrinterCredentials],
+    timeout: float = FLEET_CHECK_TIMEOUT,
+    limit: int = FLEET_CHECK_CONCURRENCY,
+    pooled: Optional[Callable[[str], Optional[bl.Printer]]] = None
+) -> Dict[str, ConnectReport]:
+    """
+    Probes all printers at once within one shared deadline.
+
+    The whole check takes about as long as the slowest printer (at most `timeout`
+    seconds) instead of the sum of all handshakes. Printers still connecting when
+    the deadline passes are reported with `timed_out` set and the stage they were in.
+
+    Args:
+        printers (dict[str, PrinterCredentials]): Printers to check, by name.
+        timeout (float): Shared deadline for the whole check in seconds.
+        limit (int): Maximum number of handshakes running at the same time.
+        pooled (Callable[[str], bl.Printer | None] | None): Returns the healthy
+            pooled connection of a printer, which is checked instead of opening
+            a second one.
+
+    Returns:
+        dict[str, ConnectReport]: Connect report of every printer.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    reports = {printer_name: ConnectReport(printer_name=printer_name) for printer_name in printers}
+
+    async def probe(printer_name: str) -> ConnectReport:
+        return await asyncio.wait_for(
+            probe_printer(
+                printer_name=printer_name,
+                printer_data=printers[printer_name],
+                report=reports[printer_name],
+                pooled=pooled(printer_name) if pooled is not None else None
+            ),
+            timeout=max(0.0, deadline - loop.time())
+        )
+
+    results = await gather_bounded(printer_names=list(printers), worker=probe, limit=limit)
+
+    for printer_name, result in results.items():
+        if isinstance(result, ConnectReport):
+            continue
+        # The cancelled probe left its partial report behind
+        report = reports[printer_name]
+        if isinstance(result, asyncio.TimeoutError):
+            report.timed_out = True
+            report.failed_stage = report.failed_stage or "create"
+        else:
+            logger.error("Fleet check of `%s` failed.", printer_name, exc_info=result)
+            report.failed_stage = report.failed_stage or "unknown"
+    return reports
 
 async def connection_check(
     printer_name: str,
     printer_utils_cog: 'PrinterUtils') -> Optional[bl.Printer]: # type: ignore[name-defined]
-    """Check the connection to the existing printer"""
+    """Check the connection to the existing printer, reusing the pooled connection"""
     try:
         printer_data_dict = printer_utils_cog.connected_printers[printer_name]
         printer_data_credentials = PrinterCredentials(**printer_data_dict)
-        printer = await connect_to_printer(
+        printer: Optional[bl.Printer] = await printer_utils_cog.pool.acquire(
             printer_name=printer_name,
-            printer_data=printer_data_credentials
+            credentials=printer_data_credentials
             )
         if printer is not None:
             return printer
@@ -134,7 +341,8 @@ async def connect_new_printer(
     """
     Attempts to establish a connection to a new printer using the provided credentials.
 
-    This function wraps `connect_to_printer` and logs a warning if the connection fails.
+    This function wraps `connect_to_printer` with the deep (light toggle) check and
+    logs a warning if the connection fails.
     If the printer connects successfully, the printer instance is returned for further use.
 
     Args:
@@ -147,7 +355,8 @@ async def connect_new_printer(
     """
     printer = await connect_to_printer(
         printer_name=printer_name,
-        printer_data=printer_data
+        printer_data=printer_data,
+        deep_check=True
     )
 
     if printer is not None:
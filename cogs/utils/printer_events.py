@@ -0,0 +1,184 @@
+"""
+Bridges MQTT push reports from bambulabs_api into asyncio.
+
+The MQTT client of bambulabs_api runs in its own thread and exposes a single
+`on_message_handler` hook. This module installs one fan-out handler per client,
+so several listeners can observe the same printer, and turns reports into
+asyncio events that can be awaited from the bot's event loop.
+
+`await_transition` uses the same reports to confirm a control command: it
+resolves as soon as a report shows the expected state, instead of sleeping a
+fixed time and polling the printer.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import bambulabs_api as bl
+from bambulabs_api.states_info import GcodeState
+
+from .snapshot import PrinterSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Seconds a control command may take until a report confirms the new printer state
+TRANSITION_TIMEOUT = float(os.getenv("TRANSITION_TIMEOUT", "10"))
+
+ReportListener = Callable[[Dict[str, Any]], None]
+
+_report_listeners: "weakref.WeakKeyDictionary[Any, List[ReportListener]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _install_fan_out(mqtt_client: Any) -> List[ReportListener]:
+    """Wraps the client's message handler so every report reaches all listeners."""
+    listeners: List[ReportListener] = []
+    previous_handler = mqtt_client.on_message_handler
+
+    def fan_out(client, mqtt, userdata, msg):
+        previous_handler(client, mqtt, userdata, msg)
+        print_report = client.dump().get("print", {})
+        for listener in list(listeners):
+            try:
+                listener(print_report)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Report listener failed")
+
+    mqtt_client.on_message_handler = fan_out
+    _report_listeners[mqtt_client] = listeners
+    return listeners
+
+
+def subscribe_reports(printer: bl.Printer, listener: ReportListener) -> Callable[[], None]:
+    """
+    Registers a listener for the MQTT push reports of a printer.
+
+    The listener is called from the MQTT thread with the merged `print` section of
+    the printer state after every report, so it must be cheap and thread-safe.
+
+    Returns:
+        Callable[[], None]: Function that removes the listener again.
+    """
+    mqtt_client = printer.mqtt_client
+    listeners = _report_listeners.get(mqtt_client)
+    if listeners is None:
+        listeners = _install_fan_out(mqtt_client)
+    listeners.append(listener)
+
+    def unsubscribe() -> None:
+        if listener in listeners:
+            listeners.remove(listener)
+
+    return unsubscribe
+
+
+async def await_transition(printer: bl.Printer,
+                           command: Callable[[], Awaitable[bool]],
+                           condition: Callable[[PrinterSnapshot], bool],
+                           timeout: Optional[float] = None) -> bool:
+    """
+    Sends a command and waits until a push report confirms its effect.
+
+    Args:
+        printer (bl.Printer): The printer the command is sent to.
+        command (Callable[[], Awaitable[bool]]): Sends the command; returns False
+            if the printer didn't accept it.
+        condition (Callable[[PrinterSnapshot], bool]): True for the state the
+            command should lead to, e.g. the gcode state being PAUSE.
+        timeout (float | None): Seconds to wait for the confirmation, defaults to
+            TRANSITION_TIMEOUT.
+
+    Returns:
+        bool: True as soon as a report satisfies the condition, False if the
+        command was rejected or no such report came in time.
+    """
+    if timeout is None:
+        timeout = TRANSITION_TIMEOUT
+    loop = asyncio.get_running_loop()
+    confirmed: asyncio.Future[bool] = loop.create_future()
+
+    def resolve() -> None:
+        if not confirmed.done():
+            confirmed.set_result(True)
+
+    def on_report(print_report: Dict[str, Any]) -> None:
+        if condition(PrinterSnapshot.from_report(dict(print_report))):
+            loop.call_soon_threadsafe(resolve)
+
+    # Subscribe before sending, so the confirming report can't slip in between
+    unsubscribe = subscribe_reports(printer, on_report)
+    try:
+        if not await command():
+            return False
+        if condition(PrinterSnapshot.capture(printer)):
+            return True
+        return await asyncio.wait_for(confirmed, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Printer did not confirm the command within %.1f s", timeout)
+        return False
+    finally:
+        unsubscribe()
+
+
+@dataclass(frozen=True)
+class PrinterStateEvent:
+    """A gcode state transition reported by the printer over MQTT."""
+    printer_name: str
+    state: GcodeState
+    previous_state: Optional[GcodeState]
+    received_at: float
+
+
+class PrinterReportBridge:
+    """Turns the MQTT push reports of one printer into an asyncio queue of state changes."""
+
+    def __init__(self, printer_name: str, printer: bl.Printer):
+        """Create the bridge; must be called from the event loop that consumes the events."""
+        self.printer_name = printer_name
+        self.printer = printer
+        self.queue: asyncio.Queue[PrinterStateEvent] = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+        self._last_state: Optional[GcodeState] = None
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    def attach(self) -> None:
+        """Start listening to the printer's push reports."""
+        if self._unsubscribe is None:
+            self._unsubscribe = subscribe_reports(self.printer, self._on_report)
+
+    def detach(self) -> None:
+        """Stop listening to the printer's push reports."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    async def get(self) -> PrinterStateEvent:
+        """Wait for the next state change of the printer."""
+        return await self.queue.get()
+
+    def _on_report(self, print_report: Dict[str, Any]) -> None:
+        """Called from the MQTT thread; forwards state changes to the event loop."""
+        state_value = print_report.get("gcode_state")
+        if state_value is None:
+            return
+        state = GcodeState(state_value)
+        if state == self._last_state:
+            return
+
+        event = PrinterStateEvent(
+            printer_name=self.printer_name,
+            state=state,
+            previous_state=self._last_state,
+            received_at=time.monotonic()
+        )
+        self._last_state = state
+        try:
+            self._loop.call_soon_threadsafe(self.queue.put_nowait, event)
+        except RuntimeError:
+            logger.debug("Event loop closed, dropping report for `%s`", self.printer_name)
@@ -0,0 +1,115 @@
+"""
+Dedicated thread pool for blocking bambulabs_api calls.
+
+Calls such as `printer.connect()`, `get_camera_image()` or `pause_print()` do
+network I/O synchronously. Running them on the event loop stalls the Discord
+gateway, so every blocking printer call goes through `run_printer_io`, which
+executes it on a bounded pool and keeps track of queue depth and wait times.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Number of threads available for blocking printer calls
+PRINTER_IO_WORKERS = int(os.getenv("PRINTER_IO_WORKERS", "8"))
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class PrinterIOStats:
+    """Snapshot of the printer I/O executor load."""
+    workers: int
+    queue_depth: int
+    running: int
+    completed: int
+    average_wait: float
+    max_wait: float
+
+
+class PrinterIOExecutor:  # pylint: disable=too-many-instance-attributes
+    """Bounded thread pool that records how long calls wait for a free worker."""
+
+    def __init__(self, max_workers: int = PRINTER_IO_WORKERS):
+        """Create the pool with the given number of worker threads."""
+        self.max_workers = max(1, max_workers)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="printer-io"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def submit(self,
+               func: Callable[..., T],
+               *args: Any,
+               **kwargs: Any) -> "concurrent.futures.Future[T]":
+        """Schedule a blocking call and return its concurrent future."""
+        submitted_at = time.monotonic()
+
+        def call() -> T:
+            wait = time.monotonic() - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        def on_done(future: "concurrent.futures.Future[T]") -> None:
+            # A call cancelled before a worker picked it up never ran `call`
+            if future.cancelled():
+                with self._lock:
+                    self._queued -= 1
+
+        with self._lock:
+            self._queued += 1
+        future = self._executor.submit(call)
+        future.add_done_callback(on_done)
+        return future
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking call on the pool and await its result."""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def stats(self) -> PrinterIOStats:
+        """Return the current queue depth and wait time statistics."""
+        with self._lock:
+            started = self._running + self._completed
+            return PrinterIOStats(
+                workers=self.max_workers,
+                queue_depth=self._queued,
+                running=self._running,
+                completed=self._completed,
+                average_wait=self._total_wait / started if started else 0.0,
+                max_wait=self._max_wait
+            )
+
+    def shutdown(self) -> None:
+        """Stop accepting calls and drop the ones still waiting for a worker."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+printer_io = PrinterIOExecutor()
+
+
+async def run_printer_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking bambulabs_api call on the shared printer I/O executor."""
+    return await printer_io.run(func, *args, **kwargs)
@@ -3,14 +3,29 @@
 # pylint: disable=too-many-arguments, too-many-positional-arguments
 
 import datetime
+import inspect
 import logging
 import asyncio
 import math
-from typing import Optional, Any, Callable, TYPE_CHECKING
+import random
+from dataclasses import dataclass
+from typing import Optional, Any, Callable, Tuple, TYPE_CHECKING
 
 import bambulabs_api as bl
 
 from .models import PrinterCredentials, ImageCredentials, PrinterDataDict
+from .printer_executor import run_printer_io
+from .image_pipeline import (
+    FrameEncoderSettings,
+    process_frame,
+    frame_watermark,
+    camera_frame_filename,
+    frame_signature
+)
+from .image_executor import run_image_task
+from .frame_cache import CachedFrame, camera_frames
+from .frame_diff import frame_diffs
+from .snapshot import PrinterSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -35,16 +50,31 @@ async def get_printer_data(printer_name: str, printer_utils_cog) -> Optional[Pri
     return get_printer_data_dict(printer_data)
 
 
-async def get_camera_frame(printer_object: bl.Printer, printer_name: str) -> bool:
-    """Attempts to get a camera frame and save it to file."""
+async def get_camera_frame(printer_object: bl.Printer, printer_name: str) -> Optional[bytes]:
+    """
+    Attempts to get a camera frame, watermarked and encoded in memory for upload.
+
+    The frame is fetched on the printer I/O executor and stays base64 encoded
+    until it reaches the image process pool, which does all decoding, resizing
+    and encoding off the event loop.
+    """
     try:
-        printer_image = printer_object.get_camera_image()
+        frame_base64 = await run_printer_io(printer_object.get_camera_frame)
     except Exception: # pylint: disable=broad-exception-caught
         logger.warning("Printer: %s. Can't take a frame", printer_name)
-        return False
+        return None
 
-    printer_image.save(f"img/camera_frame_{printer_name}.png")
-    return True
+    percentage = printer_object.mqtt_client.dump().get("print", {}).get("mc_percent")
+    try:
+        return await run_image_task(
+            process_frame,
+            frame_base64,
+            FrameEncoderSettings(),
+            frame_watermark(printer_name, percentage)
+        )
+    except Exception: # pylint: disable=broad-exception-caught
+        logger.exception("Printer: %s. Can't encode the frame", printer_name)
+        return None
 
 
 async def get_cog(bot, name_of_cog: str) -> Optional[Any]:
@@ -56,12 +86,36 @@ async def get_cog(bot, name_of_cog: str) -> Optional[Any]:
     return printer_cog
 
 
-async def printer_error_handler(printer_object: bl.Printer) -> str:
-    """Returns a human-readable error message from the printer."""
-    error_code = printer_object.print_error_code()
-    if error_code == 0:
+async def resolve_printer(bot, printer_name: str) -> Optional[bl.Printer]:
+    """
+    Looks up the live connection of a printer at the moment it is needed.
+
+    UI components only store the printer name; the connection comes from the
+    pool of the PrinterUtils cog and is opened if the printer is known but not
+    connected right now.
+    """
+    printer_utils_cog = await get_cog(bot, "PrinterUtils")
+    if printer_utils_cog is None:
+        return None
+    printer: Optional[bl.Printer] = printer_utils_cog.pool.get(printer_name)
+    if printer is not None:
+        return printer
+
+    printer_data = await get_printer_data(printer_name, printer_utils_cog)
+    if printer_data is None:
+        return None
+    printer = await printer_utils_cog.pool.acquire(
+        printer_name=printer_name,
+        credentials=printer_data
+    )
+    return printer
+
+
+async def printer_error_handler(snapshot: PrinterSnapshot) -> str:
+    """Returns a human-readable error message from the printer snapshot."""
+    if snapshot.error_code == 0:
         return "No errors."
-    return f"Printer Error Code: {error_code}"
+    return f"Printer Error Code: {snapshot.error_code}"
 
 
 async def set_image_default_credentials_callback() -> ImageCredentials:
@@ -69,20 +123,66 @@ async def set_image_default_credentials_callback() -> ImageCredentials:
     return ImageCredentials()
 
 
-async def set_image_custom_credentials_callback(
+async def observe_camera_frame(
     printer_name: str, printer_object: bl.Printer
-) -> ImageCredentials:
-    """Generates custom image credentials after capturing a frame."""
-    image_filename = "camera_frame_.png"
-    delete_image_flag = False
+) -> Tuple[Optional[CachedFrame], Optional[bytes]]:
+    """
+    Takes a recent camera frame and compares it with the previous one of the printer.
+
+    Feeds `frame_diffs`, which tracks how long the camera has shown no visible
+    change. The signature is computed once per captured frame and kept in the
+    frame cache.
+
+    Returns:
+        Tuple[CachedFrame | None, bytes | None]: The frame and its signature,
+        None for what isn't available.
+    """
+    frame = await camera_frames.get(
+        printer_name,
+        lambda: get_camera_frame(printer_object, printer_name)
+    )
+    if frame is None:
+        return None, None
+
+    signature = frame.signature
+    if signature is None:
+        try:
+            signature = await run_image_task(frame_signature, frame.data)
+        except Exception: # pylint: disable=broad-exception-caught
+            logger.exception("Printer: %s. Can't compare the frame", printer_name)
+            return frame, None
+        camera_frames.set_signature(printer_name, frame, signature)
+    if not frame.stale:
+        frame_diffs.observe(printer_name, signature)
+    return frame, signature
+
 
-    if await get_camera_frame(printer_object, printer_name):
-        image_filename = f"camera_frame_{printer_name}.png"
-        delete_image_flag = True
+async def set_image_custom_credentials_callback(
+    printer_name: str, printer_object: bl.Printer, reuse_message_id: Optional[int] = None
+) -> ImageCredentials:
+    """
+    Generates custom image credentials from a recent camera frame.
+
+    Frames are shared through the frame cache, so requests for the same printer
+    within the cache TTL reuse one capture; a failed capture falls back to the
+    last good frame, whose age is then shown in the embed. If the frame barely
+    differs from the one last uploaded to the message `reuse_message_id`, that
+    upload is reused instead; without it the frame is always uploaded.
+    """
+    frame, signature = await observe_camera_frame(printer_name, printer_object)
+    if frame is None:
+        return ImageCredentials()
+
+    reuse_url: Optional[str] = None
+    if signature is not None and not frame.stale and reuse_message_id is not None:
+        reuse_url = frame_diffs.reusable_url(printer_name, reuse_message_id, signature)
 
     return ImageCredentials(
-        image_filename=image_filename,
-        delete_image_flag=delete_image_flag
+        image_filename=camera_frame_filename(printer_name, FrameEncoderSettings()),
+        image_data=frame.data,
+        frame_age=frame.age if frame.stale else None,
+        frame_signature=signature,
+        reuse_url=reuse_url
     )
 
 
@@ -96,59 +196,135 @@ async def finish_time_format(remaining_time) -> str:
 
 async def light_printer_check(printer: bl.Printer) -> bool:
     """Checks that light on the printer can turn on and off."""
-    def check_light(action_func, action_name):
-        if action_func():
+    async def check_light(action_func, action_name):
+        if await run_printer_io(action_func):
             logger.debug("Light %s successfully.", action_name)
             return True
         logger.error("Light NOT %s successfully.", action_name)
         return False
 
-    if not check_light(printer.turn_light_on, "turned on"):
+    if not await check_light(printer.turn_light_on, "turned on"):
         return False
 
     await asyncio.sleep(1)
 
-    if not check_light(printer.turn_light_off, "turned off"):
+    if not await check_light(printer.turn_light_off, "turned off"):
         return False
 
     return True
 
 
-async def backoff_checker(
+@dataclass
+class BackoffStats:
+    """Statistics of a single `backoff_checker` call."""
+    attempts: int = 0
+    total_wait: float = 0.0
+    elapsed: float = 0.0
+    succeeded: bool = False
+
+
+async def _attempt(action_func_callback: Callable[[], Any], run_in_thread: bool) -> Any:
+    """Runs one attempt; coroutine results are awaited, blocking calls can use a thread."""
+    if run_in_thread:
+        return await run_printer_io(action_func_callback)
+    result = action_func_callback()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def backoff_checker(  # pylint: disable=too-many-locals
     action_func_callback: Callable[[], Any],
     action_name: str,
     interval: float = 0.3,
     max_attempts: int = 5,
     exponential: int = 2,
-    success_condition: Callable[[Any], bool] = bool
+    success_condition: Callable[[Any], bool] = bool,
+    deadline: Optional[float] = None,
+    max_interval: Optional[float] = None,
+    jitter: bool = False,
+    run_in_thread: bool = False,
+    stats: Optional[BackoffStats] = None
 ) -> Optional[Any]:   # pylint: disable=too-many-arguments
-    """Performs an action with exponential backoff if it fails."""
-    for attempt in range(1, max_attempts + 1):
-        result = action_func_callback()
-
-        if success_condition(result):
-            logger.info("Successfully done %s", action_name)
-            return result
-
-        sleep_time = interval * math.pow(exponential, attempt - 1)
-        logger.info(
-            "Retrying to %s. Retry %d/%d. Sleeping %.1fs",
-            action_name, attempt, max_attempts, sleep_time
-        )
-        await asyncio.sleep(sleep_time)
-
-    logger.error("Could not perform %s after %d attempts.", action_name, max_attempts)
-    return None
+    """
+    Performs an action with exponential backoff if it fails.
+
+    Args:
+        action_func_callback (Callable[[], Any]): Sync function or coroutine function to call.
+        action_name (str): Description used in the log messages.
+        interval (float): Delay after the first failed attempt in seconds.
+        max_attempts (int): Maximum number of attempts.
+        exponential (int): Growth factor of the delay between attempts.
+        success_condition (Callable[[Any], bool]): Decides whether a result is a success.
+        deadline (float | None): Total time budget in seconds for all attempts and delays.
+        max_interval (float | None): Upper bound for a single delay.
+        jitter (bool): Use "full jitter" (a random delay between 0 and the computed one),
+            so many callers retrying at the same time don't hit the printers in lockstep.
+        run_in_thread (bool): Run a blocking callback on the printer I/O executor.
+        stats (BackoffStats | None): Filled with attempts, total wait and elapsed time.
+
+    Returns:
+        Any | None: The first successful result, or None when attempts or time ran out.
+    """
+    stats = stats if stats is not None else BackoffStats()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        for attempt in range(1, max_attempts + 1):
+            stats.attempts = attempt
+            remaining = None if deadline is None else deadline - (loop.time() - started)
+            try:
+                result = await asyncio.wait_for(
+                    _attempt(action_func_callback, run_in_thread),
+                    timeout=remaining
+                )
+            except asyncio.TimeoutError:
+                logger.error("Could not perform %s within %.1fs.", action_name, deadline)
+                return None
+
+            if success_condition(result):
+                stats.succeeded = True
+                logger.info("Successfully done %s", action_name)
+                return result
+
+            if attempt == max_attempts:
+                break
+
+            sleep_time = interval * math.pow(exponential, attempt - 1)
+            if max_interval is not None:
+                sleep_time = min(sleep_time, max_interval)
+            if jitter:
+                sleep_time = random.uniform(0, sleep_time)
+            if deadline is not None:
+                remaining = deadline - (loop.time() - started)
+                if remaining <= 0:
+                    logger.error("Could not perform %s within %.1fs.", action_name, deadline)
+                    return None
+                sleep_time = min(sleep_time, remaining)
+
+            logger.info(
+                "Retrying to %s. Retry %d/%d. Sleeping %.1fs",
+                action_name, attempt, max_attempts, sleep_time
+            )
+            await asyncio.sleep(sleep_time)
+            stats.total_wait += sleep_time
+
+        logger.error("Could not perform %s after %d attempts.", action_name, max_attempts)
+        return None
+    except asyncio.CancelledError:
+        logger.debug("Cancelled %s after %d attempt(s).", action_name, stats.attempts)
+        raise
+    finally:
+        stats.elapsed = loop.time() - started
+        logger.debug("%s: %d attempt(s), waited %.2fs, took %.2fs.",
+                     action_name, stats.attempts, stats.total_wait, stats.elapsed)
 
 def delete_printer(
     printer_name: str,
     printer_utils_cog) -> bool:
     """Delete the printer from the list of all printers"""
     logger.debug("Deleting printer: %s", printer_name)
-    try:
-        printer_utils_cog.connected_printers.pop(printer_name)
-        printer_utils_cog.storage.delete(printer_name)
-        return True
-    except KeyError:
+    if not printer_utils_cog.storage.delete(printer_name):
         logger.warning("printer is not in the list")
         return False
+    return True
@@ -0,0 +1,165 @@
+"""
+Shared pool of live printer connections.
+
+Every MQTT connection costs a full handshake and keeps two threads alive, so
+the monitor, /status and /check_connection share one connection per printer.
+The pool hands out the existing connection while it is healthy, makes sure
+only one connection attempt per printer runs at a time, and disconnects
+connections that were not used for a while.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import bambulabs_api as bl
+
+from .models import PrinterCredentials
+from .printer_connection import connect_to_printer
+from .printer_executor import printer_io, run_printer_io
+
+logger = logging.getLogger(__name__)
+
+# Seconds after which a connection that nobody used is disconnected
+PRINTER_POOL_IDLE_TIMEOUT = float(os.getenv("PRINTER_POOL_IDLE_TIMEOUT", "900"))
+
+
+def _same_credentials(first: PrinterCredentials, second: PrinterCredentials) -> bool:
+    """Compares credentials field by field (PrinterCredentials has no __eq__)."""
+    return (first.ip, first.access_code, first.serial) == (
+        second.ip, second.access_code, second.serial
+    )
+
+
+@dataclass
+class PooledConnection:
+    """A live printer connection and the credentials it was opened with."""
+    printer: bl.Printer
+    credentials: PrinterCredentials
+    last_used: float
+
+    def is_healthy(self) -> bool:
+        """Check that the MQTT client of the printer is still connected."""
+        return bool(self.printer.mqtt_client.is_connected())
+
+
+class PrinterConnectionPool:
+    """Keeps at most one live connection per printer name."""
+
+    def __init__(self, idle_timeout: float = PRINTER_POOL_IDLE_TIMEOUT):
+        """Create an empty pool."""
+        self.idle_timeout = idle_timeout
+        self._connections: Dict[str, PooledConnection] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def __contains__(self, printer_name: str) -> bool:
+        return printer_name in self._connections
+
+    def get(self, printer_name: str) -> Optional[bl.Printer]:
+        """Return the pooled printer if it is connected, without connecting."""
+        connection = self._connections.get(printer_name)
+        if connection is None or not connection.is_healthy():
+            return None
+        connection.last_used = time.monotonic()
+        return connection.printer
+
+    async def acquire(self,
+                      printer_name: str,
+                      credentials: PrinterCredentials) -> Optional[bl.Printer]:
+        """
+        Return a healthy connection to the printer, connecting if necessary.
+
+        Concurrent callers for the same printer wait for a single connection
+        attempt instead of opening their own.
+
+        Args:
+            printer_name (str): Name of the printer.
+            credentials (PrinterCredentials): Credentials used if a new connection is needed.
+
+        Returns:
+            bl.Printer | None: The connected printer, or None if it can't be reached.
+        """
+        printer = self._reuse(printer_name, credentials)
+        if printer is not None:
+            return printer
+
+        lock = self._locks.setdefault(printer_name, asyncio.Lock())
+        async with lock:
+            # Another caller may have connected while we were waiting for the lock
+            printer = self._reuse(printer_name, credentials)
+            if printer is not None:
+                return printer
+
+            stale = self._connections.pop(printer_name, None)
+            if stale is not None:
+                await self._disconnect(printer_name, stale.printer)
+
+            printer = await connect_to_printer(
+                printer_name=printer_name,
+                printer_data=credentials
+            )
+            if printer is None:
+                return None
+            self.adopt(printer_name=printer_name, printer=printer, credentials=credentials)
+            return printer
+
+    def adopt(self,
+              printer_name: str,
+              printer: bl.Printer,
+              credentials: PrinterCredentials) -> None:
+        """Put an already connected printer into the pool."""
+        previous = self._connections.get(printer_name)
+        if previous is not None and previous.printer is not printer:
+            printer_io.submit(previous.printer.disconnect)
+        self._connections[printer_name] = PooledConnection(
+            printer=printer,
+            credentials=credentials,
+            last_used=time.monotonic()
+        )
+
+    async def close(self, printer_name: str) -> None:
+        """Disconnect the printer and remove it from the pool."""
+        connection = self._connections.pop(printer_name, None)
+        if connection is not None:
+            await self._disconnect(printer_name, connection.printer)
+
+    async def close_all(self) -> None:
+        """Disconnect every pooled printer."""
+        await asyncio.gather(
+            *(self.close(printer_name) for printer_name in list(self._connections))
+        )
+
+    async def evict_idle(self) -> List[str]:
+        """Disconnect connections unused for longer than the idle timeout."""
+        now = time.monotonic()
+        idle = [
+            printer_name
+            for printer_name, connection in self._connections.items()
+            if now - connection.last_used > self.idle_timeout
+        ]
+        for printer_name in idle:
+            logger.info("Closing idle connection to `%s`.", printer_name)
+            await self.close(printer_name)
+        return idle
+
+    def _reuse(self, printer_name: str, credentials: PrinterCredentials) -> Optional[bl.Printer]:
+        """Return the pooled printer if it is healthy and uses the same credentials."""
+        connection = self._connections.get(printer_name)
+        if connection is None or not _same_credentials(connection.credentials, credentials):
+            return None
+        if not connection.is_healthy():
+            return None
+        connection.last_used = time.monotonic()
+        return connection.printer
+
+    @staticmethod
+    async def _disconnect(printer_name: str, printer: bl.Printer) -> None:
+        """Disconnect a printer, logging instead of raising on failure."""
+        try:
+            await run_printer_io(printer.disconnect)
+            logger.debug("Disconnected from `%s`.", printer_name)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Failed to disconnect from `%s`.", printer_name)
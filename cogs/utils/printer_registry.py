@@ -0,0 +1,242 @@
+"""
+SQLite backend of the printer registry.
+
+`SQLitePrinterStorage` offers the same interface as `PrinterStorage`, but
+keeps one row per printer in a SQLite database in WAL mode. Looking up,
+adding, renaming or deleting a printer touches a single row through the
+primary key, instead of rewriting the whole JSON file. Rows are also indexed
+by serial and by guild, and keep the last known state of the printer.
+
+On its first start the backend imports `data/printer.json` once; the JSON
+file is left as it is. Status message IDs stay in their JSON file; renaming
+or deleting a printer updates them inside the same transaction, which is
+rolled back if writing them fails.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterator, List, Mapping, Optional, Union, cast
+
+from .models import PrinterDataDict, PrinterStorage, StatusMessageStorage
+
+logger = logging.getLogger(__name__)
+
+# Backend of the printer registry: "json" (data/printer.json) or "sqlite"
+PRINTER_STORAGE_BACKEND = os.getenv("PRINTER_STORAGE_BACKEND", "json").lower()
+# Database file of the SQLite backend
+PRINTER_DB_PATH = os.getenv("PRINTER_DB_PATH", "data/printers.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS printers (
+    name TEXT PRIMARY KEY,
+    ip TEXT NOT NULL,
+    access_code TEXT NOT NULL,
+    serial TEXT NOT NULL,
+    guild_id INTEGER,
+    last_state TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS printers_serial ON printers (serial);
+CREATE INDEX IF NOT EXISTS printers_guild ON printers (guild_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class _PrinterTable(Mapping[str, PrinterDataDict]):
+    """Read-only mapping of printer names to credentials, queried row by row."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+
+    def __getitem__(self, printer_name: str) -> PrinterDataDict:
+        row = self._connection.execute(
+            "SELECT ip, access_code, serial FROM printers WHERE name = ?", (printer_name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(printer_name)
+        return {"ip": row[0], "access_code": row[1], "serial": row[2]}
+
+    def __contains__(self, printer_name: object) -> bool:
+        return self._connection.execute(
+            "SELECT 1 FROM printers WHERE name = ?", (printer_name,)
+        ).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._connection.execute("SELECT name FROM printers ORDER BY rowid").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return int(self._connection.execute("SELECT COUNT(*) FROM printers").fetchone()[0])
+
+
+class SQLitePrinterStorage:
+    """Keeps the printer registry in a SQLite database, one row per printer."""
+
+    def __init__(self,
+                 db_path: str = PRINTER_DB_PATH,
+                 json_path: Optional[str] = "data/printer.json",
+                 status_messages: Optional[StatusMessageStorage] = None):
+        """
+        Open the database, creating it if needed.
+
+        Args:
+            db_path (str): Path of the database file.
+            json_path (str | None): JSON registry imported on the first start.
+            status_messages (StatusMessageStorage | None): Message IDs moved
+                or cleared along with renamed or deleted printers.
+        """
+        self.path = Path(db_path)
+        self.status_messages = status_messages
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; statements that belong together run in an explicit transaction
+        self._connection = sqlite3.connect(self.path, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self._printers = _PrinterTable(self._connection)
+        if json_path is not None:
+            self._migrate_json(Path(json_path))
+
+    @property
+    def printers(self) -> Mapping[str, PrinterDataDict]:
+        """The registry, as a mapping that reads single rows on access."""
+        return self._printers
+
+    def load(self) -> dict[str, PrinterDataDict]:
+        """Return a copy of the whole printer registry."""
+        return dict(self._printers)
+
+    def save(self, data: Mapping[str, PrinterDataDict]) -> None:
+        """Replace the printer registry."""
+        with self._transaction():
+            self._connection.execute(
+                f"DELETE FROM printers WHERE name NOT IN ({', '.join('?' * len(data))})",
+                tuple(data)
+            )
+            for printer_name, printer_data in data.items():
+                self.set(printer_name, printer_data)
+
+    def set(self,
+            printer_name: str,
+            printer_data: PrinterDataDict,
+            guild_id: Optional[int] = None) -> None:
+        """Add or replace a printer; the guild and last state of a replaced one are kept."""
+        self._connection.execute(
+            "INSERT INTO printers (name, ip, access_code, serial, guild_id, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET ip = excluded.ip, "
+            "access_code = excluded.access_code, serial = excluded.serial, "
+            "guild_id = COALESCE(excluded.guild_id, guild_id), "
+            "updated_at = excluded.updated_at",
+            (printer_name, printer_data["ip"], printer_data["access_code"],
+             printer_data["serial"], guild_id, time.time())
+        )
+
+    def delete(self, printer_name_remove: str) -> bool:
+        """Remove a printer from the registry; False if it wasn't in it."""
+        with self._transaction():
+            cursor = self._connection.execute(
+                "DELETE FROM printers WHERE name = ?", (printer_name_remove,)
+            )
+            if self.status_messages is not None:
+                self.status_messages.delete(printer_name_remove)
+        return cursor.rowcount > 0
+
+    def rename(self, old_name: str, new_name: str, printer_data: PrinterDataDict) -> None:
+        """Store a printer under a new name (or the same) with new credentials."""
+        with self._transaction():
+            self._connection.execute(
+                "DELETE FROM printers WHERE name = ? AND name != ?", (new_name, old_name)
+            )
+            cursor = self._connection.execute(
+                "UPDATE printers SET name = ?, ip = ?, access_code = ?, serial = ?, "
+                "updated_at = ? WHERE name = ?",
+                (new_name, printer_data["ip"], printer_data["access_code"],
+                 printer_data["serial"], time.time(), old_name)
+            )
+            if cursor.rowcount == 0:
+                self.set(new_name, printer_data)
+            if self.status_messages is not None:
+                self.status_messages.rename(old_name, new_name)
+
+    def record_state(self, printer_name: str, state: str) -> None:
+        """Remember the last known gcode state of a printer."""
+        self._connection.execute(
+            "UPDATE printers SET last_state = ? WHERE name = ?", (state, printer_name)
+        )
+
+    def last_state(self, printer_name: str) -> Optional[str]:
+        """Return the last known gcode state of a printer."""
+        row = self._connection.execute(
+            "SELECT last_state FROM printers WHERE name = ?", (printer_name,)
+        ).fetchone()
+        return None if row is None else cast(Optional[str], row[0])
+
+    def find_by_serial(self, serial: str) -> Optional[str]:
+        """Return the name of the printer with this serial number."""
+        row = self._connection.execute(
+            "SELECT name FROM printers WHERE serial = ?", (serial,)
+        ).fetchone()
+        return None if row is None else str(row[0])
+
+    def printers_of_guild(self, guild_id: int) -> List[str]:
+        """Return the names of the printers added in a guild."""
+        rows = self._connection.execute(
+            "SELECT name FROM printers WHERE guild_id = ? ORDER BY rowid", (guild_id,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def flush(self) -> None:
+        """Nothing to do; every change is committed when it is made."""
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+    def _transaction(self) -> sqlite3.Connection:
+        """Run the statements of a `with` block in one transaction."""
+        self._connection.execute("BEGIN")
+        return self._connection
+
+    def _migrate_json(self, json_path: Path) -> None:
+        """Import the JSON registry once, on the first start of the database."""
+        migrated = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'migrated_json'"
+        ).fetchone()
+        if migrated is not None:
+            return
+
+        printers: dict[str, PrinterDataDict] = {}
+        if json_path.exists():
+            with open(json_path, encoding="utf-8") as f:
+                printers = cast(dict[str, PrinterDataDict], json.load(f))
+        with self._transaction():
+            for printer_name, printer_data in printers.items():
+                self.set(printer_name, printer_data)
+            self._connection.execute(
+                "INSERT INTO meta (key, value) VALUES ('migrated_json', ?)", (str(json_path),)
+            )
+        if printers:
+            logger.info("Imported %d printer(s) from `%s` into `%s`.",
+                        len(printers), json_path, self.path)
+
+
+PrinterRegistry = Union[PrinterStorage, SQLitePrinterStorage]
+
+
+def open_printer_storage(backend: str = PRINTER_STORAGE_BACKEND,
+                         status_messages: Optional[StatusMessageStorage] = None
+                         ) -> PrinterRegistry:
+    """Open the printer registry with the configured backend."""
+    if backend == "sqlite":
+        return SQLitePrinterStorage(status_messages=status_messages)
+    if backend != "json":
+        logger.warning("Unknown printer storage backend `%s`, using json.", backend)
+    return PrinterStorage(status_messages=status_messages)
@@ -0,0 +1,138 @@
+"""
+Per-printer reconnect scheduling with a circuit breaker.
+
+A powered-off printer would otherwise cost a full connection attempt on every
+monitor tick. After `RECONNECT_FAILURE_THRESHOLD` consecutive failures the
+printer's circuit opens: the monitor skips it, and a background probe retries
+on a jittered exponential backoff until the printer answers again.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, Dict, Optional
+
+from .enums import CircuitState
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failed connection attempts before the circuit of a printer opens
+RECONNECT_FAILURE_THRESHOLD = int(os.getenv("RECONNECT_FAILURE_THRESHOLD", "3"))
+# Delay in seconds before the first background probe of an open circuit
+RECONNECT_BASE_DELAY = float(os.getenv("RECONNECT_BASE_DELAY", "30"))
+# Upper bound in seconds for the delay between background probes
+RECONNECT_MAX_DELAY = float(os.getenv("RECONNECT_MAX_DELAY", "900"))
+
+
+@dataclass
+class PrinterCircuit:
+    """Reconnect bookkeeping of a single printer."""
+    state: CircuitState = CircuitState.CLOSED
+    failures: int = 0
+    opened_at: Optional[float] = None
+    next_probe_at: Optional[float] = None
+
+
+class ReconnectScheduler:
+    """Tracks connection failures per printer and probes open circuits in the background."""
+
+    def __init__(self,
+                 probe_callback: Callable[[str], Awaitable[bool]],
+                 failure_threshold: int = RECONNECT_FAILURE_THRESHOLD,
+                 base_delay: float = RECONNECT_BASE_DELAY,
+                 max_delay: float = RECONNECT_MAX_DELAY):
+        """
+        Create the scheduler.
+
+        Args:
+            probe_callback (Callable[[str], Awaitable[bool]]): Tries to reconnect the
+                named printer and returns True on success.
+            failure_threshold (int): Consecutive failures before the circuit opens.
+            base_delay (float): Delay before the first probe in seconds.
+            max_delay (float): Maximum delay between probes in seconds.
+        """
+        self._probe_callback = probe_callback
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._circuits: Dict[str, PrinterCircuit] = {}
+        self._probes: Dict[str, asyncio.Task[None]] = {}
+
+    def is_open(self, printer_name: str) -> bool:
+        """Return True if normal connection attempts should skip this printer."""
+        circuit = self._circuits.get(printer_name)
+        return circuit is not None and circuit.state is not CircuitState.CLOSED
+
+    def circuits(self) -> Dict[str, PrinterCircuit]:
+        """Return a copy of the circuit of every printer that has one."""
+        return {name: replace(circuit) for name, circuit in self._circuits.items()}
+
+    def record_success(self, printer_name: str) -> None:
+        """Close the circuit of a printer that connected successfully."""
+        circuit = self._circuits.pop(printer_name, None)
+        if circuit is not None and circuit.state is not CircuitState.CLOSED:
+            logger.info("Circuit of `%s` closed.", printer_name)
+        self._cancel_probe(printer_name)
+
+    def record_failure(self, printer_name: str) -> None:
+        """Count a failed connection attempt and open the circuit past the threshold."""
+        circuit = self._circuits.setdefault(printer_name, PrinterCircuit())
+        circuit.failures += 1
+        if circuit.state is CircuitState.CLOSED and circuit.failures >= self.failure_threshold:
+            circuit.state = CircuitState.OPEN
+            circuit.opened_at = time.time()
+            logger.warning("Circuit of `%s` opened after %d failures.",
+                           printer_name, circuit.failures)
+            self._probes[printer_name] = asyncio.create_task(
+                self._probe_loop(printer_name),
+                name=f"printer-reconnect-{printer_name}"
+            )
+
+    def forget(self, printer_name: str) -> None:
+        """Drop all reconnect state of a printer (e.g. after it was deleted)."""
+        self._circuits.pop(printer_name, None)
+        self._cancel_probe(printer_name)
+
+    def close(self) -> None:
+        """Cancel all background probes."""
+        for printer_name in list(self._probes):
+            self._cancel_probe(printer_name)
+
+    def next_delay(self, failures: int) -> float:
+        """Exponential backoff with jitter, so probes of many printers don't align."""
+        exponent = max(0, failures - self.failure_threshold)
+        delay = min(self.max_delay, self.base_delay * 2.0 ** exponent)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _cancel_probe(self, printer_name: str) -> None:
+        probe = self._probes.pop(printer_name, None)
+        if probe is not None and probe is not asyncio.current_task():
+            probe.cancel()
+
+    async def _probe_loop(self, printer_name: str) -> None:
+        """Retry the printer in the background until it connects or is forgotten."""
+        while True:
+            circuit = self._circuits.get(printer_name)
+            if circuit is None:
+                return
+            delay = self.next_delay(circuit.failures)
+            circuit.next_probe_at = time.time() + delay
+            await asyncio.sleep(delay)
+
+            circuit.state = CircuitState.HALF_OPEN
+            try:
+                connected = await self._probe_callback(printer_name)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Reconnect probe of `%s` failed.", printer_name)
+                connected = False
+
+            if connected:
+                self.record_success(printer_name)
+                return
+            circuit.failures += 1
+            circuit.state = CircuitState.OPEN
+            logger.info("Reconnect probe of `%s` failed (%d failures).",
+                        printer_name, circuit.failures)
@@ -0,0 +1,145 @@
+"""
+Immutable telemetry snapshot of a printer.
+
+The getters of `bl.Printer` each read the live MQTT state, which the MQTT
+thread keeps updating; an embed built from fifteen getter calls can show a
+percentage from one report and a layer from the next. A `PrinterSnapshot`
+copies the last report once and exposes the same values, so everything
+rendered from it is consistent. Snapshots compare field by field, which tells
+a caller whether anything visible changed since the last render.
+"""
+
+import time
+from typing import Any, Dict, FrozenSet, Optional, Union
+
+import bambulabs_api as bl
+from bambulabs_api.states_info import GcodeState
+
+
+def _as_float(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_int(value: Any, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _chamber_temperature(report: Dict[str, Any]) -> float:
+    """Chamber temperature, read from the CTC device on printers that report it there."""
+    if report.get("chamber_temper") is not None:
+        return _as_float(report["chamber_temper"])
+    device = report.get("device")
+    ctc = device.get("ctc") if isinstance(device, dict) else None
+    info = ctc.get("info") if isinstance(ctc, dict) else None
+    return _as_float(info.get("temp")) if isinstance(info, dict) else 0.0
+
+
+def _gcode_state(value: Any) -> GcodeState:
+    try:
+        return GcodeState(value)
+    except ValueError:
+        return GcodeState.UNKNOWN
+
+
+class PrinterSnapshot:  # pylint: disable=too-many-instance-attributes
+    """Read-only telemetry of a printer, taken from one MQTT report."""
+
+    __slots__ = (
+        "state",
+        "remaining_time",
+        "percentage",
+        "layer",
+        "total_layers",
+        "print_speed",
+        "light_state",
+        "bed_temperature",
+        "nozzle_temperature",
+        "chamber_temperature",
+        "part_fan_speed",
+        "aux_fan_speed",
+        "chamber_fan_speed",
+        "error_code",
+        "captured_at",
+    )
+    # Fields compared by `diff`; the capture time is not part of the telemetry
+    FIELDS = __slots__[:-1]
+
+    state: GcodeState
+    remaining_time: Optional[Union[int, str]]
+    percentage: Optional[Union[int, str]]
+    layer: int
+    total_layers: int
+    print_speed: int
+    light_state: str
+    bed_temperature: float
+    nozzle_temperature: float
+    chamber_temperature: float
+    part_fan_speed: int
+    aux_fan_speed: int
+    chamber_fan_speed: int
+    error_code: int
+    captured_at: float
+
+    def __init__(self, **fields: Any):
+        """Create a snapshot from keyword arguments named like its fields."""
+        fields.setdefault("captured_at", time.time())
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PrinterSnapshot):
+            return NotImplemented
+        return not self.diff(other)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.FIELDS))
+
+    def __repr__(self) -> str:
+        return (f"PrinterSnapshot(state={self.state.name}, percentage={self.percentage}, "
+                f"layer={self.layer}/{self.total_layers})")
+
+    @classmethod
+    def from_report(cls, report: Dict[str, Any]) -> "PrinterSnapshot":
+        """Build a snapshot from the `print` section of an MQTT report."""
+        fan_gear = _as_int(report.get("fan_gear"))
+        lights = report.get("lights_report") or []
+        return cls(
+            state=_gcode_state(report.get("gcode_state", -1)),
+            remaining_time=report.get("mc_remaining_time"),
+            percentage=report.get("mc_percent"),
+            layer=_as_int(report.get("layer_num")),
+            total_layers=_as_int(report.get("total_layer_num")),
+            print_speed=_as_int(report.get("spd_mag"), 100),
+            light_state=str(lights[0].get("mode", "unknown")) if lights else "unknown",
+            bed_temperature=_as_float(report.get("bed_temper")),
+            nozzle_temperature=_as_float(report.get("nozzle_temper")),
+            chamber_temperature=_chamber_temperature(report),
+            part_fan_speed=fan_gear % 256,
+            aux_fan_speed=(fan_gear >> 8) % 256,
+            chamber_fan_speed=fan_gear >> 16,
+            error_code=_as_int(report.get("print_error"))
+        )
+
+    @classmethod
+    def capture(cls, printer: bl.Printer) -> "PrinterSnapshot":
+        """Snapshot the last report of a printer without sending it a request."""
+        # Copied first, the MQTT thread replaces keys of this dict while we read it
+        report = dict(printer.mqtt_client.dump().get("print", {}))
+        return cls.from_report(report)
+
+    def diff(self, other: Optional["PrinterSnapshot"]) -> FrozenSet[str]:
+        """Return the names of the fields that differ from `other` (all if None)."""
+        if other is None:
+            return frozenset(self.FIELDS)
+        return frozenset(
+            name for name in self.FIELDS if getattr(self, name) != getattr(other, name)
+        )
@@ -0,0 +1,392 @@
+"""
+Telemetry history of every printer, in compact fixed-size ring buffers.
+
+Each monitor check feeds a `PrinterSnapshot` into the recorder. The samples
+are kept in three tiers per printer: the raw samples, one-minute averages and
+fifteen-minute averages. Every tier is a ring buffer of `array` columns (one
+timestamp column and one float column per metric) allocated once at full
+size, so memory per printer is fixed no matter how long the bot runs.
+
+Fifteen-minute averages are built from the closed one-minute averages, so
+live samples and restored history weigh the same. One-minute averages are
+buffered and appended to a binary file per printer, fixed-size records
+written append-only in a worker thread, and read back by `load` to restore
+the minute and quarter-hour tiers. The file is compacted on load once it
+holds more than the retention window.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import re
+import struct
+import time
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .snapshot import PrinterSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Directory of the per-printer telemetry history files
+TELEMETRY_DIR = os.getenv("TELEMETRY_DIR", "data/telemetry")
+# Number of raw samples kept per printer
+TELEMETRY_RAW_SAMPLES = int(os.getenv("TELEMETRY_RAW_SAMPLES", "720"))
+# Number of one-minute averages kept per printer (default one day)
+TELEMETRY_MINUTE_SAMPLES = int(os.getenv("TELEMETRY_MINUTE_SAMPLES", "1440"))
+# Number of fifteen-minute averages kept per printer (default 30 days)
+TELEMETRY_QUARTER_SAMPLES = int(os.getenv("TELEMETRY_QUARTER_SAMPLES", "2880"))
+# Seconds closed one-minute averages are buffered before they are written to disk
+TELEMETRY_FLUSH_DELAY = float(os.getenv("TELEMETRY_FLUSH_DELAY", "30"))
+
+# Telemetry fields of a snapshot recorded as time series
+METRICS: Tuple[str, ...] = (
+    "nozzle_temperature",
+    "bed_temperature",
+    "chamber_temperature",
+    "chamber_fan_speed",
+    "part_fan_speed",
+    "aux_fan_speed",
+    "layer",
+    "percentage",
+)
+
+# Timestamp and one 32-bit float per metric
+_RECORD = struct.Struct(f"<d{len(METRICS)}f")
+_MINUTE = 60.0
+_QUARTER = 900.0
+
+
+def _append_records(path: Path, records: List[Tuple[float, ...]]) -> None:
+    """Append one-minute averages to a history file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(b"".join(_RECORD.pack(*record) for record in records))
+
+
+def _write_pending(pending: Dict[Path, List[Tuple[float, ...]]]) -> None:
+    """Append the buffered records of every history file; a failing file doesn't stop the rest."""
+    for path, records in pending.items():
+        try:
+            _append_records(path, records)
+        except OSError:
+            logger.exception("Failed to append telemetry to `%s`.", path)
+
+
+def _read_records(path: Path, retention: float) -> List[Tuple[float, ...]]:
+    """Read the records of a history file since `retention` and compact the file if needed."""
+    if not path.exists():
+        return []
+    data = path.read_bytes()
+    # A record cut short by a crash is dropped
+    usable = len(data) - len(data) % _RECORD.size
+    records = [
+        record for record in _RECORD.iter_unpack(data[:usable]) if record[0] >= retention
+    ]
+    if len(records) * _RECORD.size < len(data):
+        temp_path = path.with_name(f".{path.name}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(b"".join(_RECORD.pack(*record) for record in records))
+        os.replace(temp_path, path)
+        logger.debug("Compacted telemetry file `%s` to %d record(s).", path, len(records))
+    return records
+
+
+def _metric_value(value: Any) -> float:
+    """A metric as float; NaN for values the printer didn't report, e.g. "-"."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class RingSeries:
+    """A fixed number of samples of all metrics, oldest overwritten first."""
+
+    def __init__(self, capacity: int):
+        """Allocate room for `capacity` samples."""
+        self.capacity = max(1, capacity)
+        self.timestamps = array("d", bytes(8 * self.capacity))
+        self.values = {metric: array("f", bytes(4 * self.capacity)) for metric in METRICS}
+        self._next = 0
+        self.size = 0
+
+    def append(self, timestamp: float, values: Tuple[float, ...]) -> None:
+        """Store a sample, replacing the oldest one when full."""
+        self.timestamps[self._next] = timestamp
+        for metric, value in zip(METRICS, values):
+            self.values[metric][self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    @property
+    def oldest(self) -> Optional[float]:
+        """Timestamp of the oldest sample, None if empty."""
+        if self.size == 0:
+            return None
+        return self.timestamps[(self._next - self.size) % self.capacity]
+
+    def samples(self, metric: str, since: float = 0.0) -> Tuple[List[float], List[float]]:
+        """Return the timestamps and values of a metric since `since`, oldest first."""
+        start = (self._next - self.size) % self.capacity
+        order = [(start + offset) % self.capacity for offset in range(self.size)]
+        column = self.values[metric]
+        timestamps: List[float] = []
+        values: List[float] = []
+        for index in order:
+            if self.timestamps[index] >= since:
+                timestamps.append(self.timestamps[index])
+                values.append(column[index])
+        return timestamps, values
+
+    @property
+    def nbytes(self) -> int:
+        """Memory taken by the columns."""
+        return (self.timestamps.itemsize * len(self.timestamps)
+                + sum(column.itemsize * len(column) for column in self.values.values()))
+
+
+@dataclass
+class _Bucket:
+    """Running sums of the samples of one downsampling interval."""
+    start: float
+    sums: List[float] = field(default_factory=lambda: [0.0] * len(METRICS))
+    counts: List[int] = field(default_factory=lambda: [0] * len(METRICS))
+
+    def add(self, values: Tuple[float, ...]) -> None:
+        """Add a sample; NaN values are left out of the average."""
+        for index, value in enumerate(values):
+            if not math.isnan(value):
+                self.sums[index] += value
+                self.counts[index] += 1
+
+    def average(self) -> Tuple[float, ...]:
+        """Average of every metric, NaN if it had no values."""
+        return tuple(
+            total / count if count else math.nan
+            for total, count in zip(self.sums, self.counts)
+        )
+
+
+class _Downsampler:  # pylint: disable=too-few-public-methods
+    """Averages samples into fixed intervals and appends each closed interval to a series."""
+
+    def __init__(self, interval: float, series: RingSeries):
+        self.interval = interval
+        self.series = series
+        self._bucket: Optional[_Bucket] = None
+
+    def add(self, timestamp: float, values: Tuple[float, ...]) -> Optional[Tuple[float, ...]]:
+        """Add a sample; returns the closed interval (start, averages...) if one closed."""
+        start = timestamp - timestamp % self.interval
+        closed = None
+        if self._bucket is not None and self._bucket.start != start:
+            closed = (self._bucket.start, *self._bucket.average())
+            self.series.append(self._bucket.start, closed[1:])
+            self._bucket = None
+        if self._bucket is None:
+            self._bucket = _Bucket(start=start)
+        self._bucket.add(values)
+        return closed
+
+
+class PrinterTelemetry:  # pylint: disable=too-few-public-methods
+    """The three tiers of one printer and the downsampling between them."""
+
+    def __init__(self, raw_capacity: int, minute_capacity: int, quarter_capacity: int):
+        """Allocate the tiers with the given number of samples each."""
+        self.raw = RingSeries(raw_capacity)
+        self.minutes = RingSeries(minute_capacity)
+        self.quarters = RingSeries(quarter_capacity)
+        self._to_minutes = _Downsampler(_MINUTE, self.minutes)
+        self._to_quarters = _Downsampler(_QUARTER, self.quarters)
+        # Bumped on every change, so renderings of the history can be cached
+        self.version = 0
+
+    def add(self, timestamp: float, values: Tuple[float, ...]) -> Optional[Tuple[float, ...]]:
+        """Add a raw sample; returns the one-minute average it closed, if any."""
+        self.raw.append(timestamp, values)
+        self.version += 1
+        closed_minute = self._to_minutes.add(timestamp, values)
+        if closed_minute is not None:
+            self._to_quarters.add(closed_minute[0], closed_minute[1:])
+        return closed_minute
+
+    def restore_minute(self, timestamp: float, values: Tuple[float, ...]) -> None:
+        """Add a persisted one-minute average to the minute and quarter-hour tiers."""
+        self.minutes.append(timestamp, values)
+        self._to_quarters.add(timestamp, values)
+        self.version += 1
+
+    @property
+    def tiers(self) -> Tuple[RingSeries, ...]:
+        """The tiers from the finest to the coarsest."""
+        return (self.raw, self.minutes, self.quarters)
+
+
+class TelemetryRecorder:  # pylint: disable=too-many-instance-attributes
+    """Records the telemetry of all printers and persists the one-minute history."""
+
+    def __init__(self,
+                 directory: Optional[str] = TELEMETRY_DIR,
+                 raw_capacity: int = TELEMETRY_RAW_SAMPLES,
+                 minute_capacity: int = TELEMETRY_MINUTE_SAMPLES,
+                 quarter_capacity: int = TELEMETRY_QUARTER_SAMPLES,
+                 flush_delay: float = TELEMETRY_FLUSH_DELAY):
+        """
+        Create the recorder.
+
+        Args:
+            directory (str | None): Where the history files go; None keeps memory only.
+            raw_capacity (int): Raw samples kept per printer.
+            minute_capacity (int): One-minute averages kept per printer.
+            quarter_capacity (int): Fifteen-minute averages kept per printer.
+            flush_delay (float): Seconds closed one-minute averages wait before being written.
+        """
+        self.directory = Path(directory) if directory is not None else None
+        self.raw_capacity = raw_capacity
+        self.minute_capacity = minute_capacity
+        self.quarter_capacity = quarter_capacity
+        self.flush_delay = flush_delay
+        self._printers: Dict[str, PrinterTelemetry] = {}
+        self._pending: Dict[Path, List[Tuple[float, ...]]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        # Keeps appends and compaction of the history files apart
+        self._file_lock = asyncio.Lock()
+
+    def record(self, printer_name: str, snapshot: PrinterSnapshot) -> None:
+        """Add the telemetry of a snapshot to the history of a printer."""
+        values = tuple(_metric_value(getattr(snapshot, metric)) for metric in METRICS)
+        closed_minute = self._history(printer_name).add(snapshot.captured_at, values)
+        path = self._history_path(printer_name)
+        if closed_minute is not None and path is not None:
+            self._pending.setdefault(path, []).append(closed_minute)
+            self._schedule_flush()
+
+    async def load(self, printer_name: str) -> None:
+        """
+        Restore the one-minute history of a printer from its file.
+
+        Does nothing once the printer has a history in memory, so it is cheap
+        to call before every use. The file is read in a worker thread.
+        """
+        path = self._history_path(printer_name)
+        if printer_name in self._printers or path is None:
+            return
+        retention = time.time() - self.quarter_capacity * _QUARTER
+        async with self._file_lock:
+            try:
+                records = await asyncio.to_thread(_read_records, path, retention)
+            except OSError:
+                logger.exception("Failed to read the telemetry of `%s` from `%s`.",
+                                 printer_name, path)
+                records = []
+        if printer_name in self._printers:
+            # Samples arrived while the file was read; they are newer than the file
+            logger.debug("Telemetry of `%s` was recorded during the load, file not restored.",
+                         printer_name)
+            return
+        if not records:
+            return
+        history = self._history(printer_name)
+        for record in records:
+            history.restore_minute(record[0], record[1:])
+
+    async def flush(self) -> None:
+        """Write the buffered one-minute averages to disk now."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        async with self._file_lock:
+            await asyncio.to_thread(_write_pending, pending)
+
+    async def close(self) -> None:
+        """Write the buffered history before shutdown."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
+
+    def series(self,
+               printer_name: str,
+               metric: str,
+               since: float) -> Tuple[List[float], List[float]]:
+        """
+        Return the timestamps and values of a metric since `since`.
+
+        The finest tier that reaches back to `since` is used, e.g. raw samples
+        for the last hour and fifteen-minute averages for the last week.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric `{metric}`")
+        # A lookup of an unknown name (e.g. a typo) must not add an empty history
+        history = self._printers.get(printer_name)
+        if history is None:
+            return [], []
+        tiers = history.tiers
+        covering = [tier for tier in tiers if tier.oldest is not None and tier.oldest <= since]
+        if covering:
+            return covering[0].samples(metric, since)
+        filled = [tier for tier in tiers if tier.oldest is not None]
+        if not filled:
+            return [], []
+        # Nothing reaches back far enough; use the tier with the longest history
+        return min(filled, key=lambda tier: tier.oldest or 0.0).samples(metric, since)
+
+    def version(self, printer_name: str) -> int:
+        """Change counter of the history of a printer, 0 if nothing was recorded."""
+        history = self._printers.get(printer_name)
+        return history.version if history is not None else 0
+
+    def discard(self, printer_name: str) -> None:
+        """Drop the in-memory history of a printer; its file is kept."""
+        self._printers.pop(printer_name, None)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory taken by the ring buffers of all printers."""
+        return sum(
+            tier.nbytes for history in self._printers.values() for tier in history.tiers
+        )
+
+    def _history(self, printer_name: str) -> PrinterTelemetry:
+        """The in-memory history of a printer, created empty on first use."""
+        history = self._printers.get(printer_name)
+        if history is None:
+            history = self._printers[printer_name] = PrinterTelemetry(
+                self.raw_capacity, self.minute_capacity, self.quarter_capacity
+            )
+        return history
+
+    def _history_path(self, printer_name: str) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        # The checksum keeps names that only differ in special characters apart
+        safe_name = re.sub(r"[^A-Za-z0-9_-]", "_", printer_name)
+        return self.directory / f"{safe_name}-{zlib.crc32(printer_name.encode()):08x}.bin"
+
+    def _schedule_flush(self) -> None:
+        """Flush after the delay, or right away if there is no event loop to wait on."""
+        if self._flush_handle is not None:
+            return
+        try:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.flush_delay, self._flush_later
+            )
+        except RuntimeError:
+            pending, self._pending = self._pending, {}
+            _write_pending(pending)
+
+    def _flush_later(self) -> None:
+        self._flush_handle = None
+        self._flush_task = asyncio.create_task(self.flush(), name="telemetry-flush")
+
+
+telemetry = TelemetryRecorder()
@@ -0,0 +1,297 @@
+"""
+Optional timelapse recording of running prints.
+
+While a printer is RUNNING, camera frames are captured on a fixed interval
+(or once per layer), scaled down to the size of the GIF and written into a
+bounded ring buffer of files on disk, so a long print never holds more than
+`TIMELAPSE_MAX_FRAMES` frames. When the print
+finishes or fails, the frames are streamed one by one into an animated GIF
+that fits the Discord upload limit and posted to the status channel.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import bambulabs_api as bl
+from PIL import GifImagePlugin, Image
+
+from .image_executor import run_image_task
+from .image_pipeline import FrameEncoderSettings, encode_thumbnail
+from .printer_helpers import get_camera_frame
+
+logger = logging.getLogger(__name__)
+
+# Record a timelapse of every print (true/false)
+TIMELAPSE_ENABLED = os.getenv("TIMELAPSE_ENABLED", "false").lower() in ("1", "true", "yes")
+# Seconds between timelapse frames; 0 captures one frame per layer instead
+TIMELAPSE_INTERVAL = float(os.getenv("TIMELAPSE_INTERVAL", "60"))
+# Seconds between layer checks when capturing one frame per layer
+TIMELAPSE_LAYER_POLL = float(os.getenv("TIMELAPSE_LAYER_POLL", "5"))
+# Frames kept per print; older frames are overwritten
+TIMELAPSE_MAX_FRAMES = int(os.getenv("TIMELAPSE_MAX_FRAMES", "300"))
+# Directory holding the frames of the prints being recorded
+TIMELAPSE_DIR = os.getenv("TIMELAPSE_DIR", "data/timelapse")
+# Maximum size in bytes of the rendered timelapse (Discord upload limit)
+TIMELAPSE_MAX_BYTES = int(os.getenv("TIMELAPSE_MAX_BYTES", str(8 * 1024 * 1024)))
+# Display time of a single timelapse frame in milliseconds
+TIMELAPSE_FRAME_DURATION = int(os.getenv("TIMELAPSE_FRAME_DURATION", "100"))
+# Longest side in pixels of timelapse frames
+TIMELAPSE_MAX_DIMENSION = int(os.getenv("TIMELAPSE_MAX_DIMENSION", "480"))
+
+# Encoding attempts with fewer frames or a smaller size before giving up
+_RENDER_ATTEMPTS = 4
+# Below this many frames the size is reduced instead of dropping more frames
+_MIN_RENDER_FRAMES = 60
+
+
+class FrameRingBuffer:
+    """Fixed number of frame slots on disk, overwritten oldest first."""
+
+    def __init__(self, directory: Path, capacity: int = TIMELAPSE_MAX_FRAMES):
+        """Create the buffer; the directory is created on the first frame."""
+        self.directory = directory
+        self.capacity = max(1, capacity)
+        self._written = 0
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    def append(self, frame: bytes) -> None:
+        """Write a frame into the next slot (blocking file I/O)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slot = self._written % self.capacity
+        self._slot_path(slot).write_bytes(frame)
+        self._written += 1
+
+    def paths(self) -> List[Path]:
+        """Return the frame files from the oldest to the newest."""
+        if self._written <= self.capacity:
+            slots = list(range(self._written))
+        else:
+            start = self._written % self.capacity
+            slots = [(start + offset) % self.capacity for offset in range(self.capacity)]
+        return [self._slot_path(slot) for slot in slots]
+
+    def _slot_path(self, slot: int) -> Path:
+        return self.directory / f"frame_{slot:05d}.{FrameEncoderSettings().extension}"
+
+
+def _write_gif(frame_paths: List[str],
+               output_path: str,
+               frame_duration: int,
+               max_dimension: int) -> int:
+    """Streams the frames into an animated GIF, one frame in memory at a time."""
+    with open(output_path, "wb") as output:
+        for index, frame_path in enumerate(frame_paths):
+            with Image.open(frame_path) as frame:
+                frame.thumbnail((max_dimension, max_dimension))
+                palette_frame = frame.convert("RGB").quantize(colors=256)
+            if index == 0:
+                header, _ = GifImagePlugin.getheader(palette_frame, info={"loop": 0})
+                output.writelines(header)
+            output.writelines(GifImagePlugin.getdata(
+                palette_frame,
+                duration=frame_duration,
+                include_color_table=True
+            ))
+        output.write(b";")
+        return output.tell()
+
+
+def render_timelapse(frame_paths: List[str],
+                     output_path: str,
+                     max_bytes: int = TIMELAPSE_MAX_BYTES,
+                     frame_duration: int = TIMELAPSE_FRAME_DURATION,
+                     max_dimension: int = TIMELAPSE_MAX_DIMENSION) -> Optional[int]:
+    """
+    Renders the frames into an animated GIF no larger than `max_bytes`.
+
+    A render that is too large is retried with every n-th frame, and once few
+    frames are left, with a smaller size.
+
+    Args:
+        frame_paths (List[str]): Frame files from the oldest to the newest.
+        output_path (str): Where the GIF is written.
+        max_bytes (int): Maximum file size.
+        frame_duration (int): Display time of a frame in milliseconds.
+        max_dimension (int): Longest side of a frame in pixels.
+
+    Returns:
+        int | None: Size of the written file, or None if it can't be made small enough.
+    """
+    stride = 1
+    for _ in range(_RENDER_ATTEMPTS):
+        size = _write_gif(frame_paths[::stride], output_path, frame_duration, max_dimension)
+        if size <= max_bytes:
+            return size
+
+        ratio = size / max_bytes
+        if len(frame_paths) // stride > _MIN_RENDER_FRAMES:
+            stride *= math.ceil(ratio)
+        else:
+            max_dimension = int(max_dimension / math.sqrt(ratio) * 0.9)
+
+    os.remove(output_path)
+    return None
+
+
+def _recording_directory(printer_name: str) -> Path:
+    return Path(TIMELAPSE_DIR, re.sub(r"[^A-Za-z0-9_-]", "_", printer_name))
+
+
+class TimelapseRecorder:
+    """Records one timelapse per printer while it prints."""
+
+    def __init__(self,
+                 printer_lookup: Callable[[str], Optional[bl.Printer]],
+                 interval: float = TIMELAPSE_INTERVAL,
+                 max_frames: int = TIMELAPSE_MAX_FRAMES):
+        """
+        Create the recorder.
+
+        Args:
+            printer_lookup (Callable[[str], bl.Printer | None]): Returns the current
+                connection of a printer, e.g. `PrinterConnectionPool.get`, so a
+                reconnect during the print doesn't end the recording.
+            interval (float): Seconds between frames, 0 for one frame per layer.
+            max_frames (int): Capacity of the ring buffer of each print.
+        """
+        self._printer_lookup = printer_lookup
+        self.interval = interval
+        self.max_frames = max_frames
+        self._recordings: Dict[str, Tuple[FrameRingBuffer, asyncio.Task[None]]] = {}
+        # Recordings that are being rendered or uploaded and must not be purged
+        self._finishing: Set[Path] = set()
+
+    def is_recording(self, printer_name: str) -> bool:
+        """Return True while frames of the printer are captured."""
+        return printer_name in self._recordings
+
+    async def start(self, printer_name: str) -> None:
+        """Start recording a print, unless it is already being recorded."""
+        if printer_name in self._recordings:
+            return
+        directory = _recording_directory(printer_name)
+        # Leftovers of recordings that were never finished, e.g. after a restart
+        await asyncio.to_thread(self._purge, directory)
+        if printer_name in self._recordings:
+            return
+
+        buffer = FrameRingBuffer(directory / str(int(time.time())), self.max_frames)
+        task = asyncio.create_task(
+            self._record(printer_name, buffer),
+            name=f"timelapse-{printer_name}"
+        )
+        self._recordings[printer_name] = (buffer, task)
+        logger.info("Recording a timelapse of `%s`.", printer_name)
+
+    async def finish(self,
+                     printer_name: str,
+                     deliver: Callable[[Path], Awaitable[None]]) -> bool:
+        """
+        Stop recording, render the timelapse and hand it to `deliver`.
+
+        The frames and the rendered file are deleted afterwards.
+
+        Returns:
+            bool: True if a timelapse was rendered and delivered.
+        """
+        recording = self._recordings.pop(printer_name, None)
+        if recording is None:
+            return False
+        buffer, task = recording
+        await self._stop(task)
+
+        self._finishing.add(buffer.directory)
+        try:
+            if len(buffer) < 2:
+                logger.info("Too few frames for a timelapse of `%s`.", printer_name)
+                return False
+            output_path = buffer.directory / "timelapse.gif"
+            size = await run_image_task(
+                render_timelapse,
+                [str(path) for path in buffer.paths()],
+                str(output_path)
+            )
+            if size is None:
+                logger.warning("Timelapse of `%s` doesn't fit the upload limit.", printer_name)
+                return False
+            logger.info("Rendered a %d frame timelapse of `%s` (%d bytes).",
+                        len(buffer), printer_name, size)
+            await deliver(output_path)
+            return True
+        finally:
+            self._finishing.discard(buffer.directory)
+            await asyncio.to_thread(shutil.rmtree, buffer.directory, True)
+
+    async def discard(self, printer_name: str) -> None:
+        """Stop recording and delete the frames without rendering."""
+        recording = self._recordings.pop(printer_name, None)
+        if recording is None:
+            return
+        buffer, task = recording
+        await self._stop(task)
+        await asyncio.to_thread(shutil.rmtree, buffer.directory, True)
+
+    async def close(self) -> None:
+        """Stop and delete every recording."""
+        await asyncio.gather(
+            *(self.discard(printer_name) for printer_name in list(self._recordings))
+        )
+
+    def _purge(self, directory: Path) -> None:
+        if not directory.is_dir():
+            return
+        for recording in directory.iterdir():
+            if recording not in self._finishing:
+                shutil.rmtree(recording, ignore_errors=True)
+
+    @staticmethod
+    async def _stop(task: asyncio.Task[None]) -> None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _record(self, printer_name: str, buffer: FrameRingBuffer) -> None:
+        """Capture frames on the interval, or whenever the layer number changes."""
+        last_layer: object = None
+        while True:
+            printer = self._printer_lookup(printer_name)
+            if printer is not None:
+                if self.interval > 0:
+                    await self._capture(printer_name, printer, buffer)
+                else:
+                    layer = printer.mqtt_client.dump().get("print", {}).get("layer_num")
+                    if layer is not None and layer != last_layer:
+                        last_layer = layer
+                        await self._capture(printer_name, printer, buffer)
+            await asyncio.sleep(self.interval if self.interval > 0 else TIMELAPSE_LAYER_POLL)
+
+    @staticmethod
+    async def _capture(printer_name: str, printer: bl.Printer, buffer: FrameRingBuffer) -> None:
+        # Not through the frame cache: within its TTL it would hand out the same
+        # frame for consecutive fast layers
+        frame = await get_camera_frame(printer, printer_name)
+        if frame is None:
+            return
+        # Stored at the size of the GIF, so the frames take less disk and render faster
+        try:
+            thumbnail = await run_image_task(
+                encode_thumbnail, frame, FrameEncoderSettings(), TIMELAPSE_MAX_DIMENSION
+            )
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Can't scale a timelapse frame of `%s`.", printer_name)
+            return
+        try:
+            await asyncio.to_thread(buffer.append, thumbnail)
+        except OSError:
+            logger.exception("Can't store a timelapse frame of `%s`.", printer_name)
@@ -0,0 +1,34 @@
+"""shared fixtures of the tests"""
+
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeMQTTClient:
+    """Minimal stand-in for the bambulabs_api MQTT client."""
+
+    def __init__(self):
+        self.data = {"print": {}}
+        self.on_message_handler = lambda a, b, c, d: None
+
+    def dump(self):
+        """Return the merged printer state."""
+        return self.data
+
+    def is_connected(self):
+        """The fake broker connection is always up."""
+        return True
+
+    def push(self, **print_report):
+        """Simulate a push report arriving on the MQTT thread."""
+        self.data["print"] |= print_report
+        self.on_message_handler(self, None, None, None)
+
+
+@pytest.fixture
+def make_fake_printer():
+    """Factory of fake printers, each around its own FakeMQTTClient."""
+    def make_printer():
+        return SimpleNamespace(mqtt_client=FakeMQTTClient(), disconnect=lambda: None)
+    return make_printer
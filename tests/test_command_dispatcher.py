@@ -0,0 +1,110 @@
+"""tests for the module command_dispatcher"""
+
+import asyncio
+
+import pytest
+
+from cogs.utils.command_dispatcher import PrinterCommandDispatcher
+
+
+@pytest.mark.asyncio
+async def test_commands_run_in_order_one_at_a_time():
+    """Commands of a printer never overlap and run in submission order."""
+    dispatcher = PrinterCommandDispatcher(dedupe_window=0)
+    running = []
+    order = []
+
+    def command(name):
+        async def run():
+            running.append(name)
+            assert len(running) == 1
+            await asyncio.sleep(0.01)
+            order.append(name)
+            running.remove(name)
+            return name
+        return run
+
+    futures = [dispatcher.submit("p1", name, command(name)) for name in ("pause", "resume", "stop")]
+    assert await asyncio.gather(*futures) == ["pause", "resume", "stop"]
+    assert order == ["pause", "resume", "stop"]
+
+    stats = dispatcher.stats()[0]
+    assert (stats.executed, stats.queue_depth) == (3, 0)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_click_shares_result():
+    """A repeated command within the window is not sent again."""
+    dispatcher = PrinterCommandDispatcher(dedupe_window=10)
+    calls = []
+
+    async def pause():
+        calls.append("pause")
+        return "paused"
+
+    first = dispatcher.submit("p1", "pause", pause)
+    second = dispatcher.submit("p1", "pause", pause)
+
+    assert second is first
+    assert await first == "paused"
+    assert calls == ["pause"]
+    assert dispatcher.stats()[0].deduplicated == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_toggles_cancel_out():
+    """A second light toggle while the first is still queued sends neither."""
+    dispatcher = PrinterCommandDispatcher(dedupe_window=0)
+    calls = []
+    release = asyncio.Event()
+
+    async def stop():
+        await release.wait()
+        return "stopped"
+
+    async def light():
+        calls.append("light")
+        return "toggled"
+
+    stopped = dispatcher.submit("p1", "stop", stop)
+    first = dispatcher.submit("p1", "light", light)
+    second = dispatcher.submit("p1", "light", light)
+    release.set()
+
+    assert await stopped == "stopped"
+    assert await first is None
+    assert await second is None
+    assert not calls
+    assert dispatcher.stats()[0].collapsed == 2
+
+
+@pytest.mark.asyncio
+async def test_default_window_collapses_toggles_and_keeps_alternating_commands():
+    """
+    With the default window, queued toggles still cancel out and pause, resume,
+    pause in a row all run.
+    """
+    dispatcher = PrinterCommandDispatcher()
+    calls = []
+    release = asyncio.Event()
+
+    def command(name):
+        async def run():
+            if name == "stop":
+                await release.wait()
+            calls.append(name)
+            return name
+        return run
+
+    stopped = dispatcher.submit("p1", "stop", command("stop"))
+    first = dispatcher.submit("p1", "light", command("light"))
+    second = dispatcher.submit("p1", "light", command("light"))
+    futures = [
+        dispatcher.submit("p1", name, command(name)) for name in ("pause", "resume", "pause")
+    ]
+    release.set()
+
+    assert await stopped == "stop"
+    assert await first is None and await second is None
+    assert await asyncio.gather(*futures) == ["pause", "resume", "pause"]
+    assert calls == ["stop", "pause", "resume", "pause"]
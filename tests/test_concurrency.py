@@ -0,0 +1,84 @@
+"""tests for the module concurrency"""
+
+import asyncio
+
+import pytest
+from cogs.utils.concurrency import PrinterTaskRunner, gather_bounded
+
+
+@pytest.mark.asyncio
+async def test_gather_bounded_isolates_slow_printer():
+    """
+    Test that a printer exceeding its timeout only fails its own entry
+    and does not delay or break the results for the other printers.
+    """
+    async def worker(printer_name):
+        if printer_name == "slow":
+            await asyncio.sleep(10)
+        if printer_name == "broken":
+            raise ConnectionError("offline")
+        return printer_name.upper()
+
+    results = await gather_bounded(
+        printer_names=["a", "slow", "broken", "b"],
+        worker=worker,
+        limit=2,
+        timeout=0.05
+    )
+
+    assert results["a"] == "A"
+    assert results["b"] == "B"
+    assert isinstance(results["slow"], asyncio.TimeoutError)
+    assert isinstance(results["broken"], ConnectionError)
+
+
+@pytest.mark.asyncio
+async def test_gather_bounded_respects_limit():
+    """
+    Test that no more than `limit` workers run at the same time.
+    """
+    running = 0
+    peak = 0
+
+    async def worker(_):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await gather_bounded(printer_names=[str(i) for i in range(10)], worker=worker, limit=3)
+
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_hanging_printer_does_not_hold_the_next_tick():
+    """
+    Test that a printer hanging until its timeout is not started twice, while
+    a printer that comes due on the next tick is checked right away.
+    """
+    checked = []
+    results = {}
+    hanging = asyncio.Event()
+
+    async def worker(printer_name):
+        checked.append(printer_name)
+        if printer_name == "dead":
+            await hanging.wait()
+        return 5.0
+
+    runner = PrinterTaskRunner(worker=worker, on_done=results.__setitem__, limit=4, timeout=0.2)
+    assert runner.start(["dead"]) == ["dead"]
+    await asyncio.sleep(0.01)
+
+    # Next tick: the dead printer is still in flight, the other one comes due
+    assert runner.start(["dead", "p1"]) == ["p1"]
+    await asyncio.sleep(0.01)
+    assert checked == ["dead", "p1"]
+    assert results == {"p1": 5.0}
+    assert "dead" in runner
+
+    await asyncio.sleep(0.3)
+    assert isinstance(results["dead"], asyncio.TimeoutError)
+    assert "dead" not in runner
@@ -0,0 +1,111 @@
+"""tests for the module fleet_dashboard"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from cogs.ui.embed_helpers import build_fleet_dashboard_embeds, dashboard_row
+from cogs.ui.fleet_dashboard import FleetDashboard
+from cogs.ui.outbox import DiscordOutbox
+from cogs.utils.models import StatusMessageStorage
+from cogs.utils.snapshot import PrinterSnapshot
+
+
+class FakeChannel:
+    """Records sent and edited messages like a text channel would."""
+
+    def __init__(self):
+        self.id = 42  # pylint: disable=invalid-name
+        self.sent = []
+        self.edits = []
+
+    async def send(self, **kwargs):
+        """Post a new message."""
+        self.sent.append(kwargs)
+        return SimpleNamespace(id=len(self.sent))
+
+    def get_partial_message(self, message_id):
+        """Return a message handle that can be edited."""
+        async def edit(**kwargs):
+            self.edits.append((message_id, kwargs))
+            return SimpleNamespace(id=message_id)
+        return SimpleNamespace(edit=edit)
+
+
+def _snapshot(percentage):
+    """Telemetry of a running printer at the given progress."""
+    return PrinterSnapshot.from_report({
+        "gcode_state": "RUNNING",
+        "mc_percent": percentage,
+        "nozzle_temper": 220,
+        "bed_temper": 60
+    })
+
+
+def test_dashboard_is_paginated_below_the_field_limit():
+    """
+    Test that a large fleet is split into pages of at most 25 fields and
+    that offline printers get their own row.
+    """
+    rows = {f"printer-{number:02d}": dashboard_row(None) for number in range(30)}
+
+    embeds = build_fleet_dashboard_embeds(rows)
+
+    assert [len(embed.fields) for embed in embeds] == [24, 6]
+    assert embeds[1].title == "🖨️ Fleet Dashboard (2/2)"
+    assert "OFFLINE" in embeds[0].fields[0].value
+
+
+@pytest.mark.asyncio
+async def test_dashboard_edits_only_when_a_row_changes(tmp_path):
+    """
+    Test that the dashboard is posted once, not edited for checks that
+    render the same rows, and edited once a row changes.
+    """
+    channel = FakeChannel()
+    dashboard = FleetDashboard(
+        lambda: channel,
+        storage=StatusMessageStorage(str(tmp_path / "dashboard_messages.json")),
+        outbox=DiscordOutbox()
+    )
+
+    dashboard.rows = {"X1": dashboard_row(_snapshot(10)), "P1": dashboard_row(None)}
+    await dashboard.refresh()
+    dashboard.rows["X1"] = dashboard_row(_snapshot(10))
+    await dashboard.refresh()
+    assert (len(channel.sent), len(channel.edits)) == (1, 0)
+
+    dashboard.rows["X1"] = dashboard_row(_snapshot(11))
+    await dashboard.refresh()
+    assert len(channel.edits) == 1
+    assert "11%" in channel.edits[0][1]["embed"].fields[1].value
+
+
+@pytest.mark.asyncio
+async def test_failing_refresh_is_logged_and_next_refresh_runs(tmp_path, caplog):
+    """
+    Test that an error other than a Discord error during a refresh is logged,
+    and that the next change still schedules a refresh.
+    """
+    channel = FakeChannel()
+    dashboard = FleetDashboard(
+        lambda: channel,
+        storage=StatusMessageStorage(str(tmp_path / "dashboard_messages.json")),
+        refresh_interval=0,
+        outbox=DiscordOutbox()
+    )
+    refreshes = []
+
+    async def refresh():
+        refreshes.append(dict(dashboard.rows))
+        if len(refreshes) == 1:
+            raise OSError("disk full")
+
+    dashboard.refresh = refresh
+    dashboard.update("X1", _snapshot(10))
+    await asyncio.sleep(0.01)
+    assert "Failed to refresh the fleet dashboard." in caplog.text
+
+    dashboard.update("X1", _snapshot(11))
+    await asyncio.sleep(0.01)
+    assert len(refreshes) == 2
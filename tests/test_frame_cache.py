@@ -0,0 +1,76 @@
+"""tests for the module frame_cache"""
+
+import asyncio
+
+import pytest
+from cogs.utils.frame_cache import CameraFrameCache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_capture():
+    """
+    Test that concurrent requests for one printer share a single capture
+    and that the frame is reused within the TTL.
+    """
+    cache = CameraFrameCache(ttl=60)
+    captures = 0
+
+    async def capture():
+        nonlocal captures
+        captures += 1
+        await asyncio.sleep(0.01)
+        return b"frame"
+
+    frames = await asyncio.gather(*(cache.get("X1", capture) for _ in range(5)))
+    again = await cache.get("X1", capture)
+
+    assert captures == 1
+    assert all(frame is not None and frame.data == b"frame" for frame in frames)
+    assert again is not None and not again.stale
+
+
+@pytest.mark.asyncio
+async def test_failed_capture_serves_stale_frame_and_lru_evicts():
+    """
+    Test that a failed capture returns the last good frame marked as stale,
+    and that the least recently used printer is evicted past the size bound.
+    """
+    cache = CameraFrameCache(ttl=0, max_size=2)
+
+    async def good():
+        return b"good"
+
+    async def broken():
+        raise OSError("camera offline")
+
+    await cache.get("A1", good)
+    stale = await cache.get("A1", broken)
+    await cache.get("P1", good)
+    await cache.get("X1", good)
+
+    assert stale is not None and stale.stale and stale.data == b"good"
+    assert await cache.get("MISSING", broken) is None
+    assert "A1" not in cache
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_signature_is_kept_with_the_cached_frame():
+    """
+    Test that a signature stored for a frame is returned with later cache hits,
+    and not attached to a newer frame captured meanwhile.
+    """
+    cache = CameraFrameCache(ttl=60)
+
+    async def capture():
+        return b"frame"
+
+    frame = await cache.get("X1", capture)
+    cache.set_signature("X1", frame, b"signature")
+    assert (await cache.get("X1", capture)).signature == b"signature"
+
+    cache.discard("X1")
+    newer = await cache.get("X1", capture)
+    cache.set_signature("X1", frame, b"outdated")
+    assert (await cache.get("X1", capture)).signature is None
+    assert newer.signature is None
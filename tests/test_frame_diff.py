@@ -0,0 +1,76 @@
+"""tests for the module frame_diff"""
+
+import io
+
+from PIL import Image
+from cogs.utils.frame_diff import FrameDiffTracker
+from cogs.utils.image_pipeline import frame_signature
+
+
+def _jpeg(color):
+    """Encodes a plain full-resolution frame of one color."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (1920, 1080), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_unchanged_frame_reuses_upload():
+    """
+    Test that a frame equal to the uploaded one reuses its URL and counts as
+    no visible progress, while a clearly different frame needs a new upload.
+    """
+    tracker = FrameDiffTracker(threshold=0.02)
+    dark = frame_signature(_jpeg((20, 20, 20)))
+    bright = frame_signature(_jpeg((200, 200, 200)))
+
+    assert tracker.observe("X1", dark) == 1.0
+    assert tracker.reusable_url("X1", 1, dark) is None
+    tracker.record_upload("X1", 1, dark, "https://cdn.example/frame.jpg")
+
+    assert tracker.observe("X1", frame_signature(_jpeg((21, 20, 20)))) < 0.02
+    assert tracker.reusable_url("X1", 1, dark) == "https://cdn.example/frame.jpg"
+    changed_at = tracker.unchanged_for("X1")
+
+    assert tracker.observe("X1", bright) > 0.5
+    assert tracker.reusable_url("X1", 1, bright) is None
+    assert tracker.unchanged_for("X1") <= changed_at
+
+
+def test_expired_upload_is_not_reused():
+    """
+    Test that an upload older than the reuse window is not reused, since
+    Discord attachment URLs expire.
+    """
+    tracker = FrameDiffTracker(reuse_max_age=0)
+    signature = frame_signature(_jpeg((50, 60, 70)))
+    tracker.record_upload("P1", 1, signature, "https://cdn.example/frame.jpg")
+
+    assert tracker.reusable_url("P1", 1, signature) is None
+
+
+def test_upload_is_only_reused_in_its_own_message():
+    """
+    Test that an upload is only offered to the message it was uploaded to, so
+    a frame of one message never points at the attachment of another.
+    """
+    tracker = FrameDiffTracker()
+    signature = frame_signature(_jpeg((50, 60, 70)))
+    tracker.record_upload("P1", 1, signature, "https://cdn.example/frame.jpg")
+
+    assert tracker.reusable_url("P1", 2, signature) is None
+    assert tracker.reusable_url("P1", 1, signature) == "https://cdn.example/frame.jpg"
+
+    tracker.discard("P1")
+    assert tracker.reusable_url("P1", 1, signature) is None
+
+
+def test_observation_is_due_after_the_interval():
+    """Test that a printer is due for a frame comparison until one was made recently."""
+    tracker = FrameDiffTracker(observe_interval=60)
+    assert tracker.observation_due("X1")
+
+    tracker.observe("X1", frame_signature(_jpeg((50, 60, 70))))
+    assert not tracker.observation_due("X1")
+
+    tracker.observe_interval = 0
+    assert tracker.observation_due("X1")
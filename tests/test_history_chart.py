@@ -0,0 +1,59 @@
+"""tests for the module history_chart"""
+
+import io
+import time
+
+import pytest
+from PIL import Image
+
+from cogs.utils import history_chart as history_chart_module
+from cogs.utils.history_chart import HistoryChartCache, get_history_chart, parse_window
+from cogs.utils.snapshot import PrinterSnapshot
+from cogs.utils.telemetry import TelemetryRecorder
+
+
+def test_parse_window():
+    """Windows are given as a number and a unit, within the maximum window."""
+    assert parse_window("30m") == 1800
+    assert parse_window(" 6H ") == 6 * 3600
+    assert parse_window("7d") == 7 * 86400
+    assert parse_window("0h") is None
+    assert parse_window("90d") is None
+    assert parse_window("soon") is None
+
+
+@pytest.mark.asyncio
+async def test_chart_is_rendered_once_per_data_version(tmp_path, monkeypatch):
+    """A repeated request is served from the cache until a new sample arrives."""
+    renders = []
+
+    async def run_inline(func, *args):
+        renders.append(args[0])
+        return func(*args)
+
+    monkeypatch.setattr(history_chart_module, "run_image_task", run_inline)
+    recorder = TelemetryRecorder(str(tmp_path))
+    cache = HistoryChartCache()
+    now = time.time()
+
+    def record(offset, bed_temperature):
+        report = PrinterSnapshot.from_report({
+            "gcode_state": "RUNNING", "bed_temper": bed_temperature, "mc_percent": offset
+        })
+        recorder.record("X1", PrinterSnapshot(
+            **{name: getattr(report, name) for name in PrinterSnapshot.FIELDS},
+            captured_at=now - 600 + offset
+        ))
+
+    assert await get_history_chart("X1", 3600, recorder=recorder, cache=cache) is None
+    for offset in range(0, 600, 30):
+        record(offset, 60 - offset / 100)
+
+    chart = await get_history_chart("X1", 3600, recorder=recorder, cache=cache)
+    assert await get_history_chart("X1", 3600, recorder=recorder, cache=cache) is chart
+    assert len(renders) == 1
+    assert Image.open(io.BytesIO(chart)).size == (960, 600)
+
+    record(600, 55)
+    assert await get_history_chart("X1", 3600, recorder=recorder, cache=cache) is not chart
+    assert len(renders) == 2
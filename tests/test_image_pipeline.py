@@ -0,0 +1,77 @@
+"""tests for the module image_pipeline"""
+
+import base64
+import io
+
+import pytest
+from PIL import Image
+from cogs.utils.image_executor import ImageProcessPool
+from cogs.utils.image_pipeline import (
+    FrameEncoderSettings,
+    camera_frame_filename,
+    encode_frame,
+    encode_thumbnail,
+    frame_watermark,
+    process_frame
+)
+from cogs.utils.models import ImageCredentials
+
+
+def test_encode_frame_scales_down_and_reencodes():
+    """
+    Test that a large frame is scaled to the maximum dimension, keeps its
+    aspect ratio and is encoded in the requested format.
+    """
+    frame = Image.new("RGBA", (1920, 1080), (10, 200, 30, 255))
+    settings = FrameEncoderSettings(image_format="WEBP", quality=60, max_dimension=640)
+
+    encoded = Image.open(io.BytesIO(encode_frame(frame, settings)))
+
+    assert encoded.format == "WEBP"
+    assert encoded.size == (640, 360)
+
+
+def test_camera_frame_upload_needs_no_file():
+    """
+    Test that in-memory frames get an attachment-safe filename and a fresh
+    Discord file on every access.
+    """
+    settings = FrameEncoderSettings(image_format="JPEG")
+    filename = camera_frame_filename("X1 Carbon #2", settings)
+    credentials = ImageCredentials(image_filename=filename, image_data=b"jpeg-bytes")
+
+    assert filename == "camera_frame_X1_Carbon__2.jpg"
+    assert credentials.embed_set_image_url == f"attachment://{filename}"
+    first_upload = credentials.image_main_location
+    second_upload = credentials.image_main_location
+    assert first_upload is not second_upload
+    assert second_upload.fp.read() == b"jpeg-bytes"
+
+
+def _camera_frame_base64(size=(1920, 1080)):
+    """Encodes a plain test image the way the printer camera delivers frames."""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (120, 120, 120)).save(buffer, format="JPEG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+@pytest.mark.asyncio
+async def test_process_frame_runs_in_worker_process():
+    """
+    Test that a frame is decoded, watermarked and encoded in a worker
+    process of the image pool and comes back as encoded bytes.
+    """
+    pool = ImageProcessPool(max_workers=1)
+    settings = FrameEncoderSettings(image_format="JPEG", max_dimension=800)
+    try:
+        frame = await pool.run(
+            process_frame, _camera_frame_base64(), settings, frame_watermark("X1", 42.0)
+        )
+        thumbnail = await pool.run(encode_thumbnail, frame, settings, 200)
+    finally:
+        pool.shutdown()
+
+    assert Image.open(io.BytesIO(frame)).size == (800, 450)
+    assert Image.open(io.BytesIO(thumbnail)).size == (200, 113)
+    assert frame_watermark("X1", 42.0) == "X1 | 42%"
+    assert frame_watermark("X1", None) == "X1"
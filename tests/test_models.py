@@ -0,0 +1,71 @@
+"""tests for the module models"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from cogs.utils.models import PrinterStorage
+
+PRINTER = {"ip": "1.1.1.1", "access_code": "12345", "serial": "AD12345"}
+
+
+@pytest.mark.asyncio
+async def test_changes_are_flushed_once_after_a_burst(tmp_path):
+    """A burst of changes is kept in memory and written in one atomic flush."""
+    storage = PrinterStorage(str(tmp_path / "printer.json"), flush_delay=0.05)
+
+    storage.set("p1", PRINTER)
+    storage.set("p2", PRINTER)
+    assert storage.delete("p1")
+    assert not storage.delete("missing")
+
+    assert storage.printers == {"p2": PRINTER}
+    assert not storage.path.exists()
+
+    await asyncio.sleep(0.1)
+    assert json.loads(storage.path.read_text(encoding="utf-8")) == {"p2": PRINTER}
+    assert os.listdir(tmp_path) == ["printer.json"]
+
+
+def test_registry_reloads_only_when_the_file_changed(tmp_path):
+    """The file is read again after an outside edit, and not on every access."""
+    path = tmp_path / "printer.json"
+    path.write_text(json.dumps({"p1": PRINTER}), encoding="utf-8")
+    storage = PrinterStorage(str(path), reload_interval=0)
+    printers = storage.printers
+    assert printers == {"p1": PRINTER}
+
+    printers["cached"] = PRINTER
+    assert "cached" in storage.printers
+
+    path.write_text(json.dumps({"p2": PRINTER}), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert storage.printers == {"p2": PRINTER}
+    assert storage.printers is printers
+
+
+def test_broken_file_keeps_the_last_good_registry(tmp_path, caplog):
+    """
+    A file that can't be parsed is logged and the registry read before is kept,
+    and the file is only checked once per reload interval.
+    """
+    path = tmp_path / "printer.json"
+    path.write_text(json.dumps({"p1": PRINTER}), encoding="utf-8")
+    storage = PrinterStorage(str(path), reload_interval=0)
+    assert storage.printers == {"p1": PRINTER}
+
+    path.write_text('{"p2": ', encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert storage.printers == {"p1": PRINTER}
+    assert "keeping the last good copy" in caplog.text
+
+    storage.reload_interval = 60
+    path.write_text(json.dumps({"p3": PRINTER}), encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000))
+    assert storage.printers == {"p1": PRINTER}
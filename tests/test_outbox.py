@@ -0,0 +1,57 @@
+"""tests for the module outbox"""
+
+import asyncio
+
+import pytest
+from cogs.ui.outbox import DiscordOutbox
+
+
+@pytest.mark.asyncio
+async def test_outbox_drains_at_channel_budget():
+    """
+    Test that a channel receives at most its burst of messages at once and
+    the rest after the budget refilled, in the order they were queued.
+    """
+    outbox = DiscordOutbox(rate_limit=2, rate_period=0.1)
+    sent = []
+
+    def message(number):
+        async def send():
+            sent.append(number)
+            return number
+        return send
+
+    futures = [outbox.post(1, message(number)) for number in range(4)]
+    await asyncio.sleep(0.01)
+    assert sent == [0, 1]
+
+    assert await asyncio.gather(*futures) == [0, 1, 2, 3]
+    stats = outbox.stats()[0]
+    assert stats.sent == 4 and stats.queue_depth == 0
+    assert stats.max_delay >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_outbox_coalesces_queued_messages_with_same_key():
+    """
+    Test that a queued message is replaced by a newer one with the same key,
+    and that both callers get the result of the message actually sent.
+    """
+    outbox = DiscordOutbox(rate_limit=1, rate_period=0.05)
+    sent = []
+
+    def message(text):
+        async def send():
+            sent.append(text)
+            return text
+        return send
+
+    blocker = outbox.post(7, message("other printer"))
+    first = outbox.post(7, message("X1 RUNNING"), key="X1")
+    second = outbox.post(7, message("X1 FINISH"), key="X1")
+
+    assert await asyncio.gather(blocker, first, second) == [
+        "other printer", "X1 FINISH", "X1 FINISH"
+    ]
+    assert sent == ["other printer", "X1 FINISH"]
+    assert outbox.stats()[0].coalesced == 1
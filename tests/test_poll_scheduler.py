@@ -0,0 +1,37 @@
+"""tests for the module poll_scheduler"""
+
+from bambulabs_api.states_info import GcodeState
+from cogs.utils import poll_scheduler
+from cogs.utils.poll_scheduler import PollScheduler, poll_interval
+
+
+def test_poll_interval_follows_state_and_remaining_time():
+    """
+    Test that idle/offline printers get the slow interval, running printers
+    the active one and printers about to finish the fastest one.
+    """
+    assert poll_interval(None) == poll_scheduler.POLL_IDLE_INTERVAL
+    assert poll_interval(GcodeState.IDLE) == poll_scheduler.POLL_IDLE_INTERVAL
+    assert poll_interval(GcodeState.RUNNING, 120) == poll_scheduler.POLL_ACTIVE_INTERVAL
+    assert poll_interval(GcodeState.RUNNING, "Unknown") == poll_scheduler.POLL_ACTIVE_INTERVAL
+    assert poll_interval(GcodeState.RUNNING, 2) == poll_scheduler.POLL_FINISHING_INTERVAL
+
+
+def test_scheduler_pops_in_due_order_and_honours_reschedule():
+    """
+    Test that only due printers are returned, that rescheduling replaces the
+    previous entry and that removed printers are dropped.
+    """
+    schedule = PollScheduler()
+    schedule.sync(["a", "b", "c"])
+    assert sorted(schedule.pop_due()) == ["a", "b", "c"]
+
+    schedule.schedule("a", 100)
+    schedule.schedule("b", 0)
+    schedule.schedule("c", 0)
+    schedule.schedule("c", 50)
+    schedule.sync(["a", "b"])
+
+    assert schedule.pop_due() == ["b"]
+    assert "c" not in schedule
+    assert 49 < schedule.next_due_in() <= 100
@@ -0,0 +1,59 @@
+"""tests for the module printer_buttons"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from cogs.ui.printer_buttons import (
+    MAX_PRINTER_NAME_LENGTH,
+    PrinterControlButton,
+    PrinterControlView,
+)
+
+
+@pytest.mark.asyncio
+async def test_custom_id_round_trip():
+    """A button is rebuilt with the same action and printer name from its custom_id."""
+    button = PrinterControlButton(action="light", printer_name="X1 Carbon: left")
+    custom_id = button.custom_id
+
+    match = PrinterControlButton.__discord_ui_compiled_template__.fullmatch(custom_id)
+    assert match is not None
+    rebuilt = await PrinterControlButton.from_custom_id(None, button.item, match)
+
+    assert rebuilt.action == "light"
+    assert rebuilt.printer_name == "X1 Carbon: left"
+    assert rebuilt.custom_id == custom_id
+
+
+def test_custom_id_fits_discord_limit():
+    """The longest allowed name fits every action; a longer one is rejected."""
+    name = "x" * MAX_PRINTER_NAME_LENGTH
+    view = PrinterControlView(printer_name=name)
+
+    assert max(len(item.custom_id) for item in view.children) == 100
+    with pytest.raises(ValueError):
+        PrinterControlButton(action="pause", printer_name=name + "x")
+
+
+@pytest.mark.asyncio
+async def test_view_is_not_kept_per_message():
+    """The view holds no printer and is finished, so the view store never keeps it."""
+    printer = SimpleNamespace()
+    view = PrinterControlView(printer_name="p1", printer=printer)
+
+    assert view.is_finished()
+    assert view.timeout is None
+    assert all(printer is not value for value in vars(view).values())
+    assert [item.custom_id for item in view.children] == [
+        "printer:pause:p1", "printer:resume:p1", "printer:stop:p1", "printer:light:p1"
+    ]
+    assert not any(item.item.disabled for item in view.children)
+
+
+@pytest.mark.asyncio
+async def test_view_disabled_without_printer():
+    """The buttons are disabled when the printer is unavailable."""
+    view = PrinterControlView(printer_name="p1")
+
+    assert all(item.item.disabled for item in view.children)
@@ -0,0 +1,118 @@
+"""tests for the module printer_connection"""
+
+import asyncio
+import threading
+
+import pytest
+from cogs.utils import printer_connection
+from cogs.utils.models import PrinterCredentials
+
+
+@pytest.mark.asyncio
+async def test_connect_resolves_on_first_full_report(monkeypatch, make_fake_printer):
+    """
+    Test that the connect pipeline finishes as soon as the first full report
+    arrives and records the duration of every stage.
+    """
+    printer = make_fake_printer()
+    monkeypatch.setattr(printer_connection, "_create_printer", lambda printer_data: printer)
+
+    # Partial report first, the full `pushall` answer a moment later
+    threading.Timer(0.02, printer.mqtt_client.push, kwargs={"mc_percent": 5}).start()
+    threading.Timer(0.05, printer.mqtt_client.push,
+                    kwargs={"gcode_state": "RUNNING", "bed_temper": 60.0}).start()
+
+    connected, report = await printer_connection.connect_to_printer_with_report(
+        printer_name="p1",
+        printer_data=PrinterCredentials(ip="1.1.1.1", access_code="1", serial="S")
+    )
+
+    assert connected is printer
+    assert report.failed_stage is None
+    assert report.state == "RUNNING"
+    assert list(report.stage_durations) == ["create", "mqtt", "first_report"]
+    assert report.total < 1
+
+
+@pytest.mark.asyncio
+async def test_connect_reports_failing_stage(monkeypatch, make_fake_printer):
+    """
+    Test that a printer that never sends a report fails at the
+    `first_report` stage and is disconnected.
+    """
+    printer = make_fake_printer()
+    disconnected = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    printer.disconnect = lambda: loop.call_soon_threadsafe(disconnected.set)
+    monkeypatch.setattr(printer_connection, "_create_printer", lambda printer_data: printer)
+    monkeypatch.setattr(printer_connection, "FIRST_REPORT_TIMEOUT", 0.05)
+
+    connected, report = await printer_connection.connect_to_printer_with_report(
+        printer_name="p1",
+        printer_data=PrinterCredentials(ip="1.1.1.1", access_code="1", serial="S")
+    )
+
+    assert connected is None
+    assert report.failed_stage == "first_report"
+    await asyncio.wait_for(disconnected.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_fleet_check_shares_one_deadline(monkeypatch, make_fake_printer):
+    """
+    Test that the fleet check probes printers in parallel, reports reachable
+    printers and marks the silent ones as timed out at their current stage.
+    """
+    printers = {ip: make_fake_printer() for ip in ("1.1.1.1", "2.2.2.2", "3.3.3.3")}
+    printers["1.1.1.1"].mqtt_client.push(gcode_state="IDLE", bed_temper=20.0)
+    monkeypatch.setattr(printer_connection, "_create_printer",
+                        lambda printer_data: printers[printer_data.ip])
+    monkeypatch.setattr(printer_connection, "FIRST_REPORT_TIMEOUT", 10)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    reports = await printer_connection.check_fleet_connections(
+        printers={
+            f"p{index}": PrinterCredentials(ip=ip, access_code="1", serial="S")
+            for index, ip in enumerate(printers)
+        },
+        timeout=0.2
+    )
+
+    assert loop.time() - started < 0.5
+    assert reports["p0"].failed_stage is None
+    assert reports["p0"].state == "IDLE"
+    for name in ("p1", "p2"):
+        assert reports[name].timed_out
+        assert reports[name].failed_stage == "first_report"
+
+
+@pytest.mark.asyncio
+async def test_fleet_check_reuses_pooled_connections(monkeypatch, make_fake_printer):
+    """
+    Test that a printer with a healthy pooled connection is checked in place,
+    and that only the other printers get a fresh connection.
+    """
+    pooled = make_fake_printer()
+    pooled.mqtt_client.push(gcode_state="RUNNING", bed_temper=60.0)
+    fresh = make_fake_printer()
+    fresh.mqtt_client.push(gcode_state="IDLE", bed_temper=20.0)
+    created = []
+
+    def create_printer(printer_data):
+        created.append(printer_data.ip)
+        return fresh
+
+    monkeypatch.setattr(printer_connection, "_create_printer", create_printer)
+    reports = await printer_connection.check_fleet_connections(
+        printers={
+            "pooled": PrinterCredentials(ip="1.1.1.1", access_code="1", serial="S"),
+            "fresh": PrinterCredentials(ip="2.2.2.2", access_code="1", serial="S"),
+        },
+        pooled={"pooled": pooled}.get
+    )
+
+    assert created == ["2.2.2.2"]
+    assert reports["pooled"].state == "RUNNING"
+    assert list(reports["pooled"].stage_durations) == ["mqtt", "first_report"]
+    assert reports["fresh"].state == "IDLE"
@@ -0,0 +1,78 @@
+"""tests for the module printer_events"""
+
+import asyncio
+
+import pytest
+from bambulabs_api.states_info import GcodeState
+from cogs.utils.printer_events import PrinterReportBridge, await_transition
+
+
+@pytest.mark.asyncio
+async def test_bridge_forwards_only_state_changes(make_fake_printer):
+    """
+    Test that reports are turned into queue events only when the gcode state
+    changes, and that events arrive from a foreign thread.
+    """
+    printer = make_fake_printer()
+    mqtt_client = printer.mqtt_client
+    bridge = PrinterReportBridge("p1", printer)
+    bridge.attach()
+
+    def mqtt_thread():
+        mqtt_client.push(gcode_state="RUNNING", mc_percent=1)
+        mqtt_client.push(mc_percent=2)
+        mqtt_client.push(gcode_state="RUNNING", mc_percent=3)
+        mqtt_client.push(gcode_state="FINISH")
+
+    await asyncio.to_thread(mqtt_thread)
+
+    first = await asyncio.wait_for(bridge.get(), timeout=1)
+    second = await asyncio.wait_for(bridge.get(), timeout=1)
+    assert (first.previous_state, first.state) == (None, GcodeState.RUNNING)
+    assert (second.previous_state, second.state) == (GcodeState.RUNNING, GcodeState.FINISH)
+    assert bridge.queue.empty()
+
+    bridge.detach()
+    mqtt_client.push(gcode_state="IDLE")
+    await asyncio.sleep(0)
+    assert bridge.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_await_transition_resolves_on_report(make_fake_printer):
+    """The waiter returns as soon as a report shows the expected state."""
+    printer = make_fake_printer()
+    mqtt_client = printer.mqtt_client
+    mqtt_client.data["print"]["gcode_state"] = "RUNNING"
+
+    async def pause():
+        asyncio.get_running_loop().call_later(
+            0.05, lambda: mqtt_client.push(gcode_state="PAUSE")
+        )
+        return True
+
+    confirmed = await asyncio.wait_for(
+        await_transition(printer, pause, lambda s: s.state == GcodeState.PAUSE, timeout=5),
+        timeout=1
+    )
+    assert confirmed
+
+
+@pytest.mark.asyncio
+async def test_await_transition_times_out_or_rejects(make_fake_printer):
+    """No confirming report, or a rejected command, is reported as a failure."""
+    printer = make_fake_printer()
+    mqtt_client = printer.mqtt_client
+    mqtt_client.data["print"]["gcode_state"] = "RUNNING"
+
+    async def accepted():
+        return True
+
+    async def rejected():
+        return False
+
+    def paused(snapshot):
+        return snapshot.state == GcodeState.PAUSE
+
+    assert not await await_transition(printer, accepted, paused, timeout=0.05)
+    assert not await await_transition(printer, rejected, paused, timeout=5)
@@ -0,0 +1,36 @@
+"""tests for the module printer_executor"""
+
+import asyncio
+import threading
+
+import pytest
+from cogs.utils.printer_executor import PrinterIOExecutor
+
+
+@pytest.mark.asyncio
+async def test_executor_runs_off_loop_and_reports_queue_depth():
+    """
+    Test that blocking calls run on worker threads, that calls beyond the pool
+    size are reported as queued, and that the counters settle afterwards.
+    """
+    executor = PrinterIOExecutor(max_workers=1)
+    release = threading.Event()
+    loop_thread = threading.get_ident()
+
+    first = asyncio.ensure_future(executor.run(lambda: (release.wait(1), threading.get_ident())))
+    second = asyncio.ensure_future(executor.run(lambda: "done"))
+    await asyncio.sleep(0.05)
+
+    stats = executor.stats()
+    assert stats.running == 1
+    assert stats.queue_depth == 1
+
+    release.set()
+    _, worker_thread = await first
+    assert await second == "done"
+    assert worker_thread != loop_thread
+
+    stats = executor.stats()
+    assert (stats.queue_depth, stats.running, stats.completed) == (0, 0, 2)
+    assert stats.max_wait > 0
+    executor.shutdown()
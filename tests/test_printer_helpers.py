@@ -2,7 +2,7 @@
 
 
 import pytest
-from cogs.utils.printer_helpers import get_printer_data_dict
+from cogs.utils.printer_helpers import get_printer_data_dict, backoff_checker, BackoffStats
 from cogs.utils.models import PrinterCredentials
 
 @pytest.fixture(name="sample_data")
@@ -29,3 +29,52 @@ def test_get_printer_data_dict(sample_data):
     assert result.ip == "1.1.1.1"
     assert result.access_code == "12345"
     assert result.serial == "AD12345"
+
+
+@pytest.mark.asyncio
+async def test_backoff_checker_awaits_coroutines_and_records_stats():
+    """
+    Test that `backoff_checker` awaits coroutine callbacks, retries until the
+    success condition holds and fills in the attempt statistics.
+    """
+    results = iter([False, False, True])
+
+    async def check():
+        return next(results)
+
+    stats = BackoffStats()
+    result = await backoff_checker(
+        action_func_callback=check,
+        action_name="test",
+        interval=0.001,
+        jitter=True,
+        stats=stats
+    )
+
+    assert result is True
+    assert stats.attempts == 3
+    assert stats.succeeded
+    assert stats.total_wait <= 0.001 + 0.002
+
+
+@pytest.mark.asyncio
+async def test_backoff_checker_stops_at_deadline():
+    """
+    Test that the overall deadline ends the retries early, even with
+    attempts left and a blocking callback running in a thread.
+    """
+    stats = BackoffStats()
+    result = await backoff_checker(
+        action_func_callback=lambda: False,
+        action_name="test",
+        interval=0.05,
+        max_attempts=100,
+        deadline=0.2,
+        run_in_thread=True,
+        stats=stats
+    )
+
+    assert result is None
+    assert not stats.succeeded
+    assert 1 < stats.attempts < 100
+    assert stats.elapsed < 0.5
@@ -0,0 +1,70 @@
+"""tests for the module printer_pool"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from cogs.utils import printer_pool
+from cogs.utils.models import PrinterCredentials
+from cogs.utils.printer_pool import PrinterConnectionPool
+
+
+def make_printer():
+    """Build a fake printer whose MQTT client reports as connected."""
+    printer = SimpleNamespace(connected=True, disconnect_calls=0)
+    printer.mqtt_client = SimpleNamespace(is_connected=lambda: printer.connected)
+
+    def disconnect():
+        printer.disconnect_calls += 1
+        printer.connected = False
+
+    printer.disconnect = disconnect
+    return printer
+
+
+@pytest.fixture(name="connect_calls")
+def fake_connect(monkeypatch):
+    """Replace the real handshake with a slow fake and count the attempts."""
+    calls = []
+
+    async def connect_to_printer(printer_name, printer_data):  # pylint: disable=unused-argument
+        calls.append(printer_name)
+        await asyncio.sleep(0.01)
+        return make_printer()
+
+    monkeypatch.setattr(printer_pool, "connect_to_printer", connect_to_printer)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_acquire_opens_one_connection_and_reuses_it(connect_calls):
+    """
+    Test that concurrent callers share one connection attempt and later
+    callers get the pooled connection back without reconnecting.
+    """
+    pool = PrinterConnectionPool()
+    credentials = PrinterCredentials(ip="1.1.1.1", access_code="1", serial="S")
+
+    printers = await asyncio.gather(*(pool.acquire("p1", credentials) for _ in range(5)))
+    again = await pool.acquire("p1", credentials)
+
+    assert connect_calls == ["p1"]
+    assert all(printer is again for printer in printers)
+
+
+@pytest.mark.asyncio
+async def test_evict_idle_disconnects(connect_calls):
+    """
+    Test that idle connections are disconnected and reconnect on next use.
+    """
+    pool = PrinterConnectionPool(idle_timeout=0)
+    credentials = PrinterCredentials(ip="1.1.1.1", access_code="1", serial="S")
+    printer = await pool.acquire("p1", credentials)
+    await asyncio.sleep(0.001)
+
+    assert await pool.evict_idle() == ["p1"]
+    assert printer.disconnect_calls == 1
+    assert "p1" not in pool
+
+    await pool.acquire("p1", credentials)
+    assert connect_calls == ["p1", "p1"]
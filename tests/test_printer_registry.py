@@ -0,0 +1,99 @@
+"""tests for the module printer_registry"""
+
+import json
+
+import pytest
+from bambulabs_api.states_info import GcodeState
+
+from cogs.utils.models import PrinterStorage, StatusMessageStorage
+from cogs.utils.printer_registry import SQLitePrinterStorage
+
+PRINTER = {"ip": "1.1.1.1", "access_code": "12345", "serial": "AD12345"}
+OTHER = {"ip": "2.2.2.2", "access_code": "54321", "serial": "AD54321"}
+
+
+def test_json_registry_is_migrated_once(tmp_path):
+    """The JSON registry is imported on the first start only."""
+    json_path = tmp_path / "printer.json"
+    json_path.write_text(json.dumps({"p1": PRINTER, "p2": OTHER}), encoding="utf-8")
+    db_path = str(tmp_path / "printers.db")
+
+    storage = SQLitePrinterStorage(db_path, json_path=str(json_path))
+    assert storage.load() == {"p1": PRINTER, "p2": OTHER}
+    assert storage.delete("p2")
+    storage.close()
+
+    reopened = SQLitePrinterStorage(db_path, json_path=str(json_path))
+    assert list(reopened.printers) == ["p1"]
+    assert reopened._connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"  # pylint: disable=protected-access
+    reopened.close()
+
+
+def test_single_row_operations(tmp_path):
+    """Lookups, renames and deletes work on single rows and keep the extra columns."""
+    storage = SQLitePrinterStorage(str(tmp_path / "printers.db"), json_path=None)
+    storage.set("p1", PRINTER, guild_id=7)
+    storage.set("p2", OTHER)
+    storage.record_state("p1", GcodeState.RUNNING)
+
+    assert storage.printers.get("p1") == PRINTER
+    assert storage.printers.get("missing") is None
+    assert "p2" in storage.printers and len(storage.printers) == 2
+    assert storage.find_by_serial("AD54321") == "p2"
+
+    storage.rename("p1", "renamed", OTHER)
+    assert list(storage.printers) == ["renamed", "p2"]
+    assert storage.printers["renamed"] == OTHER
+    assert storage.printers_of_guild(7) == ["renamed"]
+    assert storage.last_state("renamed") == "RUNNING"
+
+    assert storage.delete("renamed")
+    assert not storage.delete("renamed")
+    assert storage.load() == {"p2": OTHER}
+    storage.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_status_message_ids_follow_renames_and_deletes(tmp_path, backend):
+    """No status message ID is left under a stale name after a rename or delete."""
+    messages_path = str(tmp_path / "status_messages.json")
+    status_messages = StatusMessageStorage(messages_path)
+    if backend == "sqlite":
+        storage = SQLitePrinterStorage(str(tmp_path / "printers.db"), json_path=None,
+                                       status_messages=status_messages)
+    else:
+        storage = PrinterStorage(str(tmp_path / "printer.json"),
+                                 status_messages=status_messages)
+    storage.set("p1", PRINTER)
+    storage.set("p2", OTHER)
+    status_messages.set("p1", 11)
+    status_messages.set("p2", 22)
+
+    storage.rename("p1", "renamed", PRINTER)
+    assert StatusMessageStorage(messages_path).message_ids == {"p2": 22, "renamed": 11}
+
+    storage.rename("renamed", "p2", PRINTER)
+    assert StatusMessageStorage(messages_path).message_ids == {"p2": 11}
+
+    assert storage.delete("p2")
+    assert StatusMessageStorage(messages_path).message_ids == {}
+    storage.close()
+
+
+def test_failed_message_id_write_rolls_back_the_rename(tmp_path, monkeypatch):
+    """The SQLite rename is undone when the status message IDs can't be written."""
+    status_messages = StatusMessageStorage(str(tmp_path / "status_messages.json"))
+    storage = SQLitePrinterStorage(str(tmp_path / "printers.db"), json_path=None,
+                                   status_messages=status_messages)
+    storage.set("p1", PRINTER)
+    status_messages.set("p1", 11)
+
+    def fail(*_):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(status_messages, "rename", fail)
+    with pytest.raises(OSError):
+        storage.rename("p1", "renamed", PRINTER)
+    assert list(storage.printers) == ["p1"]
+    assert status_messages.get("p1") == 11
+    storage.close()
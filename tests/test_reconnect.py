@@ -0,0 +1,51 @@
+"""tests for the module reconnect"""
+
+import asyncio
+
+import pytest
+from cogs.utils.enums import CircuitState
+from cogs.utils.reconnect import ReconnectScheduler
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_background_probe_closes_it():
+    """
+    Test that the circuit opens after the failure threshold and that the
+    background probe retries until the printer connects again.
+    """
+    probe_results = [False, True]
+    probed = []
+
+    async def probe(printer_name):
+        probed.append(printer_name)
+        return probe_results.pop(0)
+
+    scheduler = ReconnectScheduler(probe, failure_threshold=2, base_delay=0.01, max_delay=0.02)
+
+    scheduler.record_failure("p1")
+    assert not scheduler.is_open("p1")
+    scheduler.record_failure("p1")
+    assert scheduler.is_open("p1")
+    assert scheduler.circuits()["p1"].state is CircuitState.OPEN
+
+    for _ in range(50):
+        if not scheduler.is_open("p1"):
+            break
+        await asyncio.sleep(0.01)
+
+    assert probed == ["p1", "p1"]
+    assert not scheduler.is_open("p1")
+    assert "p1" not in scheduler.circuits()
+
+
+def test_next_delay_is_jittered_and_capped():
+    """
+    Test that the probe delay grows with failures, never exceeds the maximum
+    and is never shorter than half of the un-jittered delay.
+    """
+    scheduler = ReconnectScheduler(probe_callback=None, failure_threshold=3,
+                                   base_delay=10, max_delay=40)
+
+    assert 5 <= scheduler.next_delay(3) <= 10
+    assert 10 <= scheduler.next_delay(4) <= 20
+    assert 20 <= scheduler.next_delay(10) <= 40
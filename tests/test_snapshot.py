@@ -0,0 +1,57 @@
+"""tests for the module snapshot"""
+
+from types import SimpleNamespace
+
+import pytest
+from bambulabs_api.states_info import GcodeState
+from cogs.utils.snapshot import PrinterSnapshot
+
+REPORT = {
+    "gcode_state": "RUNNING",
+    "mc_percent": 42,
+    "mc_remaining_time": 17,
+    "layer_num": 120,
+    "total_layer_num": 300,
+    "spd_mag": 100,
+    "lights_report": [{"node": "chamber_light", "mode": "on"}],
+    "bed_temper": 60.0,
+    "nozzle_temper": 220.5,
+    "device": {"ctc": {"info": {"temp": 35}}},
+    "fan_gear": 255 + (128 << 8) + (64 << 16),
+    "print_error": 0
+}
+
+
+def test_capture_reads_one_report():
+    """
+    Test that a snapshot takes every value from the last MQTT report,
+    including the packed fan speeds and the CTC chamber temperature.
+    """
+    printer = SimpleNamespace(mqtt_client=SimpleNamespace(dump=lambda: {"print": REPORT}))
+
+    snapshot = PrinterSnapshot.capture(printer)
+
+    assert snapshot.state == GcodeState.RUNNING
+    assert (snapshot.percentage, snapshot.layer, snapshot.total_layers) == (42, 120, 300)
+    assert snapshot.light_state == "on"
+    assert snapshot.chamber_temperature == 35.0
+    assert (snapshot.part_fan_speed, snapshot.aux_fan_speed, snapshot.chamber_fan_speed) == (
+        255, 128, 64
+    )
+    assert PrinterSnapshot.from_report({}).state == GcodeState.UNKNOWN
+
+
+def test_snapshots_are_immutable_and_diffable():
+    """
+    Test that snapshots can't be modified and that `diff` names exactly the
+    changed fields, ignoring the capture time.
+    """
+    before = PrinterSnapshot.from_report(REPORT)
+    after = PrinterSnapshot.from_report({**REPORT, "mc_percent": 43, "layer_num": 121})
+
+    with pytest.raises(AttributeError):
+        before.percentage = 50
+    assert after.diff(before) == {"percentage", "layer"}
+    assert not PrinterSnapshot.from_report(REPORT).diff(before)
+    assert PrinterSnapshot.from_report(REPORT) == before
+    assert after.diff(None) == set(PrinterSnapshot.FIELDS)
@@ -0,0 +1,110 @@
+"""tests for the module status_board"""
+
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+from cogs.ui.outbox import DiscordOutbox
+from cogs.ui.status_board import StatusBoard, StatusContent
+from cogs.utils.models import StatusMessageStorage
+
+
+class FakeChannel:
+    """Records sent and edited messages like a text channel would."""
+
+    def __init__(self):
+        self.id = 42  # pylint: disable=invalid-name
+        self.sent = []
+        self.edits = []
+        self.deleted = set()
+
+    async def send(self, **kwargs):
+        """Post a new message."""
+        self.sent.append(kwargs)
+        return SimpleNamespace(id=len(self.sent))
+
+    def get_partial_message(self, message_id):
+        """Return a message handle that can be edited."""
+        async def edit(**kwargs):
+            if message_id in self.deleted:
+                raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "gone")
+            self.edits.append((message_id, kwargs))
+            return SimpleNamespace(id=message_id)
+        return SimpleNamespace(edit=edit)
+
+
+def _renderer(title, rendered):
+    """Builds a status renderer that records when it is called."""
+    async def render():
+        rendered.append(title)
+        return StatusContent(embed=discord.Embed(title=title))
+    return render
+
+
+@pytest.mark.asyncio
+async def test_rapid_updates_are_coalesced_into_one_edit(tmp_path):
+    """
+    Test that the first update posts the status message, and that a burst of
+    updates within the edit interval becomes one edit with the latest state.
+    """
+    channel = FakeChannel()
+    storage = StatusMessageStorage(str(tmp_path / "status_messages.json"))
+    board = StatusBoard(lambda: channel, storage=storage, min_interval=0.05,
+                        outbox=DiscordOutbox())
+    rendered = []
+
+    board.update("X1", _renderer("RUNNING", rendered))
+    await asyncio.sleep(0.01)
+    for title in ("PAUSE", "RUNNING again", "FINISH"):
+        board.update("X1", _renderer(title, rendered))
+    await asyncio.sleep(0.1)
+
+    assert len(channel.sent) == 1
+    assert [kwargs["embed"].title for _, kwargs in channel.edits] == ["FINISH"]
+    assert rendered == ["RUNNING", "FINISH"]
+    assert StatusMessageStorage(storage.path).get("X1") == 1
+
+
+@pytest.mark.asyncio
+async def test_deleted_status_message_is_posted_again(tmp_path):
+    """
+    Test that a status message deleted in Discord is replaced by a new one
+    whose ID is stored.
+    """
+    channel = FakeChannel()
+    storage = StatusMessageStorage(str(tmp_path / "status_messages.json"))
+    storage.set("X1", 7)
+    channel.deleted.add(7)
+    board = StatusBoard(lambda: channel, storage=storage, min_interval=0,
+                        outbox=DiscordOutbox())
+
+    board.update("X1", _renderer("RUNNING", []))
+    await asyncio.sleep(0.01)
+
+    assert len(channel.sent) == 1
+    assert storage.get("X1") == 1
+
+
+@pytest.mark.asyncio
+async def test_failing_render_does_not_stop_the_board(tmp_path, caplog):
+    """
+    An error while rendering is logged, and an update that came in meanwhile is
+    still published by the same worker.
+    """
+    channel = FakeChannel()
+    storage = StatusMessageStorage(str(tmp_path / "status_messages.json"))
+    board = StatusBoard(lambda: channel, storage=storage, min_interval=0.05,
+                        outbox=DiscordOutbox())
+
+    async def broken_render():
+        await asyncio.sleep(0.02)
+        raise ValueError("camera timed out")
+
+    board.update("X1", broken_render)
+    await asyncio.sleep(0.01)
+    board.update("X1", _renderer("RUNNING", []))
+    await asyncio.sleep(0.1)
+
+    assert [kwargs["embed"].title for kwargs in channel.sent] == ["RUNNING"]
+    assert "Failed to update the status message of `X1`" in caplog.text
@@ -0,0 +1,95 @@
+"""tests for the module telemetry"""
+
+import math
+import time
+
+import pytest
+
+from cogs.utils.snapshot import PrinterSnapshot
+from cogs.utils.telemetry import RingSeries, TelemetryRecorder, METRICS
+
+
+def snapshot_at(captured_at, bed_temperature, percentage="-"):
+    """Snapshot of a running printer with the given bed temperature."""
+    report = PrinterSnapshot.from_report({
+        "gcode_state": "RUNNING",
+        "bed_temper": bed_temperature,
+        "mc_percent": percentage,
+    })
+    return PrinterSnapshot(
+        **{name: getattr(report, name) for name in PrinterSnapshot.FIELDS},
+        captured_at=captured_at
+    )
+
+
+def test_ring_series_keeps_the_newest_samples():
+    """A full ring overwrites its oldest samples and returns them in order."""
+    series = RingSeries(capacity=3)
+    for timestamp in range(5):
+        series.append(float(timestamp), tuple(float(timestamp) for _ in METRICS))
+
+    assert series.samples("layer") == ([2.0, 3.0, 4.0], [2.0, 3.0, 4.0])
+    assert series.samples("layer", since=4.0) == ([4.0], [4.0])
+    assert series.oldest == 2.0
+
+
+@pytest.mark.asyncio
+async def test_samples_are_downsampled_and_persisted(tmp_path):
+    """One-minute averages are written to disk and restored by a new recorder."""
+    now = time.time()
+    # On a quarter-hour, so the three minutes don't close a fifteen-minute average
+    start = now - now % 900 - 3600
+    recorder = TelemetryRecorder(str(tmp_path), raw_capacity=4)
+    for offset in range(0, 180, 20):
+        recorder.record("X1", snapshot_at(start + offset, bed_temperature=offset))
+
+    timestamps, values = recorder.series("X1", "bed_temperature", since=0)
+    assert timestamps == [start, start + 60]
+    assert values == [20.0, 80.0]
+    assert math.isnan(recorder.series("X1", "percentage", since=0)[1][0])
+    assert recorder.version("X1") == 9
+    assert not list(tmp_path.iterdir())
+
+    await recorder.close()
+    restored = TelemetryRecorder(str(tmp_path), raw_capacity=4)
+    await restored.load("X1")
+    assert restored.series("X1", "bed_temperature", since=0) == (timestamps, values)
+
+
+def test_memory_is_fixed_per_printer(tmp_path):
+    """The ring buffers don't grow with the number of samples."""
+    recorder = TelemetryRecorder(str(tmp_path), raw_capacity=10,
+                                 minute_capacity=10, quarter_capacity=10)
+    recorder.record("X1", snapshot_at(0.0, 20))
+    allocated = recorder.nbytes
+    for timestamp in range(1, 5000):
+        recorder.record("X1", snapshot_at(float(timestamp * 30), 20))
+
+    assert recorder.nbytes == allocated
+
+
+def test_quarters_average_the_closed_minutes():
+    """
+    A quarter-hour is the average of its one-minute averages, so a minute with
+    many samples doesn't outweigh a minute with one.
+    """
+    start = 900.0 * 1000
+    recorder = TelemetryRecorder(None, raw_capacity=1, minute_capacity=1, quarter_capacity=4)
+    for offset in (0, 15, 30, 45):
+        recorder.record("X1", snapshot_at(start + offset, bed_temperature=0))
+    recorder.record("X1", snapshot_at(start + 60, bed_temperature=100))
+    recorder.record("X1", snapshot_at(start + 900, bed_temperature=100))
+    recorder.record("X1", snapshot_at(start + 960, bed_temperature=100))
+
+    assert recorder.series("X1", "bed_temperature", since=start) == ([start], [50.0])
+
+
+@pytest.mark.asyncio
+async def test_lookups_of_unknown_printers_add_nothing(tmp_path):
+    """Loading, reading the series or the version of an unknown printer doesn't create a history."""
+    recorder = TelemetryRecorder(str(tmp_path))
+
+    await recorder.load("typo")
+    assert recorder.series("typo", "bed_temperature", since=0) == ([], [])
+    assert recorder.version("typo") == 0
+    assert recorder.nbytes == 0
@@ -0,0 +1,85 @@
+"""tests for the module timelapse"""
+
+import io
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+from cogs.utils import timelapse
+from cogs.utils.timelapse import FrameRingBuffer, TimelapseRecorder, render_timelapse
+
+
+def _frame(shade):
+    """Encodes a noisy test frame, so the GIF doesn't compress to nothing."""
+    image = Image.effect_noise((320, 240), 64).convert("RGB")
+    image.paste((shade, 0, 0), (0, 0, 32, 32))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_ring_buffer_overwrites_oldest_frames(tmp_path):
+    """
+    Test that the ring buffer keeps only its capacity of frames on disk and
+    returns them from the oldest to the newest.
+    """
+    buffer = FrameRingBuffer(tmp_path / "X1", capacity=3)
+    for shade in range(5):
+        buffer.append(bytes([shade]))
+
+    assert len(buffer) == 3
+    assert len(list((tmp_path / "X1").iterdir())) == 3
+    assert [path.read_bytes() for path in buffer.paths()] == [b"\x02", b"\x03", b"\x04"]
+
+
+def test_render_timelapse_fits_size_limit(tmp_path):
+    """
+    Test that the rendered GIF keeps the frame order and that a render over
+    the size limit is redone with fewer or smaller frames until it fits.
+    """
+    buffer = FrameRingBuffer(tmp_path / "frames", capacity=100)
+    for shade in range(0, 250, 10):
+        buffer.append(_frame(shade))
+    frame_paths = [str(path) for path in buffer.paths()]
+    output_path = tmp_path / "timelapse.gif"
+
+    full_size = render_timelapse(frame_paths, str(output_path), max_bytes=10**9)
+    assert full_size is not None
+    with Image.open(output_path) as gif:
+        assert gif.n_frames == 25
+
+    limit = full_size // 3
+    size = render_timelapse(frame_paths, str(output_path), max_bytes=limit)
+    assert size is not None and size <= limit
+    assert output_path.stat().st_size == size
+
+
+@pytest.mark.asyncio
+async def test_captured_frames_are_fresh_and_stored_at_gif_size(tmp_path, monkeypatch):
+    """
+    Test that every capture takes a new camera frame, also right after the
+    previous one, and that frames are scaled down before they are written.
+    """
+    captures = []
+
+    async def run_inline(func, *args):
+        return func(*args)
+
+    async def get_camera_frame(*_):
+        captures.append(len(captures))
+        frame = io.BytesIO()
+        Image.new("RGB", (1920, 1080), (len(captures) * 100, 40, 60)).save(frame, format="JPEG")
+        return frame.getvalue()
+
+    monkeypatch.setattr(timelapse, "run_image_task", run_inline)
+    monkeypatch.setattr(timelapse, "get_camera_frame", get_camera_frame)
+    buffer = FrameRingBuffer(tmp_path / "X1", capacity=3)
+
+    for _ in range(2):
+        await TimelapseRecorder._capture("X1", SimpleNamespace(), buffer)  # pylint: disable=protected-access
+
+    first, second = buffer.paths()
+    assert len(captures) == 2
+    assert first.read_bytes() != second.read_bytes()
+    with Image.open(first) as frame:
+        assert max(frame.size) == timelapse.TIMELAPSE_MAX_DIMENSION